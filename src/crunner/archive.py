@@ -0,0 +1,212 @@
+import datetime
+import uuid
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+
+import gpxpy.gpx
+import polars as pl
+
+from crunner.common import ARCHIVE_PATH, RUNS_PATH
+from crunner.gpx import read_gpx
+from crunner.util import atomic_write
+
+RUNS_ARCHIVE = "runs"
+
+# Month partition of runs without any timestamp
+UNKNOWN_MONTH = "unknown"
+
+SCHEMA = {
+    "activity": pl.String,
+    "segment": pl.UInt32,
+    "lat": pl.Float64,
+    "lng": pl.Float64,
+    "time": pl.Datetime("us", "UTC"),
+}
+PARTITION_SCHEMA = {"area": pl.String, "month": pl.String}
+
+
+def to_utc(time: Optional[datetime.datetime]) -> Optional[datetime.datetime]:
+    if time is None:
+        return None
+
+    # Timestamps without a timezone are taken to be in UTC already
+    if time.tzinfo is None:
+        return time.replace(tzinfo=datetime.UTC)
+
+    return time.astimezone(datetime.UTC)
+
+
+def to_points(
+    activity: str,
+    lat: list[float],
+    lng: list[float],
+    times: list[Optional[datetime.datetime]],
+    segments: list[int],
+) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "activity": [activity] * len(lat),
+            "segment": segments,
+            "lat": lat,
+            "lng": lng,
+            "time": [to_utc(time) for time in times],
+        },
+        schema=SCHEMA,
+    )
+
+
+def points_from_gpx(activity: str, gpx: gpxpy.gpx.GPX) -> pl.DataFrame:
+    """
+    Collect the points of a parsed GPX file, e.g. of a download before it is stripped
+    :param activity: Name of the run file (relative to its area, without suffix)
+    :param gpx: Parsed GPX file
+    :return: Points of the run
+    """
+    points = [
+        (segment_idx, point)
+        for track in gpx.tracks
+        for segment_idx, segment in enumerate(track.segments)
+        for point in segment.points
+    ]
+
+    return to_points(
+        activity,
+        [point.latitude for _, point in points],
+        [point.longitude for _, point in points],
+        [point.time for _, point in points],
+        [segment_idx for segment_idx, _ in points],
+    )
+
+
+def points_from_path(activity: str, path: Path) -> pl.DataFrame:
+    """
+    Collect the points of a GPX file on disk
+    :param activity: Name of the run file (relative to its area, without suffix)
+    :param path: Path of the GPX file
+    :return: Points of the run
+    """
+    data = read_gpx(path, with_times=True)
+
+    segments = [0] * len(data.lat)
+    ends = [*data.starts[1:].tolist(), len(data.lat)]
+    for segment_idx, (start, end) in enumerate(zip(data.starts.tolist(), ends)):
+        segments[start:end] = [segment_idx] * (end - start)
+
+    return to_points(
+        activity, data.lat.tolist(), data.lng.tolist(), data.times, segments
+    )
+
+
+def find_month(points: pl.DataFrame) -> str:
+    times = points["time"].drop_nulls()
+    return times.min().strftime("%Y-%m") if len(times) else UNKNOWN_MONTH
+
+
+class RunArchive:
+    """
+    Append-only columnar store of the points of all recorded runs
+    Points are stored as Parquet files in (hive) partitions by area and month, to which
+    every batch of new runs adds a file, such that scans only read the partitions they need
+    """
+
+    def __init__(self, path: Path = ARCHIVE_PATH / RUNS_ARCHIVE):
+        self.path = path
+
+    def __partition_path(self, area: str, month: str) -> Path:
+        return self.path / f"area={quote(area)}" / f"month={quote(month)}"
+
+    def part_paths(self, area: Optional[str] = None) -> list[Path]:
+        path = self.path / f"area={quote(area)}" if area else self.path
+        return sorted(path.glob("**/*.parquet"))
+
+    def scan(self, area: Optional[str] = None) -> pl.LazyFrame:
+        """
+        Lazily scan the archived points, such that filters on the area, month or other
+        columns are pushed down to the Parquet files
+        :param area: Area to scan, or None for all areas
+        :return: Points with the columns activity, segment, lat, lng, time, area and month
+        """
+        paths = self.part_paths(area)
+        if not paths:
+            return pl.LazyFrame(schema={**SCHEMA, **PARTITION_SCHEMA})
+
+        return pl.scan_parquet(
+            paths,
+            hive_partitioning=True,
+            hive_schema=PARTITION_SCHEMA,
+        )
+
+    def activities(self, area: str) -> set[str]:
+        return set(
+            self.scan(area).select("activity").unique().collect()["activity"].to_list()
+        )
+
+    def append(self, area: str, runs: list[pl.DataFrame]):
+        """
+        Add the points of new runs to the archive, writing one file per month partition
+        :param area: Area the runs belong to
+        :param runs: Points of every run, as created by points_from_gpx/points_from_path
+        """
+        months: dict[str, list[pl.DataFrame]] = {}
+
+        # Runs without points (e.g. empty GPX files) would only write empty files
+        for points in (points for points in runs if len(points)):
+            months.setdefault(find_month(points), []).append(points)
+
+        for month, month_runs in months.items():
+            path = self.__partition_path(area, month)
+            path.mkdir(parents=True, exist_ok=True)
+
+            with atomic_write(path / f"part-{uuid.uuid4().hex}.parquet", "wb") as file:
+                pl.concat(month_runs).sort(
+                    "activity", maintain_order=True
+                ).write_parquet(file, statistics=True)
+
+    def sync(self, area: str) -> int:
+        """
+        Archive the runs of an area that are not archived yet
+        :param area: Area (directory in the runs directory) to synchronise
+        :return: Number of newly archived runs
+        """
+        area_path = RUNS_PATH / area
+        if not area_path.exists():
+            return 0
+
+        archived = self.activities(area)
+        runs = [
+            points_from_path(activity, path)
+            for path in sorted(area_path.rglob("*.gpx"))
+            if (activity := path.relative_to(area_path).with_suffix("").as_posix())
+            not in archived
+        ]
+
+        if runs:
+            self.append(area, runs)
+            print(f"Archived {len(runs)} runs of {area}")
+
+        return len(runs)
+
+    def compact(self, area: Optional[str] = None):
+        """
+        Merge the files of every partition into a single file
+        :param area: Area to compact, or None for all areas
+        """
+        partitions: dict[Path, list[Path]] = {}
+        for path in self.part_paths(area):
+            partitions.setdefault(path.parent, []).append(path)
+
+        for partition, paths in partitions.items():
+            if len(paths) < 2:
+                continue
+
+            points = pl.read_parquet(paths, hive_partitioning=False)
+            with atomic_write(
+                partition / f"part-{uuid.uuid4().hex}.parquet", "wb"
+            ) as file:
+                points.sort("activity", maintain_order=True).write_parquet(
+                    file, statistics=True
+                )
+
+            for path in paths:
+                path.unlink()
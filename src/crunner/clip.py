@@ -0,0 +1,155 @@
+import networkx as nx
+import numpy as np
+import shapely
+
+from crunner.geometry import find_geometry
+from crunner.graph import Edge
+
+# Distance (in degrees) within which a cut end point is considered the original node
+SNAP_TOLERANCE = 1e-9
+
+# Attributes of an edge that are scaled to the part of it that a cut piece covers
+SCALED_ATTRS = ("length", "distance")
+
+
+class EdgeIndex:
+    """
+    Spatial index over the edge geometries of a graph to quickly find the edges in an area
+    """
+
+    def __init__(self, graph: nx.MultiDiGraph):
+        self.graph = graph
+        self.edges: list[Edge] = []
+        geometries = []
+        straight_idxs, straight_coords = [], []
+
+        for src, dst, key, data in graph.edges(keys=True, data=True):
+            geometry = find_geometry(data)
+            if geometry is None:
+                straight_idxs.append(len(geometries))
+                straight_coords.append(
+                    [
+                        (graph.nodes[node]["x"], graph.nodes[node]["y"])
+                        for node in (src, dst)
+                    ]
+                )
+
+            self.edges.append((src, dst, key))
+            geometries.append(geometry)
+
+        self.geometries = np.array(geometries, dtype=object)
+
+        # Edges without geometry are straight lines, which are created at once
+        if straight_idxs:
+            self.geometries[straight_idxs] = shapely.linestrings(straight_coords)
+
+        self.tree = shapely.STRtree(self.geometries)
+
+    def query(self, polygon: shapely.Geometry) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the edges that intersect a polygon
+        :param polygon: Polygon to intersect with
+        :return: Indices of the intersecting edges and whether they lie within the polygon
+        """
+        idxs = np.sort(self.tree.query(polygon, predicate="intersects"))
+
+        shapely.prepare(polygon)
+        is_within = shapely.contains_properly(polygon, self.geometries[idxs])
+
+        return idxs, is_within
+
+
+def find_reversed(
+    geometry: shapely.LineString, lines: list[shapely.LineString]
+) -> list[bool]:
+    if not lines:
+        return []
+
+    # Lines are reversed when their start lies further along the geometry than their end
+    starts = shapely.line_locate_point(
+        geometry, shapely.points([l.coords[0] for l in lines])
+    )
+    ends = shapely.line_locate_point(
+        geometry, shapely.points([l.coords[-1] for l in lines])
+    )
+
+    return list(starts > ends)
+
+
+def clip_graph(
+    graph: nx.MultiDiGraph,
+    polygon: shapely.Polygon | shapely.MultiPolygon,
+    index: EdgeIndex | None = None,
+) -> nx.MultiDiGraph:
+    """
+    Clip a graph to a polygon, cutting the edges that cross its boundary
+    Every piece of a cut edge that lies inside the polygon is kept, with a new node
+    placed where the edge crosses the boundary
+    :param graph: Graph to clip
+    :param polygon: Polygon to clip the graph to
+    :param index: Spatial index of the graph, which is created when not given
+    :return: Clipped graph
+    """
+    index = index if index is not None else EdgeIndex(graph)
+    idxs, is_within = index.query(polygon)
+
+    # Edges completely within the polygon are kept as is
+    clipped = graph.edge_subgraph([index.edges[idx] for idx in idxs[is_within]]).copy()
+    clipped.graph.update(graph.graph)
+
+    # Edges crossing the boundary are cut, where the new end points become nodes
+    next_id = max(graph.nodes, default=0) + 1
+    cut_nodes: dict[tuple[float, float], int] = {}
+
+    def find_node(coord: tuple[float, float], node: int) -> int:
+        nonlocal next_id
+
+        # Keep the original node when the piece still ends there
+        data = graph.nodes[node]
+        if abs(data["x"] - coord[0]) + abs(data["y"] - coord[1]) <= SNAP_TOLERANCE:
+            clipped.add_node(node, **data)
+            return node
+
+        # Both directions of a street cross the boundary at the same point
+        coord = (round(coord[0], 9), round(coord[1], 9))
+        if coord not in cut_nodes:
+            cut_nodes[coord] = next_id
+            clipped.add_node(next_id, x=coord[0], y=coord[1], is_cut=True)
+            next_id += 1
+
+        return cut_nodes[coord]
+
+    cut_idxs = idxs[~is_within]
+    pieces = shapely.intersection(index.geometries[cut_idxs], polygon)
+
+    for idx, piece in zip(cut_idxs, pieces):
+        src, dst, key = index.edges[idx]
+        data = graph.edges[src, dst, key]
+        geometry = index.geometries[idx]
+
+        # Cutting might return points (touching the boundary) or reversed lines
+        lines = [
+            line
+            for line in shapely.get_parts(shapely.get_parts(piece))
+            if isinstance(line, shapely.LineString) and not line.is_empty
+        ]
+        lines = [
+            line.reverse() if is_reversed else line
+            for line, is_reversed in zip(lines, find_reversed(geometry, lines))
+        ]
+
+        for line in lines:
+            start, end = line.coords[0], line.coords[-1]
+            piece_src = find_node(start, src)
+            piece_dst = find_node(end, dst)
+
+            piece_data = {**data, "geometry": line}
+            for attr in SCALED_ATTRS:
+                if attr in data and geometry.length > 0:
+                    piece_data[attr] = data[attr] * line.length / geometry.length
+
+            clipped.add_edge(piece_src, piece_dst, **piece_data)
+
+    print(f"Clipped graph has {len(cut_nodes)} nodes on the boundary")
+
+    return clipped
@@ -0,0 +1,273 @@
+import json
+from pathlib import Path
+from typing import Any, Iterable
+
+import networkx as nx
+import numpy as np
+import polars as pl
+import shapely
+
+from crunner.geometry import (
+    MICRO_DEGREES,
+    PackedCoords,
+    encode_coords,
+    to_coords,
+    to_linestring,
+)
+from crunner.util import atomic_write
+
+NODES_SUFFIX = ".nodes.parquet"
+EDGES_SUFFIX = ".edges.parquet"
+
+# Attributes that always get the same type, regardless of how they were loaded
+BOOL_ATTRS = {"is_removed", "is_highlighted", "self_created", "oneway", "reversed"}
+FLOAT_ATTRS = {"x", "y", "distance", "length"}
+
+
+def columnar_paths(path: Path) -> tuple[Path, Path]:
+    return path.with_suffix(NODES_SUFFIX), path.with_suffix(EDGES_SUFFIX)
+
+
+def has_columnar(path: Path) -> bool:
+    """
+    Verify whether a graph has a columnar version that is at least as new as the graph file
+    :param path: Path of the graph (GraphML) file
+    :return: Whether the columnar version can be loaded instead
+    """
+    nodes_path, edges_path = columnar_paths(path)
+    if not nodes_path.exists() or not edges_path.exists():
+        return False
+
+    if not path.exists():
+        return True
+
+    mtime = path.stat().st_mtime
+    return nodes_path.stat().st_mtime >= mtime and edges_path.stat().st_mtime >= mtime
+
+
+def to_bool(value: Any) -> bool | None:
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.strip().lower() == "true"
+
+    return bool(value)
+
+
+def find_dtype(values: Iterable[Any]) -> pl.DataType:
+    types = {type(value) for value in values if value is not None}
+
+    if not types:
+        return pl.Null
+    if types == {bool}:
+        return pl.Boolean
+    if types == {int}:
+        return pl.Int64
+    if types <= {int, float}:
+        return pl.Float64
+
+    return pl.String
+
+
+def to_series(name: str, values: list[Any]) -> tuple[pl.Series, bool]:
+    """
+    Create a typed column from attribute values
+    :return: Column and whether single values should be unwrapped from lists when loading
+    """
+    # Lists (e.g. multiple street names) are stored as lists, single values are wrapped
+    if any(isinstance(value, (list, tuple)) for value in values):
+        values = [
+            None if v is None else list(v) if isinstance(v, (list, tuple)) else [v]
+            for v in values
+        ]
+        dtype = find_dtype(item for value in values if value for item in value)
+        if dtype == pl.String:
+            values = [None if v is None else [str(item) for item in v] for v in values]
+
+        return pl.Series(name, values, pl.List(dtype)), True
+
+    if name in BOOL_ATTRS:
+        return pl.Series(name, [to_bool(v) for v in values], pl.Boolean), False
+    if name in FLOAT_ATTRS:
+        values = [None if v is None else float(v) for v in values]
+        return pl.Series(name, values, pl.Float64), False
+
+    dtype = find_dtype(values)
+    if dtype == pl.String:
+        values = [None if v is None else str(v) for v in values]
+
+    return pl.Series(name, values, dtype), False
+
+
+def to_frame(
+    ids: dict[str, list], datas: list[dict], skip: set[str] = set()
+) -> tuple[pl.DataFrame, list[str]]:
+    attrs = sorted({attr for data in datas for attr in data} - skip - ids.keys())
+    columns = [pl.Series(name, values, pl.Int64) for name, values in ids.items()]
+    unwrap = []
+
+    for attr in attrs:
+        series, is_list = to_series(attr, [data.get(attr) for data in datas])
+        columns.append(series)
+
+        if is_list:
+            unwrap.append(attr)
+
+    return pl.DataFrame(columns), unwrap
+
+
+def to_wkb_series(geometries: list) -> pl.Series:
+    # Geometries that are still in binary form can be written as is
+    idxs = [idx for idx, geometry in enumerate(geometries) if geometry is not None]
+    lines = np.array(
+        [
+            (
+                None
+                if isinstance(geometries[idx], bytes)
+                else to_linestring(geometries[idx])
+            )
+            for idx in idxs
+        ],
+        dtype=object,
+    )
+
+    wkbs = [None] * len(geometries)
+    for idx, wkb in zip(idxs, shapely.to_wkb(lines) if idxs else []):
+        wkbs[idx] = geometries[idx] if isinstance(geometries[idx], bytes) else wkb
+
+    return pl.Series("geometry", wkbs, pl.Binary)
+
+
+def to_micro_degree_series(geometries: list) -> pl.Series:
+    # Every geometry becomes a flat list of x/y pairs
+    values = [
+        (
+            None
+            if (coords := to_coords(geometry)) is None
+            else encode_coords(coords).ravel().tolist()
+        )
+        for geometry in geometries
+    ]
+
+    return pl.Series("geometry", values, pl.List(pl.Int32))
+
+
+def save_columnar(graph: nx.MultiDiGraph, path: Path, micro_degrees: bool = False):
+    """
+    Save a graph as a node and edge Parquet file next to the given path
+    :param graph: Graph to save
+    :param path: Path of the graph (GraphML) file
+    :param micro_degrees: Whether to store coordinates as int32 micro-degrees
+    """
+    nodes_path, edges_path = columnar_paths(path)
+
+    # Nodes
+    node_ids, node_datas = zip(*graph.nodes(data=True)) if graph else ((), ())
+    df_nodes, node_unwrap = to_frame({"id": list(node_ids)}, node_datas)
+
+    if micro_degrees:
+        df_nodes = df_nodes.with_columns(
+            (pl.col(col) * MICRO_DEGREES).round().cast(pl.Int32)
+            for col in ("x", "y")
+            if col in df_nodes.columns
+        )
+
+    # Edges
+    edges = list(graph.edges(keys=True, data=True))
+    srcs, dsts, keys, edge_datas = zip(*edges) if edges else ((), (), (), ())
+    ids = {"src": list(srcs), "dst": list(dsts), "key": list(keys)}
+    df_edges, edge_unwrap = to_frame(ids, edge_datas, {"geometry"})
+
+    geometries = [data.get("geometry") for data in edge_datas]
+    df_edges = df_edges.with_columns(
+        to_micro_degree_series(geometries)
+        if micro_degrees
+        else to_wkb_series(geometries)
+    )
+
+    # Keep track of what the graph looked like to rebuild it the same way
+    metadata = {
+        "graph": json.dumps(graph.graph, default=str),
+        "directed": json.dumps(graph.is_directed()),
+        "unwrap": json.dumps({"nodes": node_unwrap, "edges": edge_unwrap}),
+        "micro_degrees": json.dumps(micro_degrees),
+    }
+
+    with atomic_write(nodes_path, "wb") as file:
+        df_nodes.write_parquet(file, metadata=metadata)
+    with atomic_write(edges_path, "wb") as file:
+        df_edges.write_parquet(file, metadata=metadata)
+
+
+def to_attrs(df: pl.DataFrame, unwrap: list[str]) -> list[dict]:
+    datas = df.to_dicts()
+
+    for data in datas:
+        for attr in [attr for attr, value in data.items() if value is None]:
+            del data[attr]
+
+        for attr in unwrap:
+            if attr in data and len(data[attr]) == 1:
+                data[attr] = data[attr][0]
+
+    return datas
+
+
+def to_packed_coords(series: pl.Series) -> list[PackedCoords | None]:
+    # All coordinates share a single buffer, which every edge keeps a slice of
+    lengths = series.list.len().fill_null(0).to_numpy() // 2
+    buffer = series.explode().drop_nulls().to_numpy().astype(np.int32).reshape(-1, 2)
+    ends = np.cumsum(lengths).tolist()
+
+    return [
+        PackedCoords(buffer, end - length, end) if length else None
+        for length, end in zip(lengths.tolist(), ends)
+    ]
+
+
+def load_columnar(path: Path) -> nx.MultiDiGraph:
+    nodes_path, edges_path = columnar_paths(path)
+
+    metadata = pl.read_parquet_metadata(nodes_path)
+    unwrap = json.loads(metadata.get("unwrap", "{}"))
+    is_directed = json.loads(metadata.get("directed", "true"))
+    micro_degrees = json.loads(metadata.get("micro_degrees", "false"))
+
+    graph = nx.MultiDiGraph() if is_directed else nx.MultiGraph()
+    graph.graph.update(json.loads(metadata.get("graph", "{}")))
+
+    # Nodes
+    df_nodes = pl.read_parquet(nodes_path)
+    if micro_degrees:
+        df_nodes = df_nodes.with_columns(
+            pl.col(col).cast(pl.Float64) / MICRO_DEGREES
+            for col in ("x", "y")
+            if col in df_nodes.columns
+        )
+
+    node_ids = df_nodes["id"].to_list()
+    node_datas = to_attrs(df_nodes.drop("id"), unwrap.get("nodes", []))
+
+    graph.add_nodes_from(zip(node_ids, node_datas))
+
+    # Edges
+    df_edges = pl.read_parquet(edges_path)
+    srcs, dsts, keys = (df_edges[col].to_list() for col in ("src", "dst", "key"))
+
+    # Geometries are kept in binary/packed form until they are needed
+    geometries = (
+        to_packed_coords(df_edges["geometry"])
+        if micro_degrees
+        else df_edges["geometry"].to_list()
+    )
+
+    edge_datas = to_attrs(
+        df_edges.drop("src", "dst", "key", "geometry"), unwrap.get("edges", [])
+    )
+    for data, geometry in zip(edge_datas, geometries):
+        if geometry is not None:
+            data["geometry"] = geometry
+
+    graph.add_edges_from(zip(srcs, dsts, keys, edge_datas))
+
+    return graph
@@ -5,10 +5,12 @@ Circuit = list[tuple[int, int, any]]
 __ROOT = Path(__file__).parent.parent.parent
 DATA_PATH = __ROOT / ".." / "data"
 
+ARCHIVE_PATH = DATA_PATH / "archive"
 CIRCUIT_PATH = DATA_PATH / "circuit"
 EXCEL_PATH = DATA_PATH / "excel"
 GPX_PATH = DATA_PATH / "gpx"
 GRAPH_PATH = DATA_PATH / "graph"
+HEATMAP_PATH = DATA_PATH / "heatmap"
 HTML_PATH = DATA_PATH / "html"
 MAP_PATH = DATA_PATH / "map"
 OFFSET_PATH = DATA_PATH / "offset"
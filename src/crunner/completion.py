@@ -0,0 +1,187 @@
+import json
+from collections import defaultdict
+from typing import Optional
+
+import networkx as nx
+import numpy as np
+from attrs import Factory, define
+from scipy.spatial import cKDTree
+
+from crunner.columnar import has_columnar
+from crunner.common import GRAPH_PATH, STREET_PATH
+from crunner.geo import find_origin, project
+from crunner.gpx import read_gpx
+from crunner.graph import Node
+from crunner.handler import Handler
+from crunner.matching import find_runs
+from crunner.util import atomic_write
+
+# Distance (in meters) from a run point within which a node counts as visited
+VISIT_RADIUS = 25.0
+
+# Fraction of the nodes of a street that should be visited before it is completed
+COMPLETED_FRACTION = 0.9
+
+# Directory next to the scraped CityStrides lists in which the local lists are stored
+LOCAL_STRIDES_DIR = "local"
+
+
+@define
+class StreetCompletion:
+    """
+    Completion of the streets of an area, in the same terms as CityStrides
+    """
+
+    n_nodes: dict[str, int] = Factory(dict)
+    n_visited: dict[str, int] = Factory(dict)
+    threshold: float = COMPLETED_FRACTION
+
+    def fraction(self, street: str) -> float:
+        return self.n_visited.get(street, 0) / max(self.n_nodes.get(street, 0), 1)
+
+    @property
+    def completed(self) -> list[str]:
+        return sorted(
+            street for street in self.n_nodes if self.fraction(street) >= self.threshold
+        )
+
+    @property
+    def todo(self) -> list[str]:
+        return sorted(
+            street for street in self.n_nodes if self.fraction(street) < self.threshold
+        )
+
+
+def group_street_nodes(graph: nx.MultiGraph) -> dict[str, set[Node]]:
+    """
+    Group the nodes of a graph by the names of the streets (edges) they lie on
+    """
+    streets = defaultdict(set)
+
+    for src, dst, data in graph.edges(data=True):
+        if "name" not in data:
+            continue
+
+        street_names = data["name"]
+        if not isinstance(street_names, list):
+            street_names = [street_names]
+
+        for street in street_names:
+            streets[street].update((src, dst))
+
+    return dict(streets)
+
+
+def find_visited_nodes(
+    graph: nx.MultiGraph,
+    lat: np.ndarray,
+    lng: np.ndarray,
+    radius: float = VISIT_RADIUS,
+) -> set[Node]:
+    """
+    Find the nodes of a graph that lie within a radius of any of the given run points
+    :param graph: Graph to find the visited nodes of
+    :param lat: Latitudes of all run points
+    :param lng: Longitudes of all run points
+    :param radius: Distance (in meters) within which a node counts as visited
+    :return: Visited nodes
+    """
+    if not len(lat) or not graph.number_of_nodes():
+        return set()
+
+    nodes = list(graph.nodes)
+    node_lat = np.array([graph.nodes[node]["y"] for node in nodes])
+    node_lng = np.array([graph.nodes[node]["x"] for node in nodes])
+
+    # Index the run points, after which every node only has to find its nearest point
+    origin = find_origin(node_lat, node_lng)
+    tree = cKDTree(np.column_stack(project(lat, lng, origin)))
+
+    distances, _ = tree.query(
+        np.column_stack(project(node_lat, node_lng, origin)),
+        distance_upper_bound=radius,
+    )
+
+    return {nodes[idx] for idx in np.flatnonzero(np.isfinite(distances))}
+
+
+def find_completion(
+    graph: nx.MultiGraph,
+    lat: np.ndarray,
+    lng: np.ndarray,
+    radius: float = VISIT_RADIUS,
+    threshold: float = COMPLETED_FRACTION,
+) -> StreetCompletion:
+    """
+    Find which streets of a graph are completed by the given run points
+    A street is completed when the fraction of its nodes that were visited passes a threshold
+    """
+    visited = find_visited_nodes(graph, lat, lng, radius)
+    completion = StreetCompletion(threshold=threshold)
+
+    for street, nodes in group_street_nodes(graph).items():
+        completion.n_nodes[street] = len(nodes)
+        completion.n_visited[street] = len(nodes & visited)
+
+    return completion
+
+
+def load_city_graph(area: str) -> Optional[nx.MultiDiGraph]:
+    # All streets of the city count, so use its full graph (as saved when finding streets)
+    path = GRAPH_PATH / area / f"{area}.graphml"
+    if not path.exists() and not has_columnar(path):
+        return None
+
+    return Handler.load_from_file(path)
+
+
+def complete_streets(
+    area: str,
+    graph: Optional[nx.MultiDiGraph] = None,
+    radius: float = VISIT_RADIUS,
+    threshold: float = COMPLETED_FRACTION,
+) -> StreetCompletion:
+    """
+    Compute the street completion of an area from all its runs, without CityStrides
+    The todo/completed lists are saved in the same format as the scraped CityStrides lists
+    :param area: Name of the area (city), as used in the runs and streets directories
+    :param graph: Graph of the whole area, the saved graph of the city by default
+    :param radius: Distance (in meters) within which a node counts as visited
+    :param threshold: Fraction of visited nodes from which a street is completed
+    :return: Completion of all streets in the graph
+    """
+    entries = find_runs(area)
+    if not entries:
+        print(f"No runs found for {area}")
+        return StreetCompletion(threshold=threshold)
+
+    if graph is None:
+        graph = load_city_graph(area)
+    if graph is None:
+        print(f"No graph found for {area}, save the graph of the whole city first")
+        return StreetCompletion(threshold=threshold)
+
+    runs = [read_gpx(entry.path) for entry in entries]
+    lat = np.concatenate([run.lat for run in runs])
+    lng = np.concatenate([run.lng for run in runs])
+
+    completion = find_completion(graph, lat, lng, radius, threshold)
+    completed, todo = completion.completed, completion.todo
+
+    strides_path = STREET_PATH / area / LOCAL_STRIDES_DIR
+    strides_path.mkdir(parents=True, exist_ok=True)
+
+    for name, streets in (
+        ("all", sorted(completion.n_nodes)),
+        ("todo", todo),
+        ("completed", completed),
+    ):
+        with atomic_write(strides_path / f"{name}.json") as file:
+            json.dump(streets, file, indent=4)
+
+    print(
+        f"Completed {len(completed)} of {len(completion.n_nodes)} streets in {area} "
+        f"from {len(lat)} points of {len(entries)} runs"
+    )
+
+    return completion
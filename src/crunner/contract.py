@@ -0,0 +1,218 @@
+from typing import Any
+
+import networkx as nx
+import numpy as np
+from attrs import Factory, define
+
+from crunner.geometry import to_coords
+from crunner.graph import Edge, Node
+
+# Attributes that are summed when edges are merged
+SUMMED_ATTRS = {"distance", "length", "travel_time"}
+
+
+@define
+class Contraction:
+    """
+    Reversible mapping of a contraction, from every merged edge to the chain it replaced
+    """
+
+    nodes: dict[Node, dict] = Factory(dict)
+    edges: dict[Edge, list[tuple[Node, Node, int, dict]]] = Factory(dict)
+
+    def __len__(self) -> int:
+        return len(self.edges)
+
+    def find_chain(self, edge: Edge) -> list[Edge]:
+        """
+        Find the original edges that a (merged) edge consists of, e.g. for displaying it
+        """
+        if edge not in self.edges:
+            return [edge]
+
+        return [(src, dst, key) for src, dst, key, _ in self.edges[edge]]
+
+    def expand(self, graph: nx.MultiDiGraph) -> nx.MultiDiGraph:
+        # Replace the merged edges with the chains they consist of
+        graph.remove_edges_from(edge for edge in self.edges if graph.has_edge(*edge))
+        graph.add_nodes_from(self.nodes.items())
+
+        for chain in self.edges.values():
+            graph.add_edges_from(chain)
+
+        return graph
+
+
+def merge_values(values: list[Any]) -> Any:
+    # Keep a single value when all edges agree, otherwise keep all distinct values
+    unique = []
+    for value in values:
+        for item in value if isinstance(value, list) else [value]:
+            if item not in unique:
+                unique.append(item)
+
+    return unique[0] if len(unique) == 1 else unique
+
+
+def merge_data(graph: nx.MultiDiGraph, nodes: list[Node], datas: list[dict]) -> dict:
+    data: dict[str, Any] = {}
+
+    for attr in {attr for edge_data in datas for attr in edge_data} - {"geometry"}:
+        values = [edge_data[attr] for edge_data in datas if attr in edge_data]
+
+        if attr in SUMMED_ATTRS:
+            data[attr] = float(sum(values))
+        else:
+            data[attr] = merge_values(values)
+
+    # Glue the geometries of the edges together, without repeating the shared nodes
+    coords = []
+    for src, dst, edge_data in zip(nodes, nodes[1:], datas):
+        edge_coords = to_coords(edge_data.get("geometry"))
+        if edge_coords is None:
+            edge_coords = np.array(
+                [
+                    (graph.nodes[node]["x"], graph.nodes[node]["y"])
+                    for node in (src, dst)
+                ]
+            )
+
+        # Geometries of undirected edges might run the other way
+        start = np.array((graph.nodes[src]["x"], graph.nodes[src]["y"]))
+        if np.abs(edge_coords[-1] - start).sum() < np.abs(edge_coords[0] - start).sum():
+            edge_coords = edge_coords[::-1]
+
+        coords.append(edge_coords if not coords else edge_coords[1:])
+
+    data["geometry"] = np.concatenate(coords)
+
+    return data
+
+
+class ChainContractor:
+    """
+    Contracts chains of degree-2 nodes into single edges in linear time
+    A node is only contracted when it connects exactly two other nodes in the same way
+    (one way or both ways) and all its edges agree on whether they are removed
+    """
+
+    def __init__(self, graph: nx.MultiDiGraph):
+        self.graph = graph
+
+    def __is_interior(self, node: Node) -> bool:
+        if self.graph.is_directed():
+            preds, succs = set(self.graph.predecessors(node)), set(
+                self.graph.successors(node)
+            )
+        else:
+            preds = succs = set(self.graph.neighbors(node))
+
+        neighbors = preds | succs
+        if len(neighbors) != 2 or node in neighbors:
+            return False
+
+        # Either a two-way street or a one-way street passing through
+        if not (preds == succs or (len(preds) == 1 and len(succs) == 1)):
+            return False
+
+        # Parallel edges would get lost by merging
+        edges = list(self.graph.edges(node, keys=True, data=True))
+        n_edges = len(neighbors)
+        if self.graph.is_directed():
+            edges += list(self.graph.in_edges(node, keys=True, data=True))
+            n_edges = len(preds) + len(succs)
+
+        if len(edges) != n_edges:
+            return False
+
+        # Removed and non-removed edges should stay apart
+        return len({data.get("is_removed", False) for *_, data in edges}) == 1
+
+    def __walk(
+        self, src: Node, nxt: Node, key: int, interior: set[Node]
+    ) -> tuple[list[Node], list[tuple[Node, Node, int]]]:
+        # Follow the chain until reaching a node that is not contracted
+        nodes, edges = [src, nxt], [(src, nxt, key)]
+        prev, curr = src, nxt
+
+        while curr in interior and curr != src:
+            successors = [
+                (dst, key)
+                for _, dst, key in self.graph.edges(curr, keys=True)
+                if dst != prev
+            ]
+            if not successors:
+                break
+
+            dst, key = successors[0]
+            edges.append((curr, dst, key))
+            nodes.append(dst)
+            prev, curr = curr, dst
+
+        return nodes, edges
+
+    def contract(self) -> Contraction:
+        contraction = Contraction()
+        interior = {node for node in self.graph.nodes if self.__is_interior(node)}
+
+        # Every edge belongs to exactly one chain, which starts at a node that is kept
+        used: set[tuple[Node, Node, int]] = set()
+        contracted: set[Node] = set()
+        chains = []
+
+        def collect(start: Node):
+            for _, nxt, key in list(self.graph.edges(start, keys=True)):
+                if nxt not in interior or (start, nxt, key) in used:
+                    continue
+
+                nodes, edges = self.__walk(start, nxt, key, interior)
+                used.update(edges)
+                if not self.graph.is_directed():
+                    used.update((dst, src, key) for src, dst, key in edges)
+
+                contracted.update(nodes[1:-1])
+                chains.append((nodes, edges))
+
+        for node in list(self.graph.nodes):
+            if node not in interior:
+                collect(node)
+
+        # Isolated cycles have no node to start from, so keep one of their nodes
+        for node in list(interior):
+            if node not in contracted and node in interior:
+                interior.discard(node)
+                collect(node)
+
+        # Replace every chain by a single edge
+        for nodes, edges in chains:
+            if len(edges) < 2:
+                continue
+
+            datas = [self.graph.edges[edge] for edge in edges]
+            data = merge_data(self.graph, nodes, datas)
+
+            chain = [(*edge, dict(edge_data)) for edge, edge_data in zip(edges, datas)]
+            self.graph.remove_edges_from(edges)
+
+            key = self.graph.add_edge(nodes[0], nodes[-1], **data)
+            contraction.edges[(nodes[0], nodes[-1], key)] = chain
+
+        # Nodes in the middle of chains are no longer needed
+        for node in contracted:
+            if node in interior and self.graph.degree(node) == 0:
+                contraction.nodes[node] = dict(self.graph.nodes[node])
+                self.graph.remove_node(node)
+
+        return contraction
+
+
+def contract_chains(graph: nx.MultiDiGraph) -> Contraction:
+    """
+    Contract all chains of degree-2 nodes in a graph (in place) into single edges
+    :param graph: Graph to contract
+    :return: Mapping from the merged edges to the edges they replaced, to expand them again
+    """
+    contraction = ChainContractor(graph).contract()
+    print(f"Contracted {len(contraction.nodes)} nodes into {len(contraction)} edges")
+
+    return contraction
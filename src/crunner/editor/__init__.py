@@ -14,6 +14,7 @@ from crunner.editor.command.add_edges import AddEdgesCommand
 from crunner.editor.command.add_node import AddNodeCommand
 from crunner.editor.command.add_nodes import AddNodesCommand
 from crunner.editor.command.change_graph import ChangeGraphCommand
+from crunner.editor.command.contract_chains import ContractChainsCommand
 from crunner.editor.command.extend_graph import ExtendGraphCommand
 from crunner.editor.command.find_circuit import FindCircuitCommand
 from crunner.editor.command.remove_toggled import RemoveToggledCommand
@@ -26,18 +27,25 @@ from crunner.editor.command.toggle_type import toggle_type_menu
 from crunner.explore import Explorer
 from crunner.graph import ToggleOption
 from crunner.handler import Handler
+from crunner.journal import Journal
+from crunner.path import Paths
+
+# Number of journaled changes after which the full graph is saved again
+COMPACT_EVERY = 100
 
 
 class EditorOptions(TypedDict):
     auto_save: Optional[bool]
     auto_circuit: Optional[bool]
     toggle_opt: Optional[ToggleOption]
+    simplify_tolerance: Optional[float]
 
 
 DEFAULT_OPTIONS: EditorOptions = {
     "auto_save": False,
     "auto_circuit": False,
     "toggle_opt": ToggleOption.KEEP_LARGEST,
+    "simplify_tolerance": None,
 }
 
 
@@ -48,6 +56,11 @@ class Editor:
         self.handler = Handler()
         self.graph: Optional[nx.MultiDiGraph] = None
         self.path: Optional[Path] = None
+        self.journal: Optional[Journal] = None
+        self.opts: EditorOptions = DEFAULT_OPTIONS
+
+        # Whether the saved graph is the graph being edited, onto which changes are journaled
+        self.is_saved = False
 
         # Commands
         self.COMMAND_MAP: dict[str, tuple[str, Callable]] = {}
@@ -95,6 +108,7 @@ Enter here (or press Q to quit): """
             return
 
         command.execute()
+        self.__record(command)
 
         # Register command in history for undo/redoing
         self.command_history.append(command)
@@ -106,6 +120,7 @@ Enter here (or press Q to quit): """
 
         command = self.command_history.pop()
         command.undo()
+        self.__record(command)
 
         self.command_redos.append(command)
 
@@ -116,23 +131,57 @@ Enter here (or press Q to quit): """
 
         command = self.command_redos.pop()
         command.redo()
+        self.__record(command)
 
         self.command_history.append(command)
 
+    def __record(self, command: Command):
+        if self.journal is not None:
+            self.journal.record(self.graph, *command.touched())
+
     def save_graph(self, path):
         path = path if path else input("Name for the graph (without extension): ")
         self.handler.save(self.graph, path)
 
-    def edit(
-        self,
-        graph: nx.MultiDiGraph,
-        path: Path,
-        opts: EditorOptions = {},
-    ):
-        opts = {**DEFAULT_OPTIONS, **opts}
+    def auto_save(self, path: Path):
+        # Save the full graph when the saved graph is another one (e.g. an older version or
+        # none at all) or too many changes were journaled
+        if (
+            not self.is_saved
+            or not Paths.graph(path).exists()
+            or len(self.journal) >= COMPACT_EVERY
+        ):
+            self.save_graph(path)
+            self.is_saved = True
+
+            # The saved graph holds all journaled changes, so start a new journal
+            self.journal.clear()
+            return
+
+        # Otherwise only save what changed since the last save
+        self.journal.flush()
 
+    def change_graph(self, graph: nx.MultiDiGraph, path: Path):
+        """
+        Edit another graph, of which changes are journaled against its own saved graph
+        :param graph: Graph to edit
+        :param path: Path of the graph
+        """
         self.graph = graph
         self.path = path
+        self.journal = Journal(Paths.graph(path)) if self.opts["auto_save"] else None
+
+        # The graph might differ from the saved one, so it is saved in full first
+        self.is_saved = False
+        self.__create_commands()
+        self.explorer.load_heatmap(self.graph)
+
+        # Commands of the previous graph can no longer be undone
+        self.command_history.clear()
+        self.command_redos.clear()
+
+    def __create_commands(self):
+        opts, path = self.opts, self.path
 
         self.COMMAND_MAP = {
             "T": (
@@ -190,12 +239,17 @@ Enter here (or press Q to quit): """
                     graph=self.graph,
                     path=path,
                     auto_circuit=opts["auto_circuit"],
+                    simplify_tolerance=opts["simplify_tolerance"],
                 ),
             ),
             "D": (
                 "Set distances based on geography",
                 partial(SetDistancesCommand, graph=self.graph),
             ),
+            "CC": (
+                "Contract chains of degree-2 nodes",
+                partial(ContractChainsCommand, graph=self.graph),
+            ),
             "S": (
                 "Save as",
                 partial(SaveGraphCommand, graph=self.graph, path=path),
@@ -205,16 +259,24 @@ Enter here (or press Q to quit): """
         }
         self.COMMAND_LIST = [func for _, func in self.COMMAND_MAP.values()]
 
+    def edit(
+        self,
+        graph: nx.MultiDiGraph,
+        path: Path,
+        opts: EditorOptions = {},
+    ):
+        self.opts = {**DEFAULT_OPTIONS, **opts}
+        self.change_graph(graph, path)
+
         output = ""
-        prompt = self.__create_edit_prompt()
 
         while True:
-            self.explorer.explore_roads(self.graph, path)
-            if opts["auto_save"]:
-                self.save_graph(path)
+            self.explorer.explore_roads(self.graph, self.path)
+            if self.opts["auto_save"]:
+                self.auto_save(self.path)
 
             # Ask the user for the next command
-            output = input(prompt)
+            output = input(self.__create_edit_prompt())
             if output.upper() == "Q":
                 break
 
@@ -36,6 +36,13 @@ class Command(ABC):
     def redo(self):
         self.execute()
 
+    def touched(self) -> tuple[set[Node], set[Edge]]:
+        """
+        Find the nodes and edges whose state the last execute/undo/redo may have changed
+        :return: Touched nodes and edges, where edges are given by at least their end nodes
+        """
+        return set(), set()
+
     def _toggle(self, nodes: set[Node], edges: set[Edge], attr: str = "is_removed"):
         # Toggle nodes
         for node in nodes:
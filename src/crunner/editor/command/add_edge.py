@@ -6,7 +6,7 @@ from shapely import LineString
 from veelog import setup_logger
 
 from crunner.editor.command import Command
-from crunner.graph import Node, find_node_location
+from crunner.graph import Edge, Node, find_node_location
 
 logger = setup_logger(__name__)
 
@@ -55,6 +55,13 @@ class AddEdgeCommand(Command):
         if self.is_undirected:
             self.graph.remove_edge(self.dst, self.src)
 
+    @override
+    def touched(self) -> tuple[set[Node], set[Edge]]:
+        if self.src is None or self.dst is None:
+            return set(), set()
+
+        return {self.src, self.dst}, {(self.src, self.dst)}
+
     @override
     def redo(self):
         self.graph.add_edge(self.src, self.dst, **self.data)
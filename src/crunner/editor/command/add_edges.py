@@ -77,6 +77,11 @@ class AddEdgesCommand(Command):
             if self.is_undirected:
                 self.graph.remove_edge(dst, src)
 
+    @override
+    def touched(self) -> tuple[set[Node], set[Edge]]:
+        nodes = {node for src, dst, *_ in self.edges for node in (src, dst)}
+        return nodes, set(self.edges)
+
     @override
     def redo(self):
         for src, dst, *_ in self.edges:
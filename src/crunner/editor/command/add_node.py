@@ -4,7 +4,7 @@ import networkx as nx
 from geopy.distance import geodesic
 
 from crunner.editor.command import Command
-from crunner.graph import Node, find_node_location
+from crunner.graph import Edge, Node, find_node_location
 
 
 class AddNodeCommand(Command):
@@ -32,6 +32,10 @@ class AddNodeCommand(Command):
     def undo(self):
         self.graph.remove_node(self.id)
 
+    @override
+    def touched(self) -> tuple[set[Node], set[Edge]]:
+        return ({self.id} if self.id is not None else set()), set()
+
     @override
     def redo(self):
         self.id = len(self.graph) + 1
@@ -4,7 +4,7 @@ import networkx as nx
 from geopy.distance import geodesic
 
 from crunner.editor.command import Command
-from crunner.graph import Node, find_node_location
+from crunner.graph import Edge, Node, find_node_location
 
 
 class AddNodesCommand(Command):
@@ -34,9 +34,19 @@ class AddNodesCommand(Command):
         for id in self.ids:
             self.graph.remove_node(id)
 
+    @override
+    def touched(self) -> tuple[set[Node], set[Edge]]:
+        return set(self.ids), set()
+
     @override
     def redo(self):
+        ids = []
         for id in self.ids:
-            data = self.datas[id]
+            data = self.datas.pop(id)
             id = len(self.graph) + 1
             self.graph.add_node(id, **data)
+
+            self.datas[id] = data
+            ids.append(id)
+
+        self.ids = ids
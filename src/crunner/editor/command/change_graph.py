@@ -17,8 +17,7 @@ class ChangeGraphCommand(Command):
         if not graph or not path:
             return
 
-        self.editor.graph = graph
-        self.editor.path = path
+        self.editor.change_graph(graph, path)
 
     @override
     def undo(self):
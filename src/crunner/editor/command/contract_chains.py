@@ -0,0 +1,36 @@
+from typing import Optional, override
+
+import networkx as nx
+
+from crunner.contract import Contraction, contract_chains
+from crunner.editor.command import Command
+from crunner.graph import Edge, Node
+
+
+class ContractChainsCommand(Command):
+    def __init__(self, graph: nx.MultiDiGraph):
+        super().__init__(graph)
+
+        self.contraction: Optional[Contraction] = None
+
+    @override
+    def execute(self):
+        self.contraction = contract_chains(self.graph)
+
+    @override
+    def undo(self):
+        if self.contraction is not None:
+            self.contraction.expand(self.graph)
+
+    @override
+    def touched(self) -> tuple[set[Node], set[Edge]]:
+        if self.contraction is None:
+            return set(), set()
+
+        # Both the merged edges and the chains they replaced
+        nodes = set(self.contraction.nodes)
+        edges = set(self.contraction.edges)
+        for chain in self.contraction.edges.values():
+            edges.update((src, dst, key) for src, dst, key, _ in chain)
+
+        return nodes, edges
@@ -88,6 +88,10 @@ class ExtendGraphCommand(Command):
         self.graph.remove_nodes_from(self.added_nodes.keys())
         self.graph.remove_edges_from(self.added_edges.keys())
 
+    @override
+    def touched(self) -> tuple[set[Node], set[Edge]]:
+        return set(self.added_nodes), set(self.added_edges)
+
     @override
     def redo(self):
         for node, data in self.added_nodes.items():
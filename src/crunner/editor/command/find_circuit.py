@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import override
+from typing import Optional, override
 
 import networkx as nx
 
@@ -11,10 +11,17 @@ from crunner.route import Postman
 
 
 class FindCircuitCommand(Command):
-    def __init__(self, graph: nx.MultiDiGraph, path: Path, auto_circuit: bool = False):
+    def __init__(
+        self,
+        graph: nx.MultiDiGraph,
+        path: Path,
+        auto_circuit: bool = False,
+        simplify_tolerance: Optional[float] = None,
+    ):
         super().__init__(graph)
 
         self.path = path
+        self.simplify_tolerance = simplify_tolerance
 
         self.postman = Postman()
         self.plotter = Plotter()
@@ -80,7 +87,9 @@ class FindCircuitCommand(Command):
         )
 
         # Save the circuit
-        self.plotter.plot_circuit(graph, self.circuit, self.path, self.stats)
+        self.plotter.plot_circuit(
+            graph, self.circuit, self.path, self.stats, self.simplify_tolerance
+        )
 
     @override
     def undo(self):
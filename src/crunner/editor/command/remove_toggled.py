@@ -52,6 +52,10 @@ class RemoveToggledCommand(Command):
     def undo(self):
         self.__add_all()
 
+    @override
+    def touched(self) -> tuple[set[Node], set[Edge]]:
+        return set(self.nodes), set(self.edges)
+
     @override
     def redo(self):
         self.__remove_all()
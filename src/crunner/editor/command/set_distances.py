@@ -5,7 +5,7 @@ from geopy.distance import geodesic
 from veelog import setup_logger
 
 from crunner.editor.command import Command
-from crunner.graph import Node, find_node_location
+from crunner.graph import Edge, Node, find_node_location
 
 logger = setup_logger(__name__)
 
@@ -14,6 +14,8 @@ class SetDistancesCommand(Command):
     def __init__(self, graph: nx.MultiDiGraph):
         super().__init__(graph)
 
+        self.edges: set[Edge] = set()
+
     @override
     def execute(self):
         for src, dst, key, data in self.graph.edges(data=True, keys=True):
@@ -29,12 +31,17 @@ class SetDistancesCommand(Command):
 
             if coord_src and coord_dst:
                 data["distance"] = geodesic(coord_src, coord_dst).meters
+                self.edges.add((src, dst, key))
                 logger.info(f"\tDistance: {data["distance"]}")
 
     @override
     def undo(self):
         pass
 
+    @override
+    def touched(self) -> tuple[set[Node], set[Edge]]:
+        return set(), set(self.edges)
+
     @override
     def redo(self):
         pass
@@ -46,6 +46,10 @@ class ShowByNameCommand(Command):
         nodes, edges = set(), self.edges
         self._toggle(nodes, edges, "is_highlighted")
 
+    @override
+    def touched(self) -> tuple[set[Node], set[Edge]]:
+        return set(), set(self.edges)
+
     @override
     def redo(self):
         nodes, edges = set(), self.edges
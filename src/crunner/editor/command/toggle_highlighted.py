@@ -36,6 +36,10 @@ class TogglePropertyCommand(Command):
     def undo(self):
         self._toggle(self.nodes, self.edges, self.prop)
 
+    @override
+    def touched(self) -> tuple[set[Node], set[Edge]]:
+        return set(self.nodes), set(self.edges)
+
     @override
     def redo(self):
         self._toggle(self.nodes, self.edges, self.prop)
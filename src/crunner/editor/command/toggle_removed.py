@@ -56,6 +56,10 @@ class ToggleRemovedCommand(Command):
     def undo(self):
         self._toggle(self.nodes, self.edges)
 
+    @override
+    def touched(self) -> tuple[set[Node], set[Edge]]:
+        return set(self.nodes), set(self.edges)
+
     @override
     def redo(self):
         self._toggle(self.nodes, self.edges)
@@ -20,7 +20,7 @@ class ToggleTypeCommand(Command):
         self.toggle_opt = toggle_opt
 
         self.nodes: set[Node] = set()
-        self.nodes: set[Node] = set()
+        self.edges: set[Edge] = set()
 
     def __find_and_toggle(self):
         # Verify whether an edge of of a given type
@@ -62,6 +62,10 @@ class ToggleTypeCommand(Command):
     def undo(self):
         self._toggle(self.nodes, self.edges)
 
+    @override
+    def touched(self) -> tuple[set[Node], set[Edge]]:
+        return set(self.nodes), set(self.edges)
+
     @override
     def redo(self):
         self._toggle(self.nodes, self.edges)
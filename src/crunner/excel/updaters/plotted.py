@@ -1,11 +1,9 @@
 from typing import override
 
-import gpxpy
-
 from crunner.common import PLOTTED_PATH
 from crunner.excel.header import Header
 from crunner.excel.updaters import ExcelUpdater
-from crunner.gpx import find_distance
+from crunner.gpx_index import GpxIndex
 
 
 class PlottedDistanceUpdater(ExcelUpdater):
@@ -17,10 +15,7 @@ class PlottedDistanceUpdater(ExcelUpdater):
 
     @override
     def _find_new_values(self) -> list[float | None]:
-        with open(self.path, "r", encoding="utf-8") as file:
-            gpx = gpxpy.parse(file)
-
-        return [find_distance(gpx, "km")]
+        return [GpxIndex.of(self.path).get(self.path).distance]
 
     @override
     def find_paths(self):
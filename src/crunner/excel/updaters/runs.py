@@ -1,12 +1,10 @@
 import datetime
 from typing import override
 
-import gpxpy
-
 from crunner.common import RUNS_PATH
 from crunner.excel.header import Header
 from crunner.excel.updaters import ExcelUpdater
-from crunner.gpx import find_distance
+from crunner.gpx_index import GpxIndex
 
 
 class RunUpdater(ExcelUpdater):
@@ -18,10 +16,9 @@ class RunUpdater(ExcelUpdater):
     @override
     def _find_new_values(self) -> tuple[float | None, bool, datetime.datetime | None]:
         try:
-            with open(self.path, "r", encoding="utf-8") as file:
-                gpx = gpxpy.parse(file)
+            gpx = GpxIndex.of(self.path).get(self.path)
 
-            distance = find_distance(gpx, "km")
+            distance = gpx.distance
             is_completed = True
             date_completed = gpx.time
             date_completed = (
@@ -2,11 +2,9 @@ import datetime
 import json
 from typing import override
 
-import gpxpy
-
 from crunner.excel.header import Header
 from crunner.excel.updaters import ExcelUpdater
-from crunner.gpx import find_distance
+from crunner.gpx_index import GpxIndex
 from crunner.path import Paths
 from crunner.strides import Activity
 
@@ -36,8 +34,7 @@ class StreetsUpdater(ExcelUpdater):
         try:
             self.__load_activities()
 
-            with open(self.path, "r", encoding="utf-8") as file:
-                gpx = gpxpy.parse(file)
+            gpx = GpxIndex.of(self.path).get(self.path)
 
             date_completed = gpx.time
             date_completed = (
@@ -48,7 +45,7 @@ class StreetsUpdater(ExcelUpdater):
 
             # For multiple activities on the day, just get the completed streets directly
             if len(date_activities) > 1:
-                if distance := find_distance(gpx):
+                if distance := gpx.distance:
                     date_activities.sort(key=lambda a: abs(distance - a.distance))
 
             return [date_activities[0].completed]
@@ -1,5 +1,6 @@
 from math import atan2, degrees
 from pathlib import Path
+from typing import Optional
 
 import folium
 import networkx as nx
@@ -9,7 +10,9 @@ from veelog import setup_logger
 
 from crunner.common import HTML_PATH, MAP_PATH, ROAD_COLOR_MAP
 from crunner.editor.popup.latlng import LatLngPrecisionPopup
+from crunner.geometry import materialize_geometries
 from crunner.graph import *
+from crunner.heatmap import find_graph_heatmap
 from crunner.path import Paths
 from crunner.plotter import Plotter
 
@@ -23,6 +26,12 @@ class Explorer:
 
     def __init__(self):
         self.plotter = Plotter()
+        self.heatmap_layer: Optional[folium.TileLayer] = None
+
+    def load_heatmap(self, graph: nx.MultiDiGraph):
+        # Find the heatmap once, as the roads are explored again after every command
+        heatmap = find_graph_heatmap(graph)
+        self.heatmap_layer = heatmap.create_layer() if heatmap is not None else None
 
     @classmethod
     def explore_places(cls, parent_place: str):
@@ -61,7 +70,11 @@ class Explorer:
         logger.info("Exploring graph...")
 
         # Add a new column to df with the color based on the highway type
-        df_edges = ox.graph_to_gdfs(graph, nodes=False, edges=True)
+        # The geometries of a (shallow) copy are materialised, so those of the graph
+        # stay lazy, while the ones added by commands since the last render are drawn too
+        df_edges = ox.graph_to_gdfs(
+            materialize_geometries(graph.copy()), nodes=False, edges=True
+        )
         if df_edges.crs != "EPSG:4326":
             df_edges = df_edges.to_crs(epsg=4326)
 
@@ -125,6 +138,11 @@ class Explorer:
         popup = LatLngPrecisionPopup()
         popup.add_to(mapp)
 
+        # Add the heatmap of all runs in the area underneath the roads
+        if self.heatmap_layer is not None:
+            self.heatmap_layer.add_to(mapp)
+            folium.LayerControl().add_to(mapp)
+
         # Add bridges to the map
         for (src, dst, _), data in df_edges_bridge.iterrows():
             break
@@ -0,0 +1,218 @@
+import re
+import tempfile
+import xml.etree.ElementTree as XMLTree
+from array import array
+from pathlib import Path
+from typing import Iterable
+from xml.sax.saxutils import quoteattr
+
+import networkx as nx
+import osmnx as ox
+
+try:
+    import osmium
+except ImportError:
+    osmium = None
+
+# Same filter as OSMnx uses for network_type="bike"
+BIKE_FILTER = (
+    '["highway"]["area"!~"yes"]["access"!~"private"]'
+    '["highway"!~"abandoned|bus_guideway|construction|corridor|elevator|'
+    "escalator|footway|motor|no|planned|platform|proposed|raceway|razed|"
+    'rest_area|services|steps"]'
+    '["bicycle"!~"no"]["service"!~"private"]'
+)
+
+FILTER_REGEX = re.compile(r'\["([^"]+)"(?:(!?[=~])"([^"]*)")?\]')
+
+# Suffixes of OSM extracts, longest first
+EXTRACT_SUFFIXES = (".osm.pbf", ".pbf", ".osm")
+
+OsmFilter = list[tuple[str, str | None, str | re.Pattern | None]]
+Tags = dict[str, str]
+
+
+def parse_filter(way_filter: str) -> OsmFilter:
+    """
+    Parse an Overpass way filter (e.g. '["highway"]["area"!~"yes"]') into its conditions
+    :param way_filter: Filter as given to Overpass/OSMnx
+    :return: Key, operator and value for every condition
+    """
+    conditions = []
+
+    for key, op, value in FILTER_REGEX.findall(way_filter):
+        op = op or None
+        if op in ("~", "!~"):
+            value = re.compile(value)
+
+        conditions.append((key, op, value if op else None))
+
+    return conditions
+
+
+def matches_filter(tags: Tags, conditions: OsmFilter) -> bool:
+    for key, op, value in conditions:
+        tag = tags.get(key)
+
+        match op:
+            case None:
+                matches = tag is not None
+            case "=":
+                matches = tag == value
+            case "!=":
+                matches = tag != value
+            case "~":
+                matches = tag is not None and value.search(tag) is not None
+            case "!~":
+                matches = tag is None or value.search(tag) is None
+
+        if not matches:
+            return False
+
+    return True
+
+
+def is_pbf(path: Path) -> bool:
+    return path.suffix == ".pbf"
+
+
+def strip_extract_suffix(name: str) -> str:
+    # PBF extracts are usually named <name>.osm.pbf, of which the full suffix is stripped
+    for suffix in EXTRACT_SUFFIXES:
+        if name.endswith(suffix):
+            return name.removesuffix(suffix)
+
+    return name
+
+
+def iter_xml(path: Path, tag: str) -> Iterable[XMLTree.Element]:
+    context = XMLTree.iterparse(path, events=("start", "end"))
+    _, root = next(context)
+
+    # Only keep a single element in memory at a time
+    for event, elem in context:
+        if event != "end":
+            continue
+
+        if elem.tag == tag:
+            yield elem
+
+        if elem.tag in ("node", "way", "relation"):
+            root.clear()
+
+
+def iter_ways(path: Path) -> Iterable[tuple[int, Tags, list[int]]]:
+    if is_pbf(path):
+        for way in osmium.FileProcessor(str(path), osmium.osm.WAY):
+            tags = {tag.k: tag.v for tag in way.tags}
+            yield way.id, tags, [node.ref for node in way.nodes]
+
+        return
+
+    for elem in iter_xml(path, "way"):
+        tags = {tag.get("k"): tag.get("v") for tag in elem.iter("tag")}
+        refs = [int(nd.get("ref")) for nd in elem.iter("nd")]
+        yield int(elem.get("id")), tags, refs
+
+
+def iter_nodes(path: Path) -> Iterable[tuple[int, float, float, Tags]]:
+    if is_pbf(path):
+        for node in osmium.FileProcessor(str(path), osmium.osm.NODE):
+            if not node.location.valid():
+                continue
+
+            tags = {tag.k: tag.v for tag in node.tags}
+            yield node.id, node.location.lat, node.location.lon, tags
+
+        return
+
+    for elem in iter_xml(path, "node"):
+        tags = {tag.get("k"): tag.get("v") for tag in elem.iter("tag")}
+        yield int(elem.get("id")), float(elem.get("lat")), float(elem.get("lon")), tags
+
+
+def write_tags(file, tags: Tags):
+    for key, value in tags.items():
+        file.write(f"    <tag k={quoteattr(key)} v={quoteattr(value)}/>\n")
+
+
+def filter_extract(path: Path, out_path: Path, way_filters: list[str]) -> int:
+    """
+    Stream an OSM extract and write the ways that pass any of the filters (with their nodes)
+    The extract is read twice, such that only the kept ways are ever held in memory
+    :param path: Path of the .osm or .osm.pbf extract
+    :param out_path: Path of the filtered .osm file
+    :param way_filters: Overpass filters of which a way should match at least one
+    :return: Number of ways that were kept
+    """
+    conditions = [parse_filter(way_filter) for way_filter in way_filters]
+
+    # Find the ways to keep and the nodes they consist of
+    ways: list[tuple[int, Tags, array]] = []
+    node_ids: set[int] = set()
+
+    for way_id, tags, refs in iter_ways(path):
+        if not any(matches_filter(tags, condition) for condition in conditions):
+            continue
+
+        ways.append((way_id, tags, array("q", refs)))
+        node_ids.update(refs)
+
+    print(f"Found {len(ways)} ways with {len(node_ids)} nodes in {path.name}")
+
+    with open(out_path, "w", encoding="utf-8") as file:
+        file.write("<?xml version='1.0' encoding='UTF-8'?>\n")
+        file.write('<osm version="0.6" generator="crunner">\n')
+
+        # Write the nodes of the kept ways
+        found_ids: set[int] = set()
+        for node_id, lat, lng, tags in iter_nodes(path):
+            if node_id not in node_ids:
+                continue
+
+            found_ids.add(node_id)
+            file.write(f'  <node id="{node_id}" lat="{lat}" lon="{lng}">\n')
+            write_tags(file, tags)
+            file.write("  </node>\n")
+
+        # Write the ways, leaving out nodes that fall outside of the extract
+        n_ways = 0
+        for way_id, tags, refs in ways:
+            refs = [ref for ref in refs if ref in found_ids]
+            if len(refs) < 2:
+                continue
+
+            n_ways += 1
+            file.write(f'  <way id="{way_id}">\n')
+            file.writelines(f'    <nd ref="{ref}"/>\n' for ref in refs)
+            write_tags(file, tags)
+            file.write("  </way>\n")
+
+        file.write("</osm>\n")
+
+    return n_ways
+
+
+def graph_from_extract(
+    path: Path,
+    way_filters: list[str] = [BIKE_FILTER],
+    simplify: bool = True,
+    retain_all: bool = False,
+) -> nx.MultiDiGraph:
+    """
+    Create a graph from a local OSM extract (.osm or .osm.pbf) instead of querying Overpass
+    Ways are filtered while streaming the extract, after which OSMnx builds the graph
+    :param path: Path of the extract
+    :param way_filters: Overpass filters of which a way should match at least one
+    :return: Graph of all ways in the extract that pass the filters
+    """
+    if is_pbf(path) and osmium is None:
+        raise ImportError(f"Reading {path.name} requires osmium (pip install osmium)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        filtered_path = Path(directory) / f"{strip_extract_suffix(path.name)}.osm"
+        filter_extract(path, filtered_path, way_filters)
+
+        return ox.graph_from_xml(
+            filtered_path, simplify=simplify, retain_all=retain_all
+        )
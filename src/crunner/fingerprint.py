@@ -0,0 +1,152 @@
+import hashlib
+from typing import Hashable
+
+import networkx as nx
+from attrs import Factory, define
+
+from crunner.geometry import encode_coords, to_coords
+from crunner.graph import Edge, Node
+
+# Flags that are set by hand and therefore part of the content of an element
+FLAGS = ("is_removed", "is_highlighted", "self_created")
+
+# Hashes are combined by summing them, such that the order of elements does not matter
+HASH_MOD = 2**64
+
+
+def hash_bytes(*parts: bytes) -> int:
+    digest = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        digest.update(part)
+        digest.update(b"\x00")
+
+    return int.from_bytes(digest.digest(), "little")
+
+
+def flag_bytes(data: dict) -> bytes:
+    return bytes(bool(data.get(flag, False)) for flag in FLAGS)
+
+
+def hash_node(data: dict) -> int:
+    """
+    Hash the content of a node: its coordinates (to micro-degrees) and flags
+    """
+    coords = encode_coords([data.get("x", 0.0), data.get("y", 0.0)])
+    return hash_bytes(coords.tobytes(), flag_bytes(data))
+
+
+def hash_edge(data: dict) -> int:
+    """
+    Hash the content of an edge: its geometry (to micro-degrees) and flags
+    """
+    coords = to_coords(data.get("geometry"))
+    geometry = encode_coords(coords).tobytes() if coords is not None else b""
+
+    return hash_bytes(geometry, flag_bytes(data))
+
+
+def hash_nodes(graph: nx.MultiDiGraph) -> dict[Node, int]:
+    return {node: hash_node(data) for node, data in graph.nodes(data=True)}
+
+
+def hash_edges(graph: nx.MultiDiGraph) -> dict[Edge, int]:
+    return {
+        (src, dst, key): hash_edge(data)
+        for src, dst, key, data in graph.edges(keys=True, data=True)
+    }
+
+
+def combine_hashes(hashes: dict[Hashable, int]) -> int:
+    # Include the id of an element, such that swapping the content of elements is noticed
+    return (
+        sum(
+            hash_bytes(repr(elem).encode(), value.to_bytes(8, "little"))
+            for elem, value in hashes.items()
+        )
+        % HASH_MOD
+    )
+
+
+def fingerprint_graph(graph: nx.MultiDiGraph) -> str:
+    """
+    Find a stable content hash of a graph, which is equal for graphs with the same content
+    regardless of the order of their nodes/edges or the format they were loaded from
+    :param graph: Graph to fingerprint
+    :return: Hash as a hexadecimal string
+    """
+    node_hash = combine_hashes(hash_nodes(graph))
+    edge_hash = combine_hashes(hash_edges(graph))
+
+    return f"{node_hash:016x}{edge_hash:016x}"
+
+
+@define
+class GraphDiff:
+    """
+    Differences between two versions of a graph
+    """
+
+    added_nodes: set[Node] = Factory(set)
+    removed_nodes: set[Node] = Factory(set)
+    changed_nodes: set[Node] = Factory(set)
+    added_edges: set[Edge] = Factory(set)
+    removed_edges: set[Edge] = Factory(set)
+    changed_edges: set[Edge] = Factory(set)
+
+    def __bool__(self) -> bool:
+        return any(
+            (
+                self.added_nodes,
+                self.removed_nodes,
+                self.changed_nodes,
+                self.added_edges,
+                self.removed_edges,
+                self.changed_edges,
+            )
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"Nodes: +{len(self.added_nodes)} -{len(self.removed_nodes)} "
+            f"~{len(self.changed_nodes)}, "
+            f"edges: +{len(self.added_edges)} -{len(self.removed_edges)} "
+            f"~{len(self.changed_edges)}"
+        )
+
+
+def diff_hashes(
+    old: dict[Hashable, int], new: dict[Hashable, int]
+) -> tuple[set, set, set]:
+    """
+    Compare the element hashes of two graph versions
+    :return: Added, removed and changed elements
+    """
+    added = new.keys() - old.keys()
+    removed = old.keys() - new.keys()
+    changed = {elem for elem in old.keys() & new.keys() if old[elem] != new[elem]}
+
+    return set(added), set(removed), changed
+
+
+def diff_graphs(old: nx.MultiDiGraph, new: nx.MultiDiGraph) -> GraphDiff:
+    """
+    Find the nodes and edges that were added, removed or changed between two graph versions
+    :param old: Previous version of the graph
+    :param new: Current version of the graph
+    :return: Differences between the versions
+    """
+    added_nodes, removed_nodes, changed_nodes = diff_hashes(
+        hash_nodes(old), hash_nodes(new)
+    )
+    added_edges, removed_edges, changed_edges = diff_hashes(
+        hash_edges(old), hash_edges(new)
+    )
+
+    return GraphDiff(
+        added_nodes,
+        removed_nodes,
+        changed_nodes,
+        added_edges,
+        removed_edges,
+        changed_edges,
+    )
@@ -6,20 +6,33 @@ from crunner.editor.command.find_circuit import FindCircuitCommand
 from crunner.handler import Handler
 from crunner.util import find_path_name
 
-handler = Handler()
-editor = Editor()
 
-for path in (GRAPH_PATH / "Rotterdam").rglob("*.graphml"):
+def is_plotted(path: Path) -> bool:
     name = find_path_name(path).with_suffix(".gpx")
     print(name)
 
     if (PLOTTED_PATH / name).exists() or (OFFSET_PATH / name).exists():
         print(f"Already plotted circuit for {path.stem}")
-        continue
+        return True
 
-    graph = handler.load_from_file(path)
-    if not graph or not path:
-        continue
+    return False
 
-    print(f"Finding circuit for {path.stem}")
-    editor.do(FindCircuitCommand(graph, name, True))
+
+def main():
+    editor = Editor()
+
+    for path, graph in Handler.load_region(
+        GRAPH_PATH / "Rotterdam", include=lambda path: not is_plotted(path)
+    ):
+        if not graph or not path:
+            continue
+
+        name = find_path_name(path).with_suffix(".gpx")
+
+        print(f"Finding circuit for {path.stem}")
+        editor.do(FindCircuitCommand(graph, name, True))
+
+
+# Guard the script, as the processes that load the graphs import it as well
+if __name__ == "__main__":
+    main()
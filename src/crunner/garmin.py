@@ -15,6 +15,7 @@ import requests
 from garminconnect import Garmin, GarminConnectAuthenticationError
 from garth.exc import GarthHTTPError
 
+from crunner.archive import RunArchive, points_from_gpx
 from crunner.common import AREA_IDS, RUNS_PATH
 from crunner.gpx import add_total_distance, strip_gpx
 
@@ -125,6 +126,8 @@ or press Q to quit
     if api is None:
         return
 
+    archive = RunArchive()
+
     for id in ids:
         area = AREA_IDS[id]
         prefix = f"{id} - "
@@ -138,6 +141,8 @@ or press Q to quit
         activities = api.get_activities_by_date(
             startdate.isoformat(), today.isoformat(), "running"
         )
+        runs = []
+
         for activity in activities:
             # Only consider activities with the correct prefix
             name: str = activity["activityName"]
@@ -163,6 +168,9 @@ or press Q to quit
             )
 
             gpx = gpxpy.parse(gpx_bytes.decode("utf-8"))
+
+            # Archive all points before their timestamps are stripped
+            runs.append(points_from_gpx(name, gpx))
             gpx = strip_gpx(gpx)
             add_total_distance(gpx, "km")
 
@@ -170,6 +178,11 @@ or press Q to quit
             with open(dir / f"{name}.gpx", "w") as file:
                 file.write(gpx.to_xml())
 
+        # Keep the archive in sync with the downloaded runs (and any added by hand)
+        if runs:
+            archive.append(area, runs)
+        archive.sync(area)
+
 
 def main():
     download_activities()
@@ -0,0 +1,200 @@
+import numpy as np
+
+from crunner.graph import Coord
+
+# Mean earth radius, equal to the one geopy uses for great circle distances
+EARTH_RADIUS_M = 6371009.0
+
+# Maximum length of a miter join relative to the offset distance
+MITER_LIMIT = 4.0
+
+
+def find_origin(lat: np.ndarray, lng: np.ndarray) -> Coord:
+    return float(np.mean(lat)), float(np.mean(lng))
+
+
+def project(
+    lat: np.ndarray, lng: np.ndarray, origin: Coord | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Project lat/lng coordinates onto a local plane in meters (equirectangular)
+    This is accurate to well within a meter for areas the size of a city
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+
+    lat0, lng0 = origin if origin is not None else find_origin(lat, lng)
+    scale = np.radians(EARTH_RADIUS_M)
+
+    x = (lng - lng0) * scale * np.cos(np.radians(lat0))
+    y = (lat - lat0) * scale
+
+    return x, y
+
+
+def unproject(
+    x: np.ndarray, y: np.ndarray, origin: Coord
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Inverse of project, from local meters back to lat/lng coordinates
+    """
+    lat0, lng0 = origin
+    scale = np.radians(EARTH_RADIUS_M)
+
+    lat = np.asarray(y, dtype=np.float64) / scale + lat0
+    lng = np.asarray(x, dtype=np.float64) / (scale * np.cos(np.radians(lat0))) + lng0
+
+    return lat, lng
+
+
+def offset_track(
+    lat: np.ndarray, lng: np.ndarray, distance: float, miter_limit: float = MITER_LIMIT
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Offset a track sideways, where every vertex moves along the bisector of its segments
+    (miter join) such that both segments end up at the same distance from the original
+    :param lat: Latitudes of the track
+    :param lng: Longitudes of the track
+    :param distance: Offset in meters, to the left of the direction of travel if positive
+    :param miter_limit: Maximum offset of a vertex, relative to the distance, which
+    prevents spikes at (almost) U-turns
+    :return: Latitudes and longitudes of the offset track
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    if len(lat) < 2 or distance == 0:
+        return lat.copy(), lng.copy()
+
+    origin = find_origin(lat, lng)
+    x, y = project(lat, lng, origin)
+
+    # Normals (to the left) of all segments, where repeated points reuse the previous one
+    dx, dy = np.diff(x), np.diff(y)
+    lengths = np.hypot(dx, dy)
+    is_valid = lengths > 0
+    if not is_valid.any():
+        return lat.copy(), lng.copy()
+
+    idxs = np.maximum.accumulate(np.where(is_valid, np.arange(len(dx)), -1))
+    idxs = np.where(idxs < 0, np.argmax(is_valid), idxs)
+    normals = np.column_stack((-dy, dx))[idxs] / lengths[idxs, None]
+
+    # Vertices take the normal of the segment before and after them
+    before = np.vstack((normals[:1], normals))
+    after = np.vstack((normals, normals[-1:]))
+
+    # Closed tracks join their last segment with their first one
+    if x[0] == x[-1] and y[0] == y[-1]:
+        before[0], after[-1] = normals[-1], normals[0]
+
+    bisectors = before + after
+    norms = np.linalg.norm(bisectors, axis=1)
+
+    # Reversals have no bisector, so the normal of the next segment is used instead
+    is_reversal = norms < 1e-9
+    bisectors[is_reversal] = after[is_reversal]
+    norms[is_reversal] = 1.0
+    bisectors /= norms[:, None]
+
+    cos_half = np.abs(np.einsum("ij,ij->i", bisectors, after))
+    scale = np.minimum(1 / np.maximum(cos_half, 1e-9), miter_limit)
+    offsets = bisectors * (distance * scale)[:, None]
+
+    return unproject(x + offsets[:, 0], y + offsets[:, 1], origin)
+
+
+def haversine(
+    lat1: np.ndarray, lng1: np.ndarray, lat2: np.ndarray, lng2: np.ndarray
+) -> np.ndarray:
+    """
+    Find the great circle distances (in meters) between pairs of coordinates at once
+    """
+    lat1, lng1, lat2, lng2 = (
+        np.radians(np.asarray(coord, dtype=np.float64))
+        for coord in (lat1, lng1, lat2, lng2)
+    )
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def path_length(
+    lat: np.ndarray, lng: np.ndarray, starts: np.ndarray | None = None
+) -> float:
+    """
+    Find the length (in meters) of a path of coordinates
+    :param lat: Latitudes of the points
+    :param lng: Longitudes of the points
+    :param starts: Indices where new segments start, which are not connected to the
+    previous point (e.g. pauses in a GPX track)
+    :return: Total length of the path
+    """
+    if len(lat) < 2:
+        return 0.0
+
+    dists = haversine(lat[:-1], lng[:-1], lat[1:], lng[1:])
+
+    if starts is not None:
+        starts = np.asarray(starts, dtype=np.int64)
+        starts = starts[(starts > 0) & (starts < len(lat))]
+        dists[starts - 1] = 0.0
+
+    return float(dists.sum())
+
+
+def simplify_track(
+    lat: np.ndarray,
+    lng: np.ndarray,
+    tolerance: float,
+    fixed: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Simplify a track with Douglas-Peucker, such that no removed point lies further than
+    the tolerance from the simplified track
+    :param lat: Latitudes of the track
+    :param lng: Longitudes of the track
+    :param tolerance: Maximum deviation in meters
+    :param fixed: Indices of points that should always be kept (e.g. turns)
+    :return: Mask of the points to keep
+    """
+    n_points = len(lat)
+    keep = np.zeros(n_points, dtype=bool)
+    if n_points < 3:
+        keep[:] = True
+        return keep
+
+    x, y = project(lat, lng)
+
+    # Every range between fixed points is simplified on its own
+    bounds = np.union1d([0, n_points - 1], fixed if fixed is not None else [])
+    bounds = bounds.astype(np.int64)
+    keep[bounds] = True
+    ranges = list(zip(bounds[:-1], bounds[1:]))
+
+    while ranges:
+        start, end = ranges.pop()
+        if end - start < 2:
+            continue
+
+        # Distance of the points in between to the line segment from start to end
+        px, py = x[start + 1 : end] - x[start], y[start + 1 : end] - y[start]
+        dx, dy = x[end] - x[start], y[end] - y[start]
+        length_sq = dx * dx + dy * dy
+
+        t = np.zeros_like(px)
+        if length_sq > 0:
+            t = np.clip((px * dx + py * dy) / length_sq, 0.0, 1.0)
+
+        dists = np.hypot(px - t * dx, py - t * dy)
+        idx = int(np.argmax(dists))
+        if dists[idx] <= tolerance:
+            continue
+
+        mid = start + 1 + idx
+        keep[mid] = True
+        ranges += [(start, mid), (mid, end)]
+
+    return keep
@@ -0,0 +1,189 @@
+from typing import Any, Optional
+
+import networkx as nx
+import numpy as np
+import shapely
+from shapely import LineString
+
+# Coordinates are stored as integer micro-degrees, which is accurate to about 5 cm
+MICRO_DEGREES = 1_000_000
+
+COORD_CHARS = str.maketrans("()[],", "     ")
+
+
+def encode_coords(coords: np.ndarray) -> np.ndarray:
+    return np.rint(np.asarray(coords, dtype=np.float64) * MICRO_DEGREES).astype(
+        np.int32
+    )
+
+
+def decode_coords(coords: np.ndarray) -> np.ndarray:
+    return coords.astype(np.float64) / MICRO_DEGREES
+
+
+class PackedCoords:
+    """
+    Coordinates of an edge as int32 micro-degrees, stored in a buffer shared by all edges
+    """
+
+    __slots__ = ("buffer", "start", "end")
+
+    def __init__(self, buffer: np.ndarray, start: int, end: int):
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def to_coords(self) -> np.ndarray:
+        return decode_coords(self.buffer[self.start : self.end])
+
+
+# Edge geometries are kept in the form they were loaded in until they are needed:
+# - str: WKT or a stringified coordinate list (GraphML)
+# - bytes: WKB (columnar)
+# - np.ndarray: (n, 2) array of x/y coordinates
+# - PackedCoords: (n, 2) micro-degree coordinates (compact columnar)
+RawGeometry = str | bytes | np.ndarray | PackedCoords
+
+
+def is_raw(geometry: Any) -> bool:
+    # Strings are excluded, as they are written the same way in raw form
+    return isinstance(geometry, (bytes, np.ndarray, PackedCoords))
+
+
+def parse_coords(text: str) -> Optional[np.ndarray]:
+    # Strip the geometry type of WKT, e.g. LINESTRING (4.4 51.9, 4.5 51.9)
+    if not text.lstrip().startswith("["):
+        start, end = text.find("("), text.rfind(")")
+        if start < 0 or end < start:
+            return None
+
+        text = text[start + 1 : end]
+
+    try:
+        values = np.array(text.translate(COORD_CHARS).split(), dtype=np.float64)
+    except ValueError:
+        return None
+
+    if len(values) < 4 or len(values) % 2:
+        return None
+
+    return values.reshape(-1, 2)
+
+
+def to_coords(geometry: RawGeometry | LineString | None) -> Optional[np.ndarray]:
+    """
+    Find the x/y coordinates of a geometry without creating a shapely object for it
+    :param geometry: Raw or materialised geometry
+    :return: (n, 2) array of coordinates, or None if the geometry could not be read
+    """
+    if geometry is None:
+        return None
+    if isinstance(geometry, np.ndarray):
+        return geometry
+    if isinstance(geometry, PackedCoords):
+        return geometry.to_coords()
+    if isinstance(geometry, str):
+        return parse_coords(geometry)
+    if isinstance(geometry, bytes):
+        geometry = shapely.from_wkb(geometry)
+    if isinstance(geometry, LineString):
+        return shapely.get_coordinates(geometry)
+
+    return None
+
+
+def to_linestring(geometry: RawGeometry | LineString | None) -> Optional[LineString]:
+    if geometry is None or isinstance(geometry, LineString):
+        return geometry
+    if isinstance(geometry, bytes):
+        return shapely.from_wkb(geometry)
+
+    coords = to_coords(geometry)
+    return LineString(coords) if coords is not None else None
+
+
+def find_geometry(data: dict) -> Optional[LineString]:
+    """
+    Find the geometry of an edge, which is materialised on first access
+    :param data: Data of the edge
+    :return: Line string of the edge, or None if it has no (valid) geometry
+    """
+    if "geometry" not in data:
+        return None
+
+    geometry = data["geometry"]
+    if isinstance(geometry, LineString):
+        return geometry
+
+    if (line := to_linestring(geometry)) is None:
+        print(f"Non-parsable coordinates found: {geometry}")
+        del data["geometry"]
+        return None
+
+    data["geometry"] = line
+    return line
+
+
+def materialize_geometries(graph: nx.MultiDiGraph) -> nx.MultiDiGraph:
+    """
+    Materialise all raw edge geometries of a graph at once, e.g. before handing it to OSMnx
+    """
+    wkbs: list[tuple[dict, bytes]] = []
+    packed: list[tuple[dict, PackedCoords]] = []
+
+    for *_, data in graph.edges(data=True):
+        geometry = data.get("geometry")
+
+        if geometry is None or isinstance(geometry, LineString):
+            continue
+        if isinstance(geometry, bytes):
+            wkbs.append((data, geometry))
+        elif isinstance(geometry, PackedCoords):
+            packed.append((data, geometry))
+        else:
+            find_geometry(data)
+
+    # Parse binary geometries in bulk
+    if wkbs:
+        datas, values = zip(*wkbs)
+        lines = shapely.from_wkb(np.array(values, dtype=object))
+
+        for data, line in zip(datas, lines):
+            data["geometry"] = line
+
+    # Create the lines of packed coordinates in bulk
+    if packed:
+        datas, values = zip(*packed)
+        coords = np.concatenate([value.to_coords() for value in values])
+        indices = np.repeat(np.arange(len(values)), [len(value) for value in values])
+
+        for data, line in zip(datas, shapely.linestrings(coords, indices=indices)):
+            data["geometry"] = line
+
+    return graph
+
+
+def pack_geometries(graph: nx.MultiDiGraph) -> nx.MultiDiGraph:
+    """
+    Store all edge geometries of a graph as micro-degrees in a single int32 buffer
+    """
+    datas, coords = [], []
+
+    for *_, data in graph.edges(data=True):
+        if (edge_coords := to_coords(data.get("geometry"))) is not None:
+            datas.append(data)
+            coords.append(edge_coords)
+
+    if not coords:
+        return graph
+
+    buffer = encode_coords(np.concatenate(coords))
+    ends = np.cumsum([len(edge_coords) for edge_coords in coords]).tolist()
+
+    for data, start, end in zip(datas, [0] + ends[:-1], ends):
+        data["geometry"] = PackedCoords(buffer, start, end)
+
+    return graph
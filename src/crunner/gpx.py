@@ -1,18 +1,130 @@
+import datetime
 import math
 import xml.etree.ElementTree as XMLTree
+from array import array
 from collections import defaultdict
 from itertools import chain, pairwise
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterable, Optional, TextIO
+from xml.sax.saxutils import escape
 
 import gpxpy.gpx
 import networkx as nx
-import send2trash
-from geopy.distance import geodesic, great_circle
+import numpy as np
+from attrs import define
+from geopy.distance import geodesic
 
-from crunner.common import GPX_PATH, OFFSET_PATH, PLOTTED_PATH, Circuit
+from crunner.common import OFFSET_PATH, PLOTTED_PATH, Circuit
+from crunner.geo import offset_track, path_length, simplify_track
 from crunner.graph import Coord, Edge, find_edge_coords
 from crunner.path import Paths
+from crunner.util import atomic_write, find_path_name
+
+GPX_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<gpx xmlns="http://www.topografix.com/GPX/1/1" version="1.1" creator="crunner">\n'
+)
+
+
+@define
+class GpxData:
+    """
+    Summary of a GPX file that is read without building gpxpy objects
+    """
+
+    name: Optional[str]
+    time: Optional[datetime.datetime]
+    distance: Optional[float]  # From the distance extension (in km)
+    lat: np.ndarray
+    lng: np.ndarray
+    starts: np.ndarray  # Index of the first point of every segment
+    times: Optional[list[Optional[datetime.datetime]]] = None  # Time of every point
+
+    def find_distance(self, typ: str = "km", ndecimals: int = 3) -> float | None:
+        dist = self.distance
+        if dist is None:
+            dist = path_length(self.lat, self.lng, self.starts) / 1000
+
+        if typ == "m":
+            dist *= 1000
+
+        return round(dist, ndecimals) if dist > 0 else None
+
+
+def local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_distance(tag: str, text: str) -> float:
+    # Distances without a unit are given in km
+    dist = float(text)
+    return dist / 1000 if tag.endswith("_m") else dist
+
+
+def parse_time(text: str) -> Optional[datetime.datetime]:
+    try:
+        return datetime.datetime.fromisoformat(text.strip())
+    except ValueError:
+        return None
+
+
+def read_gpx(path: Path, with_times: bool = False) -> GpxData:
+    """
+    Stream a GPX file for its name, first timestamp, distance extension and track points
+    :param path: Path of the GPX file
+    :param with_times: Whether to read the time of every point as well
+    :return: Summary of the file, with the points as arrays
+    """
+    name, time, distance = None, None, None
+    lats, lngs, starts = array("d"), array("d"), array("q")
+    times: list[Optional[datetime.datetime]] = []
+    parents: list[str] = []
+
+    for event, elem in XMLTree.iterparse(path, events=("start", "end")):
+        tag = local_name(elem.tag)
+
+        if event == "start":
+            if tag == "trkseg":
+                starts.append(len(lats))
+            elif tag == "trkpt":
+                lats.append(float(elem.get("lat")))
+                lngs.append(float(elem.get("lon")))
+                if with_times:
+                    times.append(None)
+
+            parents.append(tag)
+            continue
+
+        parents.pop()
+        parent = parents[-1] if parents else None
+
+        if tag == "time" and with_times and parent == "trkpt":
+            times[-1] = parse_time(elem.text or "")
+
+        if tag == "time" and time is None and parent in ("gpx", "metadata", "trkpt"):
+            time = parse_time(elem.text or "")
+        elif tag == "name" and name is None and parent in ("gpx", "metadata"):
+            name = elem.text
+        elif (
+            tag.startswith("distance")
+            and elem.text
+            and parents[-2:] == ["gpx", "extensions"]
+        ):
+            distance = parse_distance(tag, elem.text)
+
+        # Points are not needed anymore once their coordinates are read
+        if tag == "trkpt":
+            elem.clear()
+
+    return GpxData(
+        name,
+        time,
+        distance,
+        np.frombuffer(lats, dtype=np.float64),
+        np.frombuffer(lngs, dtype=np.float64),
+        np.frombuffer(starts, dtype=np.int64),
+        times if with_times else None,
+    )
 
 
 def strip_gpx(gpx: gpxpy.gpx.GPX) -> gpxpy.gpx.GPX:
@@ -103,34 +215,111 @@ def to_gpx(
     path: Path,
     stats: Optional[dict[str, Any]] = None,
     edges: list = [],
+    tolerance: Optional[float] = None,
 ):
-    # Set up track
+    """
+    Write a circuit as GPX track, streaming the points of every edge straight to the file
+    :param circuit: Edges of the circuit in order
+    :param graph: Graph the circuit runs over
+    :param path: Path of the circuit, of which the GPX path is derived
+    :param stats: Statistics of the circuit, of which the total distance is used
+    :param tolerance: Maximum deviation (in meters) to simplify the edges with, if any
+    """
     stats = stats if stats else {}
-    gpx = gpxpy.gpx.GPX()
-    track = gpxpy.gpx.GPXTrack(name=path.stem)
-    gpx.tracks.append(track)
+    dist = stats.get("total_distance_m")
+    measured = 0.0
+    n_points, n_kept = 0, 0
 
-    segment = gpxpy.gpx.GPXTrackSegment()
-    track.segments.append(segment)
+    with atomic_write(Paths.gpx(path)) as file:
+        write_track_start(file, path.stem)
 
-    for idx, (src, dst, *_) in enumerate(circuit):
-        coords = find_edge_coords(graph, src, dst)
-        coords = coords if idx == 0 else coords[1:]
+        for idx, (src, dst, *_) in enumerate(circuit):
+            coords = find_edge_coords(graph, src, dst)
+            if not coords:
+                continue
 
-        for coord in coords:
-            lat, lng = coord
+            # Only measure the circuit when its distance is unknown
+            lats, lngs = np.array(coords).T
+            if dist is None:
+                measured += path_length(lats, lngs)
 
-            point = gpxpy.gpx.GPXTrackPoint(lat, lng)
-            segment.points.append(point)
+            # Simplify every edge on its own, such that all nodes (and turns) are kept
+            n_points += len(coords)
+            if tolerance is not None:
+                coords = [
+                    coords[i]
+                    for i in np.flatnonzero(simplify_track(lats, lngs, tolerance))
+                ]
+            n_kept += len(coords)
 
-    # Add total distance information
-    add_total_distance(gpx, "km")
+            coords = coords if idx == 0 else coords[1:]
+            write_points(file, coords)
 
-    xml = gpx.to_xml()
-    gpx_path = Paths.gpx(path)
+        # Add total distance information
+        write_track_end(file, dist if dist is not None else measured)
 
-    with open(gpx_path, "w") as file:
-        file.write(xml)
+    if tolerance is not None:
+        print(f"Simplified {path.stem} from {n_points} to {n_kept} points")
+
+
+def write_track_start(file: TextIO, name: str):
+    file.write(GPX_HEADER)
+    file.write(f"  <trk>\n    <name>{escape(name)}</name>\n    <trkseg>\n")
+
+
+def write_points(file: TextIO, coords: Iterable[Coord]):
+    file.writelines(
+        f'      <trkpt lat="{lat}" lon="{lng}"></trkpt>\n' for lat, lng in coords
+    )
+
+
+def write_track_end(file: TextIO, dist: float):
+    file.write("    </trkseg>\n  </trk>\n")
+
+    if dist > 0:
+        file.write(
+            f"  <extensions>\n    <distance>{round(dist / 1000, 3)}</distance>\n"
+            "  </extensions>\n"
+        )
+
+    file.write("</gpx>\n")
+
+
+def offset_gpx(path: Path, distance: float, out_path: Optional[Path] = None) -> Path:
+    """
+    Offset the track of a GPX file sideways, e.g. to tell apart the circuits of an area
+    :param path: Path of the GPX file
+    :param distance: Offset in meters, to the left of the direction of travel if positive
+    :param out_path: Path to write the offset track to, mirrored in OFFSET_PATH by default
+    :return: Path of the offset GPX file
+    """
+    if out_path is None:
+        path = path.resolve()
+        name = (
+            Path(*find_path_name(path).parts[1:]) if "data" in path.parts else path.name
+        )
+
+        out_path = OFFSET_PATH / name
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    data = read_gpx(path)
+    ends = [*data.starts[1:], len(data.lat)]
+    dist = 0.0
+
+    with atomic_write(out_path) as file:
+        write_track_start(file, data.name or path.stem)
+
+        for idx, (start, end) in enumerate(zip(data.starts, ends)):
+            lat, lng = offset_track(data.lat[start:end], data.lng[start:end], distance)
+            dist += path_length(lat, lng)
+
+            if idx > 0:
+                file.write("    </trkseg>\n    <trkseg>\n")
+            write_points(file, zip(lat.tolist(), lng.tolist()))
+
+        write_track_end(file, dist)
+
+    return out_path
 
 
 def find_distance(
@@ -147,47 +336,37 @@ def find_distance(
                 elif dist_elem.tag.endswith("_km") and typ == "m":
                     dist *= 1000
     else:
-        for track in gpx.tracks:
-            for segment in track.segments:
-                for curr, next in pairwise(segment.points):
-                    coord1: Coord = curr.latitude, curr.longitude
-                    coord2: Coord = next.latitude, next.longitude
+        # Measure all segments at once, without connecting them to each other
+        points = [segment.points for track in gpx.tracks for segment in track.segments]
+        starts = np.cumsum([0] + [len(segment) for segment in points[:-1]])
+        coords = np.array(
+            [(point.latitude, point.longitude) for point in chain(*points)]
+        ).reshape(-1, 2)
 
-                    dist += great_circle(coord1, coord2).kilometers
+        dist = path_length(coords[:, 0], coords[:, 1], starts) / 1000
+        if typ == "m":
+            dist *= 1000
 
     return round(dist, ndecimals) if dist > 0 else None
 
 
-def update_gpx():
-    # Search through all plotted GPX files
-    for dir in [Paths.gpx(), Paths.plotted(), Paths.runs()]:
-        for path in dir.rglob("**/*.gpx"):
-            with open(path, "r") as file:
-                gpx = gpxpy.parse(file)
-
-            add_total_distance(gpx, "km")
+def rename_gpx(path: Path) -> Optional[str]:
+    with open(path, "r") as file:
+        gpx = gpxpy.parse(file)
 
-            # Verify that the name has not been set based on the file name
-            if not gpx.name or gpx.name.lower().startswith("new"):
-                # If so, set the name and write the GPX file
-                print(f"{gpx.name} -> {path.stem}")
-                gpx.name = path.stem
+    add_total_distance(gpx, "km")
 
-                xml = gpx.to_xml()
-                with open(path, "w") as file:
-                    file.write(xml)
+    # Set the name and write the GPX file, without leaving it half written on failure
+    name = gpx.name
+    gpx.name = path.stem
 
+    with atomic_write(path) as file:
+        file.write(gpx.to_xml())
 
-def find_corrupted_gpx():
-    print("Finding corrupted GPX files...")
-    for path in GPX_PATH.rglob("**/*.gpx"):
-        try:
-            with open(path, "r") as file:
-                gpxpy.parse(file)
-        except:
-            send2trash.send2trash(path)
-            print(f"\t- {path}")
+    return name
 
 
 if __name__ == "__main__":
+    from crunner.gpx_index import update_gpx
+
     update_gpx()
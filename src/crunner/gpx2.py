@@ -1,5 +1,6 @@
 import json
 from pathlib import Path
+from typing import Optional
 
 import send2trash
 
@@ -10,59 +11,80 @@ from crunner.plotter import Plotter
 from crunner.route import Postman
 
 
-def generate_circuits():
-    handler = Handler()
-    postman = Postman()
-    plotter = Plotter()
+def find_source(graph_path: Path) -> Optional[int]:
+    circuit_path = CIRCUIT_PATH / "Rotterdam" / f"{graph_path.stem}.json"
+    if not circuit_path.exists():
+        return None
 
-    for circuit_path in (CIRCUIT_PATH / "Rotterdam").iterdir():
-        if circuit_path.suffix != ".json":
-            continue
+    with open(circuit_path, "r") as file:
+        circuit_data = json.load(file)
 
-        graph_path = GRAPH_PATH / "Rotterdam" / f"{circuit_path.stem}.graphml"
-        if not graph_path.exists():
-            continue
+    if not "source" in circuit_data:
+        return None
+    if "circuit" in circuit_data:
+        return None
+
+    return circuit_data["source"]
 
-        with open(circuit_path, "r") as file:
-            circuit_data = json.load(file)
 
-        if not "source" in circuit_data:
-            continue
-        if "circuit" in circuit_data:
-            continue
+def generate_circuits():
+    postman = Postman()
+    plotter = Plotter()
 
-        source = circuit_data["source"]
-        graph = handler.load_from_file(graph_path)
-        circuit, graph, stats = postman.rpp_undirected(graph, source)
+    # Only load the graphs that still need a circuit
+    sources = {
+        graph_path: source
+        for graph_path in (GRAPH_PATH / "Rotterdam").glob("*.graphml")
+        if (source := find_source(graph_path)) is not None
+    }
+
+    for graph_path, graph in Handler.load_region(
+        GRAPH_PATH / "Rotterdam", include=sources.__contains__
+    ):
+        circuit, graph, stats = postman.rpp_undirected(graph, sources[graph_path])
 
         path = Path("Rotterdam") / graph_path.name
         plotter.plot_circuit(graph, circuit, path, stats)
 
 
-def generate_gpx():
-    handler = Handler()
+def load_stats(graph_path: Path) -> Optional[dict]:
+    circuit_path = CIRCUIT_PATH / "Rotterdam" / f"{graph_path.stem}.json"
+    if not circuit_path.exists():
+        return None
 
-    print("Generating GPX files...")
-    for graph_path in (GRAPH_PATH / "Rotterdam").iterdir():
-        circuit_path = CIRCUIT_PATH / "Rotterdam" / f"{graph_path.stem}.json"
-        if not circuit_path.exists():
-            continue
+    try:
+        with open(circuit_path, "r") as file:
+            stats = json.load(file)
+    except:
+        print(f"\t- {graph_path.stem}")
+        print("\t\t Deleting because corrupted")
+        send2trash.send2trash(circuit_path)
+        return None
 
+    if not "circuit" in stats:
         print(f"\t- {graph_path.stem}")
+        print(f"\t\t No circuit: {circuit_path.name}")
+        return None
 
-        try:
-            with open(circuit_path, "r") as file:
-                stats = json.load(file)
-        except:
-            print("\t\t Deleting because corrupted")
-            send2trash.send2trash(circuit_path)
-            continue
+    return stats
 
-        if not "circuit" in stats:
-            print(f"\t\t No circuit: {circuit_path.name}")
-            continue
 
-        graph = handler.load_from_file(graph_path)
+def generate_gpx():
+    print("Generating GPX files...")
+
+    # Only load the graphs that have a circuit
+    all_stats = {
+        graph_path: stats
+        for graph_path in (GRAPH_PATH / "Rotterdam").glob("*.graphml")
+        if (stats := load_stats(graph_path)) is not None
+    }
+
+    for graph_path, graph in Handler.load_region(
+        GRAPH_PATH / "Rotterdam", include=all_stats.__contains__
+    ):
+        print(f"\t- {graph_path.stem}")
+
+        stats = all_stats[graph_path]
         circuit = stats["circuit"]
 
         gpx_path = GPX_PATH / "Rotterdam" / f"{graph_path.stem}.gpx"
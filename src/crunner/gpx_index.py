@@ -0,0 +1,252 @@
+import datetime
+import sqlite3
+import xml.etree.ElementTree as XMLTree
+from pathlib import Path
+from typing import Optional
+
+import send2trash
+from attrs import define
+
+from crunner.common import GPX_PATH, PLOTTED_PATH, RUNS_PATH
+from crunner.gpx import read_gpx, rename_gpx
+from crunner.parallel import map_paths
+from crunner.path import Paths
+
+INDEX_NAME = ".gpx_index.sqlite"
+
+Bounds = tuple[float, float, float, float]  # min lat, min lng, max lat, max lng
+
+
+@define
+class GpxEntry:
+    """
+    Metadata of a GPX file as stored in the index of its data directory
+    """
+
+    path: Path
+    name: Optional[str]
+    time: Optional[datetime.datetime]
+    distance: Optional[float]  # In km
+    bounds: Optional[Bounds]
+    n_points: int
+    is_valid: bool
+
+    @classmethod
+    def from_path(cls, path: Path) -> "GpxEntry":
+        try:
+            data = read_gpx(path)
+        except (XMLTree.ParseError, ValueError, TypeError):
+            return cls(path, None, None, None, None, 0, False)
+
+        bounds = None
+        if len(data.lat):
+            bounds = (data.lat.min(), data.lng.min(), data.lat.max(), data.lng.max())
+            bounds = tuple(map(float, bounds))
+
+        return cls(
+            path,
+            data.name,
+            data.time,
+            data.find_distance("km"),
+            bounds,
+            len(data.lat),
+            True,
+        )
+
+
+class GpxIndex:
+    """
+    Persistent index of the metadata of all GPX files in a data directory (SQLite)
+    Files are keyed by their path, modification time and size, such that only files that
+    changed since the last run are read again
+    """
+
+    ROOTS = [GPX_PATH, PLOTTED_PATH, RUNS_PATH]
+    INDEXES: dict[Path, "GpxIndex"] = {}
+
+    COLUMNS = [
+        "path",
+        "mtime",
+        "size",
+        "name",
+        "time",
+        "distance",
+        "min_lat",
+        "min_lng",
+        "max_lat",
+        "max_lng",
+        "n_points",
+        "is_valid",
+    ]
+    SELECT = f"SELECT {', '.join(COLUMNS)} FROM files"
+    UPSERT = (
+        f"INSERT OR REPLACE INTO files ({', '.join(COLUMNS)}) "
+        f"VALUES ({', '.join('?' * len(COLUMNS))})"
+    )
+
+    def __init__(self, directory: Path):
+        self.directory = directory.resolve()
+        self.connection = sqlite3.connect(self.directory / INDEX_NAME)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                mtime INTEGER,
+                size INTEGER,
+                name TEXT,
+                time TEXT,
+                distance REAL,
+                min_lat REAL,
+                min_lng REAL,
+                max_lat REAL,
+                max_lng REAL,
+                n_points INTEGER,
+                is_valid INTEGER
+            )
+            """)
+
+    @classmethod
+    def of(cls, path: Path) -> "GpxIndex":
+        """
+        Find the (refreshed) index of the data directory that a path belongs to
+        :param path: Path of a GPX file or directory
+        :return: Index of the data directory, or of the directory itself when it has none
+        """
+        path = path.resolve()
+        directory = next(
+            (
+                root.resolve()
+                for root in cls.ROOTS
+                if path.is_relative_to(root.resolve())
+            ),
+            path if path.is_dir() else path.parent,
+        )
+
+        if directory not in cls.INDEXES:
+            cls.INDEXES[directory] = cls(directory)
+            cls.INDEXES[directory].refresh()
+
+        return cls.INDEXES[directory]
+
+    def __key(self, path: Path) -> str:
+        return path.resolve().relative_to(self.directory).as_posix()
+
+    def __to_row(self, entry: GpxEntry) -> tuple:
+        stat = entry.path.stat()
+        bounds = entry.bounds or (None, None, None, None)
+        time = entry.time.isoformat() if entry.time else None
+
+        return (
+            self.__key(entry.path),
+            stat.st_mtime_ns,
+            stat.st_size,
+            entry.name,
+            time,
+            entry.distance,
+            *bounds,
+            entry.n_points,
+            entry.is_valid,
+        )
+
+    def __to_entry(self, row: tuple) -> GpxEntry:
+        key, _, _, name, time, distance, *bounds, n_points, is_valid = row
+        time = datetime.datetime.fromisoformat(time) if time else None
+        bounds = tuple(bounds) if bounds[0] is not None else None
+
+        return GpxEntry(
+            self.directory / key, name, time, distance, bounds, n_points, bool(is_valid)
+        )
+
+    def __upsert(self, entries: list[GpxEntry]):
+        self.connection.executemany(
+            self.UPSERT,
+            [self.__to_row(entry) for entry in entries],
+        )
+
+    def refresh(self) -> int:
+        """
+        Read the GPX files that were added or changed since the last refresh
+        :return: Number of files that were read
+        """
+        known = {
+            key: (mtime, size)
+            for key, mtime, size in self.connection.execute(
+                "SELECT path, mtime, size FROM files"
+            )
+        }
+
+        found, stale = set(), []
+        for path in self.directory.rglob("*.gpx"):
+            stat = path.stat()
+            key = self.__key(path)
+
+            found.add(key)
+            if known.get(key) != (stat.st_mtime_ns, stat.st_size):
+                stale.append(path)
+
+        self.__upsert([entry for _, entry in map_paths(GpxEntry.from_path, stale)])
+        self.connection.executemany(
+            "DELETE FROM files WHERE path = ?",
+            [(key,) for key in known.keys() - found],
+        )
+        self.connection.commit()
+
+        if stale:
+            print(f"Indexed {len(stale)} changed GPX files in {self.directory.name}")
+
+        return len(stale)
+
+    def get(self, path: Path) -> GpxEntry:
+        """
+        Find the metadata of a GPX file, which is read again when it changed
+        """
+        stat = path.stat()
+        row = self.connection.execute(
+            f"{self.SELECT} WHERE path = ?", (self.__key(path),)
+        ).fetchone()
+
+        if row is not None and row[1:3] == (stat.st_mtime_ns, stat.st_size):
+            return self.__to_entry(row)
+
+        entry = GpxEntry.from_path(path)
+        self.__upsert([entry])
+        self.connection.commit()
+
+        return entry
+
+    def entries(self) -> list[GpxEntry]:
+        rows = self.connection.execute(self.SELECT)
+        return [self.__to_entry(row) for row in rows]
+
+
+def update_gpx(n_workers: Optional[int] = None):
+    # Search through all plotted GPX files, where only changed files are read again
+    for dir in [Paths.gpx(), Paths.plotted(), Paths.runs()]:
+        index = GpxIndex.of(dir)
+
+        # Verify that the name has not been set based on the file name
+        paths = [
+            entry.path
+            for entry in index.entries()
+            if entry.is_valid
+            and (not entry.name or entry.name.lower().startswith("new"))
+        ]
+
+        for path, name in map_paths(rename_gpx, paths, n_workers):
+            print(f"{name} -> {path.stem}")
+
+        if paths:
+            index.refresh()
+
+
+def find_corrupted_gpx():
+    print("Finding corrupted GPX files...")
+    for entry in GpxIndex.of(GPX_PATH).entries():
+        if entry.is_valid or not entry.path.exists():
+            continue
+
+        send2trash.send2trash(entry.path)
+        print(f"\t- {entry.path}")
+
+
+if __name__ == "__main__":
+    update_gpx()
@@ -1,16 +1,24 @@
-from collections import deque
 from enum import IntEnum
 from itertools import pairwise
+from pathlib import Path
 from typing import Optional
 
 import networkx as nx
+import numpy as np
 from geopy.distance import geodesic
 from shapely import LineString
 
+from crunner.geometry import find_geometry, to_coords
+from crunner.util import atomic_write
+
 Coord = tuple[float, float]  # lat, lng
 Node = int
 Edge = tuple[Node, Node] | tuple[Node, Node, int]
 
+# Original OSM ids of the nodes (by position) after they are renumbered
+OSM_IDS = "osm_ids"
+OSM_IDS_SUFFIX = ".osmids.npy"
+
 
 def find_streets(graph: nx.MultiGraph) -> set[str]:
     streets = set()
@@ -85,8 +93,8 @@ def find_edges(
 
 def annotate_with_distances(graph: nx.MultiGraph) -> nx.MultiGraph:
     for src, dst, key, data in graph.edges(keys=True, data=True):
-        # Already found distance, make sure it is numerical
-        if False and "distance" in data:
+        # Already found distance (e.g. saved with the graph), make sure it is numerical
+        if "distance" in data:
             data["distance"] = float(data["distance"])
             continue
 
@@ -122,9 +130,8 @@ def find_edge_coords(
         if 0 in edge:
             edge = edge[0]
 
-        if "geometry" in edge and isinstance(edge["geometry"], LineString):
-            xy_coords = list(edge["geometry"].coords)
-            coords = [(y, x) for x, y in xy_coords]
+        if (xy_coords := to_coords(edge.get("geometry"))) is not None:
+            coords = [(y, x) for x, y in xy_coords.tolist()]
 
     # Find coordinates directly from node end points (for straight lines)
     if not coords:
@@ -169,13 +176,13 @@ def convert_to_simple_directed(graph: nx.MultiGraph) -> nx.Graph:
         result.add_node(node, **{"x": x, "y": y})
 
         # Split the straight line into two other straight lines
-        if not ("geometry" in data and isinstance(data["geometry"], LineString)):
+        if (line := find_geometry(data)) is None:
             result.add_edge(src, node, **data)
             result.add_edge(node, dst, **data)
 
         # Otherwise split the poly-line in two halfs
         else:
-            first, second = split_linestring(data["geometry"])
+            first, second = split_linestring(line)
 
             result.add_edge(src, node, **{**data, **{"geometry": first}})
             result.add_edge(node, dst, **{**data, **{"geometry": second}})
@@ -209,11 +216,11 @@ def convert_to_simple_undirected(graph: nx.MultiDiGraph) -> nx.Graph:
         y, x = find_edge_midpoint(graph, src, dst, key)
         result.add_node(node, **{"x": x, "y": y})
 
-        if not ("geometry" in data and isinstance(data["geometry"], LineString)):
+        if (line := find_geometry(data)) is None:
             result.add_edge(src, node, **data)
             result.add_edge(node, dst, **data)
         else:
-            first, second = split_linestring(data["geometry"])
+            first, second = split_linestring(line)
             result.add_edge(src, node, **{**data, **{"geometry": first}})
             result.add_edge(node, dst, **{**data, **{"geometry": second}})
 
@@ -264,8 +271,8 @@ def find_edge_midpoint(
     if edge := graph.get_edge_data(src, dst, key):
         edge = edge[0] if 0 in edge else edge
 
-        if "geometry" in edge and isinstance(edge["geometry"], LineString):
-            mid_point = edge["geometry"].interpolate(0.5, normalized=True)
+        if (line := find_geometry(edge)) is not None:
+            mid_point = line.interpolate(0.5, normalized=True)
 
             return mid_point.y, mid_point.x
 
@@ -372,51 +379,6 @@ def find_components(
     )
 
 
-def find_partitions_from_dist(
-    graph: nx.MultiGraph, max_dist_m: float
-) -> list[set[Edge]]:
-    graph_u = convert_to_simple_undirected(graph)
-
-    partitions = []
-    visited: set[Edge] = set()
-
-    def bfs(start_node: Node):
-        to_explore = deque([start_node])
-        partition = set()
-        curr_dist = 0
-
-        while to_explore:
-            node = to_explore.popleft()
-
-            if node in visited:
-                continue
-
-            visited.add(node)
-
-            for neighbor in graph_u.neighbors(node):
-                edge = (node, neighbor)
-                data = graph_u.get_edge_data(*edge)
-                dist = data["distance"]
-
-                if curr_dist + dist <= max_dist_m:
-                    partition.add(edge)
-                    to_explore.append(neighbor)
-                    curr_dist += dist
-
-        return partition, curr_dist
-
-    n = 1
-    for node in graph_u.nodes:
-        if not node in visited:
-            partition, dist = bfs(node)
-            partitions.append(partition)
-
-            print(f"Partition {n} has distance of {dist}m")
-            n += 1
-
-    return partitions
-
-
 def find_node(node_data: dict, search_graph: nx.MultiDiGraph):
     # Cannot make assumptions about nodes without geo location
     if "x" not in node_data or "y" not in node_data:
@@ -444,18 +406,15 @@ def find_edge(
     edge_data = graph.get_edge_data(*edge)
 
     # Compare lines
-    if "geometry" in edge_data:
-        line = edge_data["geometry"]
-
+    if (line := find_geometry(edge_data)) is not None:
         for u, v, w, other_data in search_graph.edges(data=True, keys=True):
             other_edge = (u, v, w)
 
             # Edge is not defined from line
-            if "geometry" not in other_data:
+            if (other_line := find_geometry(other_data)) is None:
                 continue
 
             # Verify whether lines are equal
-            other_line = other_data["geometry"]
 
             if line == other_line or line.reverse() == other_line:
                 return other_edge
@@ -554,3 +513,66 @@ def make_edge(src: int, dst: int) -> tuple[int, int]:
     src, dst = sorted([src, dst])
 
     return src, dst
+
+
+def relabel_compact(graph: nx.MultiGraph) -> np.ndarray:
+    """
+    Renumber the nodes of a graph to 0, 1, ..., n - 1 in place, reusing its node/edge data
+    :param graph: Graph to renumber
+    :return: Original id of every node, indexed by its new id (-1 for nodes not from OSM)
+    """
+    mapping = {node: idx for idx, node in enumerate(graph.nodes)}
+    osm_ids = np.fromiter(
+        (
+            -1 if data.get("is_cut", False) else node
+            for node, data in graph.nodes(data=True)
+        ),
+        dtype=np.int64,
+        count=len(mapping),
+    )
+
+    # Replace the contents of the adjacency dicts (instead of the dicts themselves), as
+    # their views are cached by the graph; edge data is shared between both directions
+    def relabel_dict(adj: dict, relabel_nbrs: bool = True):
+        items = list(adj.items())
+        adj.clear()
+
+        for node, nbrs in items:
+            if relabel_nbrs:
+                nbrs = {mapping[nbr]: data for nbr, data in nbrs.items()}
+            adj[mapping[node]] = nbrs
+
+    relabel_dict(graph._node, relabel_nbrs=False)
+    relabel_dict(graph._adj)
+    if graph.is_directed():
+        relabel_dict(graph._pred)
+
+    return osm_ids
+
+
+def osm_ids_path(path: Path) -> Path:
+    return path.with_suffix(OSM_IDS_SUFFIX)
+
+
+def save_osm_ids(graph: nx.MultiGraph, path: Path):
+    """
+    Save the OSM ids of the nodes of a graph as an array next to the graph file
+    Nodes that were added afterwards (e.g. by hand) get -1 as their OSM id
+    """
+    osm_ids = graph.graph.get(OSM_IDS)
+    if osm_ids is None:
+        return
+
+    n_nodes = max(graph.nodes, default=-1) + 1
+    if len(osm_ids) < n_nodes:
+        osm_ids = np.concatenate(
+            [osm_ids, np.full(n_nodes - len(osm_ids), -1, dtype=np.int64)]
+        )
+
+    with atomic_write(osm_ids_path(path), "wb") as file:
+        np.save(file, osm_ids)
+
+
+def load_osm_ids(path: Path) -> Optional[np.ndarray]:
+    ids_path = osm_ids_path(path)
+    return np.load(ids_path) if ids_path.exists() else None
@@ -0,0 +1,259 @@
+import re
+import xml.etree.ElementTree as XMLTree
+from ast import literal_eval
+from pathlib import Path
+from typing import Any, Callable
+from xml.sax.saxutils import escape, quoteattr
+
+import networkx as nx
+import shapely
+
+from crunner.geometry import is_raw, to_linestring
+from crunner.util import atomic_write
+
+# Attributes that are renamed when reading (e.g. from graphs edited elsewhere)
+RENAMES = {"lng": "x", "lat": "y", "coordinates": "geometry"}
+
+NODE_DTYPES: dict[str, Callable[[str], Any]] = {
+    "elevation": float,
+    "elevation_res": float,
+    "osmid": int,
+    "street_count": int,
+    "x": float,
+    "y": float,
+}
+EDGE_DTYPES: dict[str, Callable[[str], Any]] = {
+    "bearing": float,
+    "distance": float,
+    "grade": float,
+    "grade_abs": float,
+    "length": float,
+    "osmid": int,
+    "speed_kph": float,
+    "travel_time": float,
+}
+
+GRAPHML_HEADER = """\
+<?xml version='1.0' encoding='utf-8'?>
+<graphml xmlns="http://graphml.graphdrawing.org/xmlns" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://graphml.graphdrawing.org/xmlns http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd">
+"""
+
+BOOL_REGEX = re.compile(r"\b(true|false)\b")
+
+
+def local_name(tag: str) -> str:
+    # Strip the namespace from the tag
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_list(value: str) -> list | None:
+    # Lists with XML style booleans are no valid Python literals, so rename them first
+    for text in (value, BOOL_REGEX.sub(lambda match: match[0].title(), value)):
+        try:
+            return literal_eval(text)
+        except (SyntaxError, ValueError):
+            continue
+
+    return None
+
+
+def parse_value(attr: str, value: str, dtypes: dict[str, Callable[[str], Any]]):
+    # Booleans are written in both Python and XML style
+    if value in ("True", "true"):
+        return True
+    if value in ("False", "false"):
+        return False
+
+    # Stringified lists, e.g. for multiple street names
+    if value.startswith("[") and value.endswith("]"):
+        if (items := parse_list(value)) is None:
+            return value
+
+        if attr in dtypes:
+            return [dtypes[attr](item) for item in items]
+
+        return items
+
+    if attr in dtypes:
+        try:
+            return dtypes[attr](value)
+        except ValueError:
+            return dtypes[attr](float(value))
+
+    return value
+
+
+def parse_data(
+    elem: XMLTree.Element,
+    keys: dict[str, str],
+    defaults: dict[str, str],
+    dtypes: dict[str, Callable[[str], Any]],
+) -> dict[str, Any]:
+    texts = dict(defaults)
+    for child in elem:
+        if local_name(child.tag) == "data" and child.get("key") in keys:
+            texts[keys[child.get("key")]] = child.text or ""
+
+    data = {}
+    for attr, text in texts.items():
+        attr = RENAMES.get(attr, attr)
+
+        # Geometries are only parsed once they are needed
+        if attr == "geometry":
+            data[attr] = text
+        else:
+            data[attr] = parse_value(attr, text, dtypes)
+
+    return data
+
+
+def read_graphml(path: Path) -> nx.MultiDiGraph:
+    """
+    Read a GraphML file element by element, so that only a single node/edge is in memory
+    Attribute types are inferred from the values (as every attribute is saved as string),
+    legacy attribute names are renamed and booleans are coerced while reading
+    """
+    graph = nx.MultiDiGraph()
+
+    # Attribute names and default values per key domain (node, edge, graph)
+    keys: dict[str, dict[str, str]] = {"node": {}, "edge": {}, "graph": {}}
+    defaults: dict[str, dict[str, str]] = {"node": {}, "edge": {}, "graph": {}}
+    graph_elem = None
+    graph_texts: dict[str, str] = {}
+    tags: list[str] = []
+
+    for event, elem in XMLTree.iterparse(path, events=("start", "end")):
+        tag = local_name(elem.tag)
+
+        if event == "start":
+            tags.append(tag)
+            if tag == "graph" and graph_elem is None:
+                graph_elem = elem
+                if elem.get("edgedefault") == "undirected":
+                    graph = nx.MultiGraph()
+
+            continue
+
+        tags.pop()
+
+        match tag:
+            case "key":
+                domain = elem.get("for", "all")
+                name = elem.get("attr.name", elem.get("id"))
+                default = next(
+                    (c.text for c in elem if local_name(c.tag) == "default"), None
+                )
+
+                for typ in keys if domain == "all" else [domain]:
+                    if typ not in keys:
+                        continue
+
+                    keys[typ][elem.get("id")] = name
+                    if default is not None:
+                        defaults[typ][name] = default
+
+            case "node":
+                data = parse_data(elem, keys["node"], defaults["node"], NODE_DTYPES)
+                graph.add_node(int(elem.get("id")), **data)
+
+            case "edge":
+                data = parse_data(elem, keys["edge"], defaults["edge"], EDGE_DTYPES)
+                data.pop("id", None)
+
+                src, dst = int(elem.get("source")), int(elem.get("target"))
+                key = elem.get("id")
+                key = int(key) if key is not None and key.isdigit() else key
+
+                graph.add_edge(src, dst, key=key, **data)
+
+            case "data" if tags and tags[-1] == "graph":
+                if (name := keys["graph"].get(elem.get("key"))) is not None:
+                    graph_texts[name] = elem.text or ""
+                continue
+
+            case _:
+                continue
+
+        # Free the element (and its siblings read so far) once it has been added
+        elem.clear()
+        if graph_elem is not None:
+            graph_elem.clear()
+
+    # Graph attributes are read separately as the graph element is cleared along the way
+    for attr, text in {**defaults["graph"], **graph_texts}.items():
+        graph.graph[attr] = parse_value(attr, text, {})
+
+    return graph
+
+
+def to_text(value: Any) -> str:
+    if is_raw(value):
+        value = to_linestring(value)
+    if isinstance(value, shapely.Geometry):
+        return value.wkt
+
+    return str(value)
+
+
+def write_graphml(
+    graph: nx.MultiDiGraph, path: Path, edge_renames: dict[str, str] = {}
+):
+    """
+    Write a graph to GraphML element by element, renaming edge attributes on the fly
+    The file is written to a temporary file first and replaces the given path when done
+    """
+    # Find all attributes that need a key
+    node_attrs = sorted({attr for _, data in graph.nodes(data=True) for attr in data})
+    edge_attrs = sorted(
+        {
+            edge_renames.get(attr, attr)
+            for *_, data in graph.edges(data=True)
+            for attr in data
+        }
+    )
+    graph_attrs = sorted(graph.graph)
+
+    key_ids: dict[tuple[str, str], str] = {}
+    for domain, attrs in (
+        ("graph", graph_attrs),
+        ("node", node_attrs),
+        ("edge", edge_attrs),
+    ):
+        for attr in attrs:
+            key_ids[(domain, attr)] = f"d{len(key_ids)}"
+
+    def write_data(file, domain: str, data: dict, renames: dict[str, str] = {}):
+        for attr, value in data.items():
+            key = key_ids[(domain, renames.get(attr, attr))]
+            file.write(f'      <data key="{key}">{escape(to_text(value))}</data>\n')
+
+    with atomic_write(path) as file:
+        file.write(GRAPHML_HEADER)
+
+        for (domain, attr), key in key_ids.items():
+            file.write(
+                f'  <key id="{key}" for="{domain}" attr.name={quoteattr(attr)} attr.type="string" />\n'
+            )
+
+        edge_default = "directed" if graph.is_directed() else "undirected"
+        file.write(f'  <graph edgedefault="{edge_default}">\n')
+        write_data(file, "graph", graph.graph)
+
+        for node, data in graph.nodes(data=True):
+            file.write(f'    <node id="{node}">\n')
+            write_data(file, "node", data)
+            file.write("    </node>\n")
+
+        edges = (
+            graph.edges(keys=True, data=True)
+            if graph.is_multigraph()
+            else ((src, dst, None, data) for src, dst, data in graph.edges(data=True))
+        )
+
+        for src, dst, key, data in edges:
+            edge_id = "" if key is None else f" id={quoteattr(str(key))}"
+            file.write(f'    <edge source="{src}" target="{dst}"{edge_id}>\n')
+            write_data(file, "edge", data, edge_renames)
+            file.write("    </edge>\n")
+
+        file.write("  </graph>\n</graphml>\n")
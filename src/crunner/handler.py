@@ -1,20 +1,42 @@
-import copy
 import json
 import re
-from ast import literal_eval
 from functools import partial
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Generator, Optional
 
 import networkx as nx
+import numpy as np
 import osmnx as ox
 import polars as pl
 import shapely
 from veelog import setup_logger
 
-from crunner.common import AREA_PATH, GRAPH_PATH, NON_RUNNABLE_ROADS, POLYGON_PATH
-from crunner.graph import annotate_with_distances, find_edge_coords, toggle_edge_attr
+from crunner.clip import clip_graph
+from crunner.columnar import has_columnar, load_columnar, save_columnar
+from crunner.common import (
+    AREA_PATH,
+    GRAPH_PATH,
+    NON_RUNNABLE_ROADS,
+    OSM_PATH,
+    POLYGON_PATH,
+)
+from crunner.extract import BIKE_FILTER, graph_from_extract, strip_extract_suffix
+from crunner.fingerprint import GraphDiff, diff_graphs, fingerprint_graph
+from crunner.graph import (
+    OSM_IDS,
+    annotate_with_distances,
+    find_edge_coords,
+    load_osm_ids,
+    relabel_compact,
+    save_osm_ids,
+    toggle_edge_attr,
+)
+from crunner.graphml import read_graphml, write_graphml
+from crunner.journal import Journal
+from crunner.parallel import map_paths
 from crunner.path import Paths
+from crunner.reconcile import reconcile_edits
+from crunner.tiles import TILES_DIR, TileStore
 
 logger = setup_logger(__name__)
 
@@ -42,6 +64,8 @@ class Handler:
             (".graphml", "Graph", GRAPH_PATH, self.load_from_file),
             (".csv", "Polygon", POLYGON_PATH, self.load_from_polygon_file),
             (".json", "Area", AREA_PATH, self.load_from_area),
+            (".osm", "Extract", OSM_PATH, self.load_from_extract),
+            (".pbf", "Extract (PBF)", OSM_PATH, self.load_from_extract),
         ]
         self.__LOAD_MAP: dict[str, tuple[str, Path, Callable]] = {
             ext: args for ext, *args in self.__LOAD_FUNCS
@@ -64,6 +88,7 @@ No extension given for "{name}", how would you like to load the graph?
 Enter here: """
 
     def __load_from_map(self, stem: str):
+        stem = strip_extract_suffix(stem)
         prompt = self.__create_graph_prompt(stem)
 
         while True:
@@ -80,8 +105,11 @@ Enter here: """
             ext, _, base_path, load_func = self.__LOAD_FUNCS[idx]
             name = f"{stem}{ext}"
 
-            for path in base_path.rglob("*"):
-                if path.is_file() and path.name == name:
+            # Match extracts on their name without the full suffix (e.g. .osm.pbf)
+            for path in base_path.rglob(f"*{ext}"):
+                if path.is_file() and (
+                    path.name == name or strip_extract_suffix(path.name) == stem
+                ):
                     return load_func(path), path
 
             print(f"No path found for {stem}, try again...")
@@ -172,10 +200,9 @@ Enter here: """
 
         graph = load_func(**args)
 
-        # Rename the nodes
+        # Rename the nodes, keeping the OSM ids to save them alongside the graph
         if max(graph.nodes()) > len(graph.nodes()) + 100:
-            node_ids = {node: id for id, node in enumerate(graph.nodes())}
-            graph = nx.relabel_nodes(graph, node_ids)
+            graph.graph[OSM_IDS] = relabel_compact(graph)
 
         # Edit the graph
         graph = cls.__remove_multiple_road_types(graph)
@@ -194,8 +221,14 @@ Enter here: """
     def __load_from_polygon(
         cls,
         polygon: shapely.Polygon | shapely.MultiPolygon,
+        city: Optional[str] = None,
         **kwargs,
     ) -> nx.MultiDiGraph:
+        # Clip the polygon from the base graph of its city when possible
+        if city is not None:
+            load_func = partial(cls.__clip_base_graph, city, polygon)
+            return cls.__load(load_func, load_with_args=False)
+
         load_func = partial(
             ox.graph_from_polygon,
             polygon=polygon,
@@ -206,6 +239,84 @@ Enter here: """
 
         return cls.__load(load_func, **kwargs)
 
+    @classmethod
+    def __find_city(cls, path: Path, base_path: Path) -> Optional[str]:
+        # Polygons and areas are grouped in a directory per city
+        try:
+            parts = path.relative_to(base_path).parts
+        except ValueError:
+            return None
+
+        return parts[0] if len(parts) > 1 else None
+
+    @classmethod
+    def __clip_base_graph(
+        cls, city: str, area: shapely.Polygon | shapely.MultiPolygon
+    ) -> nx.MultiDiGraph:
+        """
+        Clip the part of the graph of a whole city that lies within an area
+        The graph is downloaded once (or read from a local extract) and stored in tiles,
+        such that only the tiles around the area have to be read
+        :param city: Name of the city
+        :param area: Area to clip the base graph to
+        :return: Graph within the area, where edges crossing its boundary are cut
+        """
+        store = TileStore(GRAPH_PATH / city / TILES_DIR)
+
+        # Rebuild the base graph when it does not cover the area
+        boundary = store.graph.get("boundary")
+        if not store.exists() or (
+            boundary is not None and not shapely.from_wkt(boundary).covers(area)
+        ):
+            print(f"Building base graph for {city}...")
+            store.save(cls.__build_base_graph(city, area))
+
+        return clip_graph(store.load(area), area)
+
+    @classmethod
+    def load_from_tiles(
+        cls,
+        city: str,
+        area: shapely.Geometry | tuple[float, float, float, float],
+    ) -> nx.MultiDiGraph:
+        """
+        Load the graph within a polygon or bounding box from the tiled base graph of a city
+        :param city: Name of the city
+        :param area: Polygon or bounding box (min lng, min lat, max lng, max lat)
+        :return: Graph within the area, where edges crossing its boundary are cut
+        """
+        if isinstance(area, tuple):
+            area = shapely.box(*area)
+
+        load_func = partial(cls.__clip_base_graph, city, area)
+        return cls.__load(load_func, load_with_args=False)
+
+    @classmethod
+    def __build_base_graph(
+        cls, city: str, polygon: shapely.Polygon | shapely.MultiPolygon
+    ) -> nx.MultiDiGraph:
+        # Prefer a local extract of the city, which covers everything in it
+        for extract_path in sorted(OSM_PATH.glob(f"{city}.*")):
+            if strip_extract_suffix(extract_path.name) == city:
+                return graph_from_extract(extract_path, retain_all=True)
+
+        # Otherwise download everything around the polygons and areas of the city at once
+        polygons = [polygon]
+        polygons += [
+            cls.__load_polygon(path) for path in POLYGON_PATH.glob(f"{city}/**/*.csv")
+        ]
+        polygons += [
+            cls.__load_area(path) for path in AREA_PATH.glob(f"{city}/**/*.json")
+        ]
+        boundary = shapely.unary_union(polygons).convex_hull
+
+        base_graph = ox.graph_from_polygon(
+            boundary, network_type="bike", simplify=True, retain_all=True
+        )
+        base_graph.graph["boundary"] = boundary.wkt
+
+        return base_graph
+
     @classmethod
     def __load_polygon(cls, path: Path) -> shapely.Polygon:
         df = pl.read_csv(path, has_header=True)
@@ -213,109 +324,187 @@ Enter here: """
 
         return shapely.Polygon(coords)
 
+    @classmethod
+    def __load_area(cls, path: Path) -> shapely.MultiPolygon:
+        with open(path, "r") as file:
+            feature = json.load(file)
+            coords = feature["geometry"]["coordinates"]
+
+        return shapely.MultiPolygon(coords)
+
+    @classmethod
+    def __reconcile_with_saved(
+        cls, graph: nx.MultiDiGraph, path: Path, base_path: Path
+    ) -> nx.MultiDiGraph:
+        # Carry over the edits of the graph that was saved for the same polygon/area
+        try:
+            graph_path = GRAPH_PATH / path.relative_to(base_path).with_suffix(
+                ".graphml"
+            )
+        except ValueError:
+            return graph
+
+        if not graph_path.exists() and not has_columnar(graph_path):
+            return graph
+
+        # The saved graph already holds its (automatically) removed roads, so read it as
+        # is instead of removing its non-runnable roads once more
+        print(f"Carrying over the edits of {graph_path.name}...")
+        reconcile_edits(cls.__read_file(graph_path), graph)
+
+        return graph
+
     @classmethod
     def load_from_polygon_file(cls, path: Path) -> nx.Graph:
         path = POLYGON_PATH / path.with_suffix("").with_suffix(".csv")
         polygon = cls.__load_polygon(path)
+        graph = cls.__load_from_polygon(polygon, cls.__find_city(path, POLYGON_PATH))
 
-        return cls.__load_from_polygon(polygon)
+        return cls.__reconcile_with_saved(graph, path, POLYGON_PATH)
 
     @classmethod
     def load_from_area(cls, path: Path) -> nx.Graph:
-        with open(path, "r") as file:
-            feature = json.load(file)
-            coords = feature["geometry"]["coordinates"]
-            polygon = shapely.MultiPolygon(coords)
+        polygon = cls.__load_area(path)
+        graph = cls.__load_from_polygon(polygon, cls.__find_city(path, AREA_PATH))
 
-        return cls.__load_from_polygon(polygon)
+        return cls.__reconcile_with_saved(graph, path, AREA_PATH)
 
     @classmethod
-    def load_from_file(cls, path: Path, **kwargs) -> nx.MultiDiGraph:
-        print("Load from file", path)
-        node_dtypes = {"lng": float, "lat": float}
+    def load_from_extract(
+        cls, path: Path, use_custom_filters: bool = False, **kwargs
+    ) -> nx.MultiDiGraph:
+        """
+        Load a graph from a local OSM extract (.osm or .osm.pbf) without using Overpass
+        :param path: Path of the extract
+        :param use_custom_filters: Whether to filter with CUSTOM_FILTERS instead of the bike network
+        :return: Graph with all runnable roads in the extract
+        """
+        way_filters = [cls.CUSTOM_FILTERS if use_custom_filters else BIKE_FILTER]
+        load_func = partial(graph_from_extract, path=path, way_filters=way_filters)
 
-        def load_graph(
-            filepath: str | Path | None = None, *, graphml_str: str, node_dtypes
-        ):
-            graph = ox.load_graphml(
-                filepath, graphml_str=graphml_str, node_dtypes=node_dtypes
-            )
+        return cls.__load(load_func, **kwargs)
 
+    @classmethod
+    def __read_file(cls, path: Path) -> nx.MultiDiGraph:
+        # Read the graph as it was saved, without editing it like a newly loaded graph
+        if has_columnar(path):
+            graph = load_columnar(path)
+        else:
+            graph = read_graphml(path)
+
+            # Edges without coordinates are straight lines between their end points
             for src, dst, key, data in graph.edges(data=True, keys=True):
-                geometry = data.get("geometry")
-                if geometry:
+                if "geometry" in data:
                     continue
 
-                coords = data.get("coordinates")
+                coords = find_edge_coords(graph, src, dst, key)
                 if not coords:
-                    coords = find_edge_coords(graph, src, dst, key)
-                    if not coords:
-                        print(
-                            f"No coordinates/geometry found for edge {src} -> {dst} ({key})"
-                        )
-                    else:
-                        coords = [(x, y) for y, x in coords]
-                        data["geometry"] = shapely.LineString(coords)
-                    continue
-
-                if isinstance(coords, shapely.LineString):
-                    continue
-
-                if isinstance(coords, list):
-                    coords = shapely.LineString(coords)
-                elif isinstance(coords, str):
-                    # Literal (but string representation) of a line string
-                    if re.match(r"LINESTRING\s*\((.*)\)", coords):
-                        coords = shapely.from_wkt(coords)
-                    else:
-                        try:
-                            # Coordinate list for the line string
-                            coords = shapely.LineString(literal_eval(coords))
-                        except:
-                            continue
-                else:
                     print(
-                        f"Non-parsable coordinates found for edge {src} -> {dst} ({key}): {coords}"
+                        f"No coordinates/geometry found for edge {src} -> {dst} ({key})"
                     )
                     continue
 
-                data["geometry"] = coords
-                del data["coordinates"]
+                # Keep the coordinates raw, the line is only created once needed
+                data["geometry"] = np.array([(x, y) for y, x in coords])
 
-            return graph
+        # Apply the changes that were made after the graph was last saved
+        if n_changes := Journal(path).replay(graph):
+            print(f"Recovered {n_changes} unsaved changes from the journal")
 
-        with open(path, "r", encoding="utf-8") as file:
-            graphml_str: str = file.read()
-            graphml_str = re.sub(
-                r'attr\.type="(.*)"', 'attr.type="string"', graphml_str
-            )
+        if (osm_ids := load_osm_ids(path)) is not None:
+            graph.graph[OSM_IDS] = osm_ids
 
-            # Rename front
-            graphml_str = graphml_str.replace('"lng"', '"x"').replace('"lat"', '"y"')
-            graphml_str = graphml_str.replace("true", "True").replace("false", "False")
-            # graphml_str = graphml_str.replace('"coordinates"', '"geometry"')
+        return graph
 
-        load_func = partial(
-            load_graph, graphml_str=graphml_str, node_dtypes=node_dtypes
-        )
+    @classmethod
+    def load_from_file(cls, path: Path, **kwargs) -> nx.MultiDiGraph:
+        print("Load from file", path)
 
-        return cls.__load(load_func, load_with_args=False)
+        return cls.__load(partial(cls.__read_file, path), load_with_args=False)
 
     @classmethod
-    def save(cls, G, path: Path):
-        G_save = copy.deepcopy(G)
+    def load_region(
+        cls,
+        region: Path,
+        include: Optional[Callable[[Path], bool]] = None,
+        n_workers: Optional[int] = None,
+        n_ahead: Optional[int] = None,
+    ) -> Generator[tuple[Path, nx.MultiDiGraph], None, None]:
+        """
+        Load all graphs of a region in parallel, while yielding them in order of their paths
+        Only a limited number of graphs is loaded ahead, such that the caller can already
+        work on the first graphs while memory stays bounded
+        :param region: Directory of the region, e.g. GRAPH_PATH / "Rotterdam"
+        :param include: Whether to load the graph of a path, loads all graphs when not given
+        :param n_workers: Number of processes to load with, defaults to the number of CPUs
+        :param n_ahead: Number of graphs to load ahead, defaults to twice the number of workers
+        :return: Paths and graphs of the region
+        """
+        paths = sorted(
+            path
+            for path in region.rglob("*.graphml")
+            if include is None or include(path)
+        )
+        if not paths:
+            return
+
+        # Graphs take long enough to load to use worker processes for any number of them
+        yield from map_paths(
+            cls.load_from_file,
+            paths,
+            n_workers,
+            n_ahead,
+            min_parallel=2,
+            skip_errors=True,
+        )
+
+    @classmethod
+    def save(cls, G, path: Path, micro_degrees: bool = False):
+        """
+        Save a graph as GraphML, together with a columnar version that loads faster
+        :param G: Graph to save
+        :param path: Path of the graph
+        :param micro_degrees: Whether to store the columnar coordinates as int32 micro-degrees
+        """
         graph_path = Paths.graph(path)
 
+        # Rename back while writing
         renames = {"geometry": "coordinates", "x": "lng", "y": "lat"}
+        edge_renames = renames if G.is_multigraph() else {}
 
-        # Rename back
-        if G_save.is_multigraph():
-            for u, v, key, data in G_save.edges(data=True, keys=True):
-                for attr, new_attr in renames.items():
-                    if attr in data:
-                        data[new_attr] = data.pop(attr)
+        # The OSM ids are stored as an array instead of a graph attribute
+        osm_ids = G.graph.pop(OSM_IDS, None)
+        try:
+            write_graphml(G, graph_path, edge_renames)
+            save_columnar(G, graph_path, micro_degrees)
+        finally:
+            if osm_ids is not None:
+                G.graph[OSM_IDS] = osm_ids
+
+        save_osm_ids(G, graph_path)
 
-        ox.save_graphml(G_save, graph_path)
+        # All changes are part of the saved graph now
+        Journal(graph_path).clear()
+
+    @classmethod
+    def diff_files(cls, path: Path, other_path: Path) -> GraphDiff:
+        """
+        Compare the content of two graph files
+        :param path: Path of the previous version of the graph
+        :param other_path: Path of the current version of the graph
+        :return: Nodes and edges that were added, removed or changed
+        """
+        graph = cls.load_from_file(path)
+        other_graph = cls.load_from_file(other_path)
+
+        if fingerprint_graph(graph) == fingerprint_graph(other_graph):
+            print(f"{path.name} and {other_path.name} have the same content")
+            return GraphDiff()
+
+        diff = diff_graphs(graph, other_graph)
+        print(f"{path.name} -> {other_path.name}: {diff}")
+
+        return diff
 
     @classmethod
     def __toggle_non_runnable_roads(
@@ -0,0 +1,263 @@
+import hashlib
+import json
+import shutil
+from pathlib import Path
+from typing import Optional
+
+import folium
+import matplotlib
+import matplotlib.image
+import networkx as nx
+import numpy as np
+import polars as pl
+
+from crunner.archive import RunArchive
+from crunner.common import HEATMAP_PATH
+from crunner.util import atomic_write
+
+# Zoom levels of the tile pyramid, which are scaled up by the map beyond the maximum
+MIN_ZOOM = 11
+MAX_ZOOM = 16
+
+TILE_SIZE = 256
+MANIFEST_NAME = "manifest.json"
+
+# Colors of the heatmap, of which the most visited pixels get the last color
+COLOR_MAP = "hot"
+
+# Percentile of the visited pixels of a zoom level that gets the full color
+SATURATION_PERCENTILE = 99.0
+
+
+def to_pixels(
+    lat: np.ndarray, lng: np.ndarray, zoom: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Project lat/lng coordinates onto the (web mercator) pixels of the map at a zoom level
+    """
+    size = TILE_SIZE * 2**zoom
+    lat = np.radians(np.clip(lat, -85.05112878, 85.05112878))
+
+    x = (np.asarray(lng) + 180.0) / 360.0 * size
+    y = (1.0 - np.arcsinh(np.tan(lat)) / np.pi) / 2.0 * size
+
+    return (
+        np.clip(x, 0, size - 1).astype(np.int64),
+        np.clip(y, 0, size - 1).astype(np.int64),
+    )
+
+
+def count_pixels(
+    x: np.ndarray, y: np.ndarray, counts: np.ndarray, zoom: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sum the counts of points on the same pixel, keeping only the pixels that have any
+    :return: x and y of the visited pixels and the number of points on them
+    """
+    size = TILE_SIZE * 2**zoom
+    pixels, inverse = np.unique(x * size + y, return_inverse=True)
+    pixel_counts = np.bincount(inverse, weights=counts, minlength=len(pixels))
+
+    return pixels // size, pixels % size, pixel_counts
+
+
+def rasterise(
+    lat: np.ndarray, lng: np.ndarray
+) -> dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Bin points into the pixels of every zoom level of the tile pyramid
+    The points are only binned at the maximum zoom level, of which every lower level sums
+    blocks of 2 x 2 pixels
+    :return: Visited pixels with their counts (as in count_pixels) for every zoom level
+    """
+    x, y = to_pixels(lat, lng, MAX_ZOOM)
+    levels = {MAX_ZOOM: count_pixels(x, y, np.ones(len(x)), MAX_ZOOM)}
+
+    for zoom in range(MAX_ZOOM - 1, MIN_ZOOM - 1, -1):
+        x, y, counts = levels[zoom + 1]
+        levels[zoom] = count_pixels(x // 2, y // 2, counts, zoom)
+
+    return levels
+
+
+def find_sources_key(paths: list[Path]) -> str:
+    # The archive is append-only, so its files identify the points the heatmap contains
+    digest = hashlib.blake2b(digest_size=8)
+    for path in paths:
+        digest.update(f"{path.name}:{path.stat().st_size};".encode())
+
+    return digest.hexdigest()
+
+
+class HeatmapStore:
+    """
+    Caches the heatmap of the runs of an area as a pyramid of map tiles
+    Every zoom level is a counting histogram of the run points on the pixels of the map,
+    of which only the tiles that contain any points are saved
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.manifest = self.__read_manifest()
+
+    def __read_manifest(self) -> dict:
+        manifest_path = self.path / MANIFEST_NAME
+        if not manifest_path.exists():
+            return {}
+
+        with open(manifest_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def exists(self) -> bool:
+        return bool(self.manifest)
+
+    @property
+    def tiles_path(self) -> Path:
+        return self.path / self.manifest.get("key", "")
+
+    def save(self, key: str, lat: np.ndarray, lng: np.ndarray):
+        """
+        Rasterise points into a new tile pyramid, replacing the previous one when done
+        :param key: Key of the sources of the points
+        :param lat: Latitudes of the points
+        :param lng: Longitudes of the points
+        """
+        tiles_path = self.path / key
+        shutil.rmtree(tiles_path, ignore_errors=True)
+
+        color_map = matplotlib.colormaps[COLOR_MAP]
+        n_tiles = 0
+
+        for zoom, (x, y, counts) in rasterise(lat, lng).items():
+            # Scale logarithmically, such that once visited pixels still show up
+            saturation = max(np.percentile(counts, SATURATION_PERCENTILE), 2.0)
+            values = np.clip(np.log1p(counts) / np.log1p(saturation), 0.0, 1.0)
+
+            tiles = (x // TILE_SIZE) * 2**zoom + y // TILE_SIZE
+            order = np.argsort(tiles, kind="stable")
+            tiles, x, y, values = tiles[order], x[order], y[order], values[order]
+            starts = np.flatnonzero(np.r_[True, tiles[1:] != tiles[:-1]])
+
+            for start, end in zip(starts, [*starts[1:], len(tiles)]):
+                tile_x, tile_y = divmod(int(tiles[start]), 2**zoom)
+                rows, cols = y[start:end] % TILE_SIZE, x[start:end] % TILE_SIZE
+                pixels = rows * TILE_SIZE + cols
+
+                grid = np.zeros(TILE_SIZE * TILE_SIZE)
+                grid[pixels] = values[start:end]
+                grid = grid.reshape(TILE_SIZE, TILE_SIZE)
+
+                image = color_map(grid)
+                image[..., 3] = np.where(grid > 0, 0.4 + 0.6 * grid, 0.0)
+
+                tile_path = tiles_path / str(zoom) / str(tile_x) / f"{tile_y}.png"
+                tile_path.parent.mkdir(parents=True, exist_ok=True)
+                matplotlib.image.imsave(tile_path, image)
+                n_tiles += 1
+
+        old_path = self.tiles_path if self.exists() else None
+        self.manifest = {
+            "key": key,
+            "n_points": len(lat),
+            "n_tiles": n_tiles,
+            "bounds": [
+                [float(np.min(lat)), float(np.min(lng))],
+                [float(np.max(lat)), float(np.max(lng))],
+            ],
+        }
+        with atomic_write(self.path / MANIFEST_NAME) as file:
+            json.dump(self.manifest, file, indent=2)
+
+        if old_path is not None and old_path != tiles_path:
+            shutil.rmtree(old_path, ignore_errors=True)
+
+        print(f"Saved heatmap of {len(lat)} points in {n_tiles} tiles to {self.path}")
+
+    def create_layer(self, opacity: float = 0.8) -> folium.TileLayer:
+        """
+        Create a map layer that shows the cached tiles
+        """
+        return folium.TileLayer(
+            tiles=f"{self.tiles_path.resolve().as_uri()}/{{z}}/{{x}}/{{y}}.png",
+            attr="Runs",
+            name="Heatmap",
+            overlay=True,
+            opacity=opacity,
+            max_native_zoom=MAX_ZOOM,
+            min_native_zoom=MIN_ZOOM,
+            bounds=self.manifest["bounds"],
+        )
+
+
+def find_heatmap(
+    area: str, archive: Optional[RunArchive] = None
+) -> Optional[HeatmapStore]:
+    """
+    Find the heatmap of all runs of an area, which is only rasterised again when the
+    archived run points changed since it was cached
+    :param area: Area (as used in the run archive) to find the heatmap of
+    :param archive: Archive to take the run points from, the default archive by default
+    :return: Heatmap of the area, or None if the area has no runs
+    """
+    archive = archive if archive is not None else RunArchive()
+
+    paths = archive.part_paths(area)
+    if not paths:
+        return None
+
+    heatmap = HeatmapStore(HEATMAP_PATH / area)
+    key = find_sources_key(paths)
+    if heatmap.manifest.get("key") != key:
+        points = archive.scan(area).select("lat", "lng").collect()
+
+        # Files of runs without points might be archived before they were skipped
+        if not len(points):
+            return None
+
+        heatmap.save(key, points["lat"].to_numpy(), points["lng"].to_numpy())
+
+    return heatmap
+
+
+def find_area(
+    graph: nx.MultiDiGraph, archive: Optional[RunArchive] = None
+) -> Optional[str]:
+    """
+    Find the area of the run archive with the most run points within the bounds of a graph
+    :param graph: Graph to find the area of
+    :param archive: Archive to take the run points from, the default archive by default
+    :return: Name of the area, or None if no runs lie within the graph
+    """
+    archive = archive if archive is not None else RunArchive()
+    if not graph.number_of_nodes():
+        return None
+
+    lats = [data["y"] for _, data in graph.nodes(data=True)]
+    lngs = [data["x"] for _, data in graph.nodes(data=True)]
+
+    counts = (
+        archive.scan()
+        .filter(
+            pl.col("lat").is_between(min(lats), max(lats))
+            & pl.col("lng").is_between(min(lngs), max(lngs))
+        )
+        .group_by("area")
+        .len()
+        .sort("len", "area", descending=[True, False])
+        .collect()
+    )
+
+    return counts["area"][0] if len(counts) else None
+
+
+def find_graph_heatmap(
+    graph: nx.MultiDiGraph, archive: Optional[RunArchive] = None
+) -> Optional[HeatmapStore]:
+    """
+    Find the heatmap of the runs of the area that a graph lies in
+    :return: Heatmap of the area, or None if no runs lie within the graph
+    """
+    archive = archive if archive is not None else RunArchive()
+    area = find_area(graph, archive)
+
+    return find_heatmap(area, archive) if area is not None else None
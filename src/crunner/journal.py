@@ -0,0 +1,128 @@
+import json
+from pathlib import Path
+from typing import Any, Iterable
+
+import networkx as nx
+import shapely
+
+from crunner.geometry import is_raw, to_linestring
+from crunner.graph import Edge, Node
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+
+def to_json(value: Any) -> Any:
+    # Geometries are replayed as WKT, which is materialised once needed
+    if is_raw(value):
+        value = to_linestring(value)
+    if isinstance(value, shapely.Geometry):
+        return value.wkt
+
+    return str(value)
+
+
+class Journal:
+    """
+    Append-only log of the changes made to a graph since it was last saved
+    Every entry holds the full state of a changed node or of all edges between two nodes,
+    such that replaying the journal onto the saved graph restores the edited graph
+    """
+
+    def __init__(self, path: Path):
+        self.path = path.with_suffix(JOURNAL_SUFFIX)
+        self.pending: list[dict] = []
+        self.n_entries: int | None = None
+
+    def __len__(self) -> int:
+        return self.__n_saved() + len(self.pending)
+
+    def __n_saved(self) -> int:
+        if self.n_entries is None:
+            self.n_entries = sum(1 for _ in self.__read())
+
+        return self.n_entries
+
+    def __read(self) -> Iterable[dict]:
+        if not self.path.exists():
+            return
+
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                # Skip a partially written entry (e.g. when crashing mid-write)
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def record(self, graph: nx.MultiDiGraph, nodes: set[Node], edges: set[Edge]):
+        # Record the current state of all nodes
+        for node in nodes:
+            data = dict(graph.nodes[node]) if graph.has_node(node) else None
+            self.pending.append({"node": node, "data": data})
+
+        # Record the current state of all edges between the nodes of the edges
+        pairs = {(src, dst) for src, dst, *_ in edges}
+        if graph.is_directed():
+            pairs |= {(dst, src) for src, dst in pairs}
+
+        for src, dst in pairs:
+            datas = graph.get_edge_data(src, dst) or {}
+            datas = {key: dict(data) for key, data in datas.items()}
+            self.pending.append({"src": src, "dst": dst, "edges": datas})
+
+    def flush(self) -> int:
+        if not self.pending:
+            return 0
+
+        n_saved = self.__n_saved()
+        n_pending = len(self.pending)
+        lines = "".join(
+            json.dumps(entry, default=to_json) + "\n" for entry in self.pending
+        )
+
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(lines)
+
+        self.n_entries = n_saved + n_pending
+        self.pending = []
+
+        return n_pending
+
+    def replay(self, graph: nx.MultiDiGraph) -> int:
+        n_entries = 0
+
+        for entry in self.__read():
+            n_entries += 1
+
+            if "node" in entry:
+                node, data = entry["node"], entry["data"]
+
+                if data is None:
+                    if graph.has_node(node):
+                        graph.remove_node(node)
+                elif graph.has_node(node):
+                    graph.nodes[node].clear()
+                    graph.nodes[node].update(data)
+                else:
+                    graph.add_node(node, **data)
+
+                continue
+
+            # Replace all edges between the nodes
+            src, dst = entry["src"], entry["dst"]
+            if graph.has_edge(src, dst):
+                keys = list(graph[src][dst].keys())
+                graph.remove_edges_from((src, dst, key) for key in keys)
+
+            for key, data in entry["edges"].items():
+                key = int(key) if key.isdigit() else key
+                graph.add_edge(src, dst, key=key, **data)
+
+        self.n_entries = n_entries
+        return n_entries
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+        self.pending = []
+        self.n_entries = 0
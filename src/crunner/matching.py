@@ -0,0 +1,406 @@
+import sys
+from typing import Optional
+
+import networkx as nx
+import numpy as np
+import shapely
+
+from crunner.clip import EdgeIndex
+from crunner.common import RUNS_PATH
+from crunner.geo import find_origin, project
+from crunner.gpx import read_gpx
+from crunner.gpx_index import GpxEntry, GpxIndex
+from crunner.graph import Edge
+from crunner.handler import Handler
+
+# Minimal distance (in meters) between the points of a run that are matched
+SAMPLE_SPACING = 10.0
+
+# Distance (in meters) within which edges are candidates for a point, and how many
+SEARCH_RADIUS = 30.0
+MAX_CANDIDATES = 8
+
+# Standard deviation of the GPS error and the scale of the route/straight line difference
+GPS_SIGMA = 7.0
+ROUTE_BETA = 5.0
+
+# Extra distance assumed when moving between edges that do not share a node
+JUMP_PENALTY = 50.0
+
+# Fraction of an edge that should be covered before it counts as completed
+COVERED_FRACTION = 0.9
+
+
+def sample_track(x: np.ndarray, y: np.ndarray, spacing: float) -> np.ndarray:
+    # Keep the first point and every point that is far enough from the last kept point
+    idxs = [0]
+    last_x, last_y = x[0], y[0]
+
+    for idx in range(1, len(x)):
+        if (x[idx] - last_x) ** 2 + (y[idx] - last_y) ** 2 >= spacing**2:
+            idxs.append(idx)
+            last_x, last_y = x[idx], y[idx]
+
+    # Keep the last point as well, such that the end of the run is matched
+    if idxs[-1] != len(x) - 1:
+        idxs.append(len(x) - 1)
+
+    return np.array(idxs)
+
+
+class MapMatcher:
+    """
+    Matches recorded runs onto the streets of a graph with a hidden Markov model
+    Candidate edges of every point are found with a spatial index, after which the most
+    likely sequence of edges is found with Viterbi, vectorised over the candidates
+    """
+
+    def __init__(self, graph: nx.MultiDiGraph):
+        self.graph = graph
+
+        # Streets are matched regardless of direction, so keep one edge per street
+        index = EdgeIndex(graph)
+        streets = [
+            idx
+            for idx, (src, dst, key) in enumerate(index.edges)
+            if src <= dst or not graph.has_edge(dst, src, key)
+        ]
+        self.edges: list[Edge] = [index.edges[idx] for idx in streets]
+
+        lats = [data["y"] for _, data in graph.nodes(data=True)]
+        lngs = [data["x"] for _, data in graph.nodes(data=True)]
+        self.origin = find_origin(np.array(lats), np.array(lngs))
+
+        self.geometries = shapely.transform(
+            index.geometries[streets], self.__project_coords
+        )
+        self.lengths = shapely.length(self.geometries)
+        self.srcs = np.array([src for src, _, _ in self.edges])
+        self.dsts = np.array([dst for _, dst, _ in self.edges])
+        self.tree = shapely.STRtree(self.geometries)
+
+        # Covered parts of the edges (edge, start, end), collected over all runs
+        self.intervals: list[np.ndarray] = []
+
+    def __project_coords(self, coords: np.ndarray) -> np.ndarray:
+        return np.column_stack(project(coords[:, 1], coords[:, 0], self.origin))
+
+    def __find_candidates(self, points: np.ndarray) -> tuple[np.ndarray, ...]:
+        point_idxs, edge_idxs = self.tree.query(
+            points, predicate="dwithin", distance=SEARCH_RADIUS
+        )
+        dists = shapely.distance(points[point_idxs], self.geometries[edge_idxs])
+
+        # Only keep the nearest candidates of every point
+        order = np.lexsort((dists, point_idxs))
+        point_idxs, edge_idxs, dists = point_idxs[order], edge_idxs[order], dists[order]
+
+        firsts = np.searchsorted(point_idxs, point_idxs)
+        is_near = np.arange(len(point_idxs)) - firsts < MAX_CANDIDATES
+        point_idxs, edge_idxs, dists = (
+            point_idxs[is_near],
+            edge_idxs[is_near],
+            dists[is_near],
+        )
+
+        positions = shapely.line_locate_point(
+            self.geometries[edge_idxs], points[point_idxs]
+        )
+        offsets = np.searchsorted(point_idxs, np.arange(len(points) + 1))
+
+        return offsets, edge_idxs, dists, positions
+
+    def __route_distances(
+        self,
+        edges_a: np.ndarray,
+        pos_a: np.ndarray,
+        edges_b: np.ndarray,
+        pos_b: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the distances over the streets between all pairs of candidates
+        :return: Distances, and through which end of both edges they run (-1 if none)
+        """
+        edges_a, pos_a = edges_a[:, None], pos_a[:, None]
+        edges_b, pos_b = edges_b[None, :], pos_b[None, :]
+        len_a, len_b = self.lengths[edges_a], self.lengths[edges_b]
+
+        # Moving from a via one of its ends to one of the ends of b
+        options = np.stack(
+            [
+                np.where(
+                    self.srcs[edges_a] == self.srcs[edges_b], pos_a + pos_b, np.inf
+                ),
+                np.where(
+                    self.srcs[edges_a] == self.dsts[edges_b],
+                    pos_a + len_b - pos_b,
+                    np.inf,
+                ),
+                np.where(
+                    self.dsts[edges_a] == self.srcs[edges_b],
+                    len_a - pos_a + pos_b,
+                    np.inf,
+                ),
+                np.where(
+                    self.dsts[edges_a] == self.dsts[edges_b],
+                    len_a - pos_a + len_b - pos_b,
+                    np.inf,
+                ),
+            ]
+        )
+        via = np.argmin(options, axis=0)
+        dists = np.min(options, axis=0)
+        via = np.where(np.isfinite(dists), via, -1)
+
+        # Moving along the same edge
+        is_same = edges_a == edges_b
+        dists = np.where(is_same, np.abs(pos_b - pos_a), dists)
+        via = np.where(is_same, -1, via)
+
+        return dists, via
+
+    def __cover(
+        self, edges: np.ndarray, positions: np.ndarray, steps: list[np.ndarray]
+    ):
+        # Parts of the same edge between consecutive points
+        prev_edges, next_edges = edges[:-1], edges[1:]
+        prev_pos, next_pos = positions[:-1], positions[1:]
+
+        is_same = prev_edges == next_edges
+        intervals = [
+            np.column_stack(
+                (
+                    prev_edges[is_same],
+                    np.minimum(prev_pos, next_pos)[is_same],
+                    np.maximum(prev_pos, next_pos)[is_same],
+                )
+            )
+        ]
+
+        # Parts of both edges up to the node that connects them
+        via = np.array(steps)
+        for end_a, end_b, code in ((0, 0, 0), (0, 1, 1), (1, 0, 2), (1, 1, 3)):
+            mask = ~is_same & (via == code)
+            len_a, len_b = (
+                self.lengths[prev_edges[mask]],
+                self.lengths[next_edges[mask]],
+            )
+
+            bounds_a = (
+                (np.zeros_like(len_a), prev_pos[mask])
+                if end_a == 0
+                else (prev_pos[mask], len_a)
+            )
+            bounds_b = (
+                (np.zeros_like(len_b), next_pos[mask])
+                if end_b == 0
+                else (next_pos[mask], len_b)
+            )
+            intervals.append(np.column_stack((prev_edges[mask], *bounds_a)))
+            intervals.append(np.column_stack((next_edges[mask], *bounds_b)))
+
+        self.intervals.extend(intervals)
+
+    def add_track(self, lat: np.ndarray, lng: np.ndarray) -> int:
+        """
+        Match a (segment of a) run onto the streets and register the parts it covered
+        :param lat: Latitudes of the run
+        :param lng: Longitudes of the run
+        :return: Number of points that were matched
+        """
+        if len(lat) < 2:
+            return 0
+
+        x, y = project(lat, lng, self.origin)
+        idxs = sample_track(x, y, SAMPLE_SPACING)
+        x, y = x[idxs], y[idxs]
+
+        points = shapely.points(x, y)
+        offsets, edge_idxs, dists, positions = self.__find_candidates(points)
+        emissions = -0.5 * (dists / GPS_SIGMA) ** 2
+        n_matched = 0
+
+        # Viterbi over chains of points that all have candidates
+        chain: list[tuple[int, int, int]] = []
+        backs: list[np.ndarray] = []
+        vias: list[np.ndarray] = []
+        scores = None
+
+        def finish_chain():
+            nonlocal n_matched
+            if not chain:
+                return
+
+            # Follow the most likely candidates back from the end of the chain
+            best = [int(np.argmax(scores))]
+            steps = []
+            for back, via in zip(reversed(backs), reversed(vias)):
+                steps.append(via[back[best[-1]], best[-1]])
+                best.append(int(back[best[-1]]))
+
+            best.reverse()
+            steps.reverse()
+
+            cands = np.array([start + idx for (start, _, _), idx in zip(chain, best)])
+            if len(cands) > 1:
+                self.__cover(edge_idxs[cands], positions[cands], steps)
+
+            n_matched += len(cands)
+
+        for point in range(len(points)):
+            start, end = offsets[point], offsets[point + 1]
+
+            if start == end:
+                finish_chain()
+                chain, backs, vias, scores = [], [], [], None
+                continue
+
+            if scores is None:
+                scores = emissions[start:end]
+                chain.append((start, end, point))
+                continue
+
+            prev_start, prev_end, prev_point = chain[-1]
+            straight = np.hypot(x[point] - x[prev_point], y[point] - y[prev_point])
+            routes, via = self.__route_distances(
+                edge_idxs[prev_start:prev_end],
+                positions[prev_start:prev_end],
+                edge_idxs[start:end],
+                positions[start:end],
+            )
+            routes = np.where(np.isfinite(routes), routes, straight + JUMP_PENALTY)
+
+            transitions = -np.abs(straight - routes) / ROUTE_BETA
+            totals = scores[:, None] + transitions
+
+            backs.append(np.argmax(totals, axis=0))
+            vias.append(via)
+            scores = totals.max(axis=0) + emissions[start:end]
+            chain.append((start, end, point))
+
+        finish_chain()
+
+        return n_matched
+
+    def coverage(self) -> dict[Edge, float]:
+        """
+        Find which fraction of the length of every street was covered by the matched runs
+        """
+        if not self.intervals:
+            return {}
+
+        intervals = np.concatenate(self.intervals)
+        edges = intervals[:, 0].astype(np.int64)
+
+        # Spread the edges apart, such that intervals of all edges are merged at once
+        spacing = self.lengths.max() + 1
+        starts = intervals[:, 1] + edges * spacing
+        ends = intervals[:, 2] + edges * spacing
+
+        order = np.argsort(starts)
+        starts, ends, edges = starts[order], ends[order], edges[order]
+
+        # A new block starts when an interval begins after all previous ones ended
+        reach = np.maximum.accumulate(ends)
+        is_new = np.r_[True, starts[1:] > reach[:-1]]
+
+        block_starts = starts[is_new]
+        block_ends = np.maximum.reduceat(ends, np.flatnonzero(is_new))
+        block_edges = edges[is_new]
+
+        covered = np.bincount(
+            block_edges,
+            weights=block_ends - block_starts,
+            minlength=len(self.edges),
+        )
+        fractions = np.clip(covered / np.maximum(self.lengths, 1e-9), 0.0, 1.0)
+
+        return {
+            self.edges[idx]: float(fractions[idx]) for idx in np.flatnonzero(fractions)
+        }
+
+
+def annotate_coverage(graph: nx.MultiDiGraph, coverage: dict[Edge, float]):
+    # Both directions of a street share its coverage
+    for src, dst, key, data in graph.edges(keys=True, data=True):
+        fraction = coverage.get((src, dst, key), coverage.get((dst, src, key), 0.0))
+
+        data["coverage"] = fraction
+        data["is_covered"] = fraction >= COVERED_FRACTION
+
+
+def find_runs(area: str) -> list[GpxEntry]:
+    # Only runs with points are of use
+    area_path = (RUNS_PATH / area).resolve()
+
+    return [
+        entry
+        for entry in GpxIndex.of(area_path).entries()
+        if entry.is_valid
+        and entry.bounds is not None
+        and entry.path.is_relative_to(area_path)
+    ]
+
+
+def load_run_graph(area: str, entries: list[GpxEntry]) -> nx.MultiDiGraph:
+    # Load the streets around all runs
+    bounds = np.array([entry.bounds for entry in entries])
+    min_lat, min_lng = bounds[:, :2].min(axis=0)
+    max_lat, max_lng = bounds[:, 2:].max(axis=0)
+
+    return Handler.load_from_tiles(area, (min_lng, min_lat, max_lng, max_lat))
+
+
+def match_runs(
+    area: str, graph: Optional[nx.MultiDiGraph] = None
+) -> tuple[nx.MultiDiGraph, dict[Edge, float]]:
+    """
+    Map-match all runs of an area onto its graph and mark the streets they covered
+    :param area: Name of the area (city), as used in the runs directory
+    :param graph: Graph to match onto, which is loaded around the runs by default
+    :return: Graph annotated with the coverage of its edges, and the coverage per street
+    """
+    entries = find_runs(area)
+    if not entries:
+        print(f"No runs found for {area}")
+        return graph, {}
+
+    if graph is None:
+        graph = load_run_graph(area, entries)
+
+    matcher = MapMatcher(graph)
+    n_points = 0
+
+    for entry in entries:
+        data = read_gpx(entry.path)
+        ends = [*data.starts[1:], len(data.lat)]
+
+        for start, end in zip(data.starts, ends):
+            n_points += matcher.add_track(data.lat[start:end], data.lng[start:end])
+
+    coverage = matcher.coverage()
+    annotate_coverage(graph, coverage)
+
+    n_covered = sum(fraction >= COVERED_FRACTION for fraction in coverage.values())
+    print(
+        f"Matched {n_points} points of {len(entries)} runs, "
+        f"covering {n_covered} of {len(matcher.edges)} streets in {area}"
+    )
+
+    return graph, coverage
+
+
+def main():
+    area = (
+        sys.argv[1]
+        if len(sys.argv) > 1
+        else input("Give the name of the area to match the runs of: ")
+    )
+    if not area:
+        return
+
+    match_runs(area)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+from crunner.gpx import offset_gpx
+from crunner.path import Paths
+
+# Offset (in meters) of the circuits, which keeps them apart from the roads on a map
+OFFSET_DISTANCE = 5.0
+
+
+def offset():
+    name = (
+        sys.argv[1]
+        if len(sys.argv) > 1
+        else input("Give the name of the circuit to offset: ")
+    )
+    if not name:
+        return
+
+    # Offset to the left of the direction of travel, unless the distance is negative
+    distance = float(sys.argv[2]) if len(sys.argv) > 2 else OFFSET_DISTANCE
+
+    for path in Paths.find(Path(name)):
+        if Paths.data_type(path) != "gpx":
+            continue
+
+        out_path = offset_gpx(path, distance)
+        print(f"\t- Offset {Paths.relative(path)} by {distance} m -> {out_path.name}")
+
+
+if __name__ == "__main__":
+    offset()
@@ -0,0 +1,80 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Below this number of files, starting worker processes takes longer than the work itself
+MIN_PARALLEL_FILES = 16
+
+
+def find_results(
+    func: Callable[[Path], T],
+    paths: list[Path],
+    n_workers: Optional[int],
+    n_ahead: Optional[int],
+    min_parallel: int,
+) -> Iterator[tuple[Path, Callable[[], T]]]:
+    if len(paths) < min_parallel or n_workers == 1:
+        yield from ((path, partial(func, path)) for path in paths)
+        return
+
+    n_workers = min(n_workers or os.cpu_count() or 1, len(paths))
+    n_ahead = max(n_ahead or 2 * n_workers, 1)
+
+    pool = ProcessPoolExecutor(n_workers)
+    futures = deque()
+    path_iter = iter(paths)
+
+    try:
+        for path in path_iter:
+            futures.append((path, pool.submit(func, path)))
+            if len(futures) >= n_ahead:
+                break
+
+        while futures:
+            path, future = futures.popleft()
+
+            # Keep the pool busy while the caller works on the current result
+            if (next_path := next(path_iter, None)) is not None:
+                futures.append((next_path, pool.submit(func, next_path)))
+
+            yield path, future.result
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def map_paths(
+    func: Callable[[Path], T],
+    paths: list[Path],
+    n_workers: Optional[int] = None,
+    n_ahead: Optional[int] = None,
+    min_parallel: int = MIN_PARALLEL_FILES,
+    skip_errors: bool = False,
+) -> Iterator[tuple[Path, T]]:
+    """
+    Apply a function to files, which is fanned out to worker processes for many files
+    Only a limited number of files is worked on ahead, such that the caller can already
+    use the first results while memory stays bounded
+    :param func: Function to apply, which should be defined at module level
+    :param paths: Paths of the files
+    :param n_workers: Number of worker processes, all CPUs by default
+    :param n_ahead: Number of files to work on ahead, twice the number of workers by default
+    :param min_parallel: Number of files from which worker processes are used
+    :param skip_errors: Whether to skip the files that the function fails on
+    :return: Every path together with its result, in the order of the paths
+    """
+    for path, result in find_results(func, paths, n_workers, n_ahead, min_parallel):
+        try:
+            value = result()
+        except Exception as err:
+            if not skip_errors:
+                raise
+
+            print(f"Could not process {path.name}: {err}")
+            continue
+
+        yield path, value
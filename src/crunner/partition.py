@@ -0,0 +1,228 @@
+import networkx as nx
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+from crunner.geo import project
+
+# Weight given to every node so that nodes without streets are still ordered
+EPS_WEIGHT = 1e-6
+
+
+class Partitioner:
+    """
+    Splits a graph into contiguous parts of roughly equal street length
+    The parts are found by recursively bisecting the graph along its geographic main axis,
+    after which the cut is refined by moving boundary nodes and fragments are merged back
+    """
+
+    def __init__(
+        self, graph: nx.MultiGraph, max_imbalance: float = 0.05, n_passes: int = 10
+    ):
+        self.graph = graph
+        self.max_imbalance = max_imbalance
+        self.n_passes = n_passes
+
+        self.nodes = list(graph.nodes)
+        self.index = {node: idx for idx, node in enumerate(self.nodes)}
+        self.n_nodes = len(self.nodes)
+
+        self.__index_coords()
+        self.__index_streets()
+
+    def __index_coords(self):
+        lat = np.array(
+            [data.get("y", np.nan) for _, data in self.graph.nodes(data=True)]
+        )
+        lng = np.array(
+            [data.get("x", np.nan) for _, data in self.graph.nodes(data=True)]
+        )
+
+        # Place nodes without a location in the center of the graph
+        lat[np.isnan(lat)] = np.nanmean(lat)
+        lng[np.isnan(lng)] = np.nanmean(lng)
+
+        self.xy = np.column_stack(project(lat, lng))
+
+    def __index_streets(self):
+        # Both directions of a street are the same street, so only count it once
+        streets: dict[tuple[int, int, int], float] = {}
+
+        for src, dst, key, data in self.graph.edges(keys=True, data=True):
+            i, j = sorted((self.index[src], self.index[dst]))
+            dist = 0.0 if data.get("is_removed", False) else data.get("distance", 0.0)
+
+            streets[(i, j, key)] = max(streets.get((i, j, key), 0.0), float(dist))
+
+        self.streets = streets
+        ids = np.array(list(streets.keys()), dtype=np.int64).reshape(-1, 3)
+        self.src = ids[:, 0]
+        self.dst = ids[:, 1]
+        self.weights = np.fromiter(
+            streets.values(), dtype=np.float64, count=len(streets)
+        )
+
+        # Every street contributes half its length to both of its end points
+        self.node_weights = (
+            np.bincount(self.src, self.weights / 2, minlength=self.n_nodes)
+            + np.bincount(self.dst, self.weights / 2, minlength=self.n_nodes)
+            + EPS_WEIGHT
+        )
+
+        # Adjacency without self loops for refining the partition
+        mask = self.src != self.dst
+        self.adj_src = np.concatenate([self.src[mask], self.dst[mask]])
+        self.adj_dst = np.concatenate([self.dst[mask], self.src[mask]])
+
+        adj = csr_matrix(
+            (np.ones(len(self.adj_src)), (self.adj_src, self.adj_dst)),
+            shape=(self.n_nodes, self.n_nodes),
+        )
+        self.indptr = adj.indptr
+        self.indices = adj.indices
+
+    def partition(self, n_parts: int) -> np.ndarray:
+        parts = np.zeros(self.n_nodes, dtype=np.int64)
+        if n_parts <= 1 or self.n_nodes == 0:
+            return parts
+
+        self.__bisect(np.arange(self.n_nodes), n_parts, 0, parts)
+
+        for _ in range(self.n_passes):
+            if not self.__refine(parts, n_parts):
+                break
+
+        self.__merge_fragments(parts, n_parts)
+
+        return parts
+
+    def __bisect(self, idxs: np.ndarray, n_parts: int, first: int, parts: np.ndarray):
+        if n_parts == 1 or len(idxs) <= 1:
+            parts[idxs] = first
+            return
+
+        # Find the main axis of the (weighted) node locations
+        xy = self.xy[idxs]
+        weights = self.node_weights[idxs]
+        center = np.average(xy, axis=0, weights=weights)
+
+        cov = np.cov((xy - center).T, aweights=weights)
+        _, vectors = np.linalg.eigh(np.atleast_2d(cov))
+        axis = vectors[:, -1]
+
+        # Split the nodes along the axis such that both halves get their share of street length
+        n_first = n_parts // 2
+        order = np.argsort((xy - center) @ axis, kind="stable")
+        cum_weights = np.cumsum(weights[order])
+        split = np.searchsorted(cum_weights, cum_weights[-1] * n_first / n_parts)
+        split = min(max(int(split) + 1, 1), len(idxs) - 1)
+
+        self.__bisect(idxs[order[:split]], n_first, first, parts)
+        self.__bisect(idxs[order[split:]], n_parts - n_first, first + n_first, parts)
+
+    def __refine(self, parts: np.ndarray, n_parts: int) -> bool:
+        part_weights = np.bincount(parts, self.node_weights, minlength=n_parts)
+        target = part_weights.sum() / n_parts
+        max_weight = (1 + self.max_imbalance) * target
+        min_weight = (1 - self.max_imbalance) * target
+
+        # Count how many streets connect every node to every part
+        conn = np.zeros((self.n_nodes, n_parts))
+        np.add.at(conn, (self.adj_src, parts[self.adj_dst]), 1)
+
+        own = conn[np.arange(self.n_nodes), parts]
+        conn[np.arange(self.n_nodes), parts] = -1
+        targets = np.argmax(conn, axis=1)
+        gains = conn[np.arange(self.n_nodes), targets] - own
+
+        # Move nodes that reduce the number of cut streets, best ones first
+        candidates = np.flatnonzero(gains > 0)
+        candidates = candidates[np.argsort(-gains[candidates], kind="stable")]
+
+        locked = np.zeros(self.n_nodes, dtype=bool)
+        n_moved = 0
+
+        for node in candidates:
+            if locked[node]:
+                continue
+
+            src_part, dst_part = parts[node], targets[node]
+            weight = self.node_weights[node]
+
+            if part_weights[dst_part] + weight > max_weight:
+                continue
+            if part_weights[src_part] - weight < min_weight:
+                continue
+
+            parts[node] = dst_part
+            part_weights[src_part] -= weight
+            part_weights[dst_part] += weight
+            n_moved += 1
+
+            # Gains of the neighbors are outdated now, so wait for the next pass
+            locked[self.indices[self.indptr[node] : self.indptr[node + 1]]] = True
+
+        return n_moved > 0
+
+    def __merge_fragments(self, parts: np.ndarray, n_parts: int, max_iters: int = 10):
+        for _ in range(max_iters):
+            # Find the connected pieces that every part consists of
+            same = parts[self.adj_src] == parts[self.adj_dst]
+            adj = coo_matrix(
+                (np.ones(same.sum()), (self.adj_src[same], self.adj_dst[same])),
+                shape=(self.n_nodes, self.n_nodes),
+            )
+            n_comps, labels = connected_components(adj, directed=False)
+
+            comp_parts = np.zeros(n_comps, dtype=np.int64)
+            comp_parts[labels] = parts
+            comp_weights = np.bincount(labels, self.node_weights, minlength=n_comps)
+
+            # Keep the heaviest piece of every part, the others are fragments
+            order = np.lexsort((-comp_weights, comp_parts))
+            is_main = np.zeros(n_comps, dtype=bool)
+            is_main[order[np.r_[True, np.diff(comp_parts[order]) != 0]]] = True
+
+            # Count how many streets connect every fragment to every other part
+            cut = ~same
+            conn = np.zeros((n_comps, n_parts))
+            np.add.at(conn, (labels[self.adj_src[cut]], parts[self.adj_dst[cut]]), 1)
+
+            fragments = np.flatnonzero(~is_main & (conn.sum(axis=1) > 0))
+            if len(fragments) == 0:
+                return
+
+            # Give every fragment to the part it is best connected to
+            new_parts = comp_parts.copy()
+            new_parts[fragments] = np.argmax(conn[fragments], axis=1)
+            parts[:] = new_parts[labels]
+
+
+def find_partitions(
+    graph: nx.MultiDiGraph, n_parts: int, max_imbalance: float = 0.05
+) -> list[nx.MultiDiGraph]:
+    partitioner = Partitioner(graph, max_imbalance)
+    parts = partitioner.partition(n_parts)
+
+    # Assign every street to a single part, cut streets go to the lightest side
+    part_dists = np.zeros(n_parts)
+    street_parts: dict[tuple[int, int, int], int] = {}
+
+    for (i, j, key), dist in partitioner.streets.items():
+        part = parts[i] if part_dists[parts[i]] <= part_dists[parts[j]] else parts[j]
+
+        street_parts[(i, j, key)] = part
+        part_dists[part] += dist
+
+    part_edges = [[] for _ in range(n_parts)]
+
+    for src, dst, key in graph.edges(keys=True):
+        i, j = sorted((partitioner.index[src], partitioner.index[dst]))
+        part_edges[street_parts[(i, j, key)]].append((src, dst, key))
+
+    partitions = []
+    for n, edges in enumerate(part_edges, start=1):
+        print(f"Partition {n} has distance of {round(part_dists[n - 1])}m")
+        partitions.append(graph.edge_subgraph(edges).copy())
+
+    return partitions
@@ -23,6 +23,9 @@ class Paths:
 
     __ROOT = Path(__file__).parent.parent.parent.parent
 
+    # Data types that are not searched for paths
+    SKIPPED_TYPES = ["archive", "excel", "heatmap", "osm", "html", "streets"]
+
     @classmethod
     def root(cls) -> Path:
         return cls.__ROOT
@@ -61,7 +64,7 @@ class Paths:
             base = cls.relative(path)
             typ, area = base.parts[:2]
 
-            if typ in ["excel", "osm", "html", "streets"] or area.startswith("Temp"):
+            if typ in cls.SKIPPED_TYPES or area.startswith("Temp"):
                 continue
 
             if (
@@ -138,6 +138,7 @@ class Plotter:
         circuit: Circuit,
         path: Path,
         stats: Optional[dict[str, Any]] = None,
+        simplify_tolerance: Optional[float] = None,
     ):
         if len(circuit) == 0:
             return
@@ -190,4 +191,4 @@ class Plotter:
                 json.dump(stats, file, indent=4)
 
         # Create and save the GPX data
-        to_gpx(circuit, graph, path, stats, edges)
+        to_gpx(circuit, graph, path, stats, edges, simplify_tolerance)
@@ -0,0 +1,197 @@
+import networkx as nx
+import numpy as np
+import shapely
+from attrs import Factory, define
+
+from crunner.clip import EdgeIndex
+from crunner.graph import Edge, Node
+
+# Distance (in degrees, about 2 m) within which elements of both graphs are matched
+MATCH_TOLERANCE = 2e-5
+
+# Flags that are set by hand and carried over to the new graph
+EDIT_FLAGS = ("is_removed", "is_highlighted")
+
+
+@define
+class Reconciliation:
+    """
+    Result of carrying the edits of an old version of a graph over to a new version
+    """
+
+    nodes: dict[Node, Node] = Factory(dict)
+    edges: dict[Edge, list[Edge]] = Factory(dict)
+    added_edges: list[Edge] = Factory(list)
+    unmatched_nodes: set[Node] = Factory(set)
+    unmatched_edges: set[Edge] = Factory(set)
+
+
+def has_edits(data: dict) -> bool:
+    return any(data.get(flag, False) for flag in EDIT_FLAGS)
+
+
+def match_nodes(
+    old: nx.MultiDiGraph, new: nx.MultiDiGraph, tolerance: float = MATCH_TOLERANCE
+) -> dict[Node, Node]:
+    """
+    Match every node of the old graph to the nearest node of the new graph
+    :return: Matched node in the new graph for every old node that has one within tolerance
+    """
+    old_nodes, new_nodes = list(old.nodes), list(new.nodes)
+    if not old_nodes or not new_nodes:
+        return {}
+
+    def to_points(graph: nx.MultiDiGraph, nodes: list[Node]) -> np.ndarray:
+        return shapely.points(
+            [(graph.nodes[node]["x"], graph.nodes[node]["y"]) for node in nodes]
+        )
+
+    tree = shapely.STRtree(to_points(new, new_nodes))
+    old_idxs, new_idxs = tree.query_nearest(
+        to_points(old, old_nodes), max_distance=tolerance, all_matches=False
+    )
+
+    return {
+        old_nodes[old_idx]: new_nodes[new_idx]
+        for old_idx, new_idx in zip(old_idxs, new_idxs)
+    }
+
+
+def match_edges(
+    old_index: EdgeIndex, new_index: EdgeIndex, tolerance: float = MATCH_TOLERANCE
+) -> dict[Edge, list[Edge]]:
+    """
+    Match the edges of the old graph to edges of the new graph by their geometry
+    Edges are first matched one on one, after which the remaining old edges are matched to
+    the new edges that lie along them (e.g. when a new crossing split an edge in two)
+    :return: Matched edges in the new graph for every old edge that has any
+    """
+    old_geoms, new_geoms = old_index.geometries, new_index.geometries
+    if not len(old_geoms) or not len(new_geoms):
+        return {}
+
+    old_starts = shapely.get_point(old_geoms, 0)
+    new_starts = shapely.get_point(new_geoms, 0)
+
+    # Score candidates on their shape and direction, the best one within tolerance wins
+    old_idxs, new_idxs = new_index.tree.query(
+        old_geoms, predicate="dwithin", distance=tolerance
+    )
+    scores = shapely.hausdorff_distance(
+        old_geoms[old_idxs], new_geoms[new_idxs]
+    ) + shapely.distance(old_starts[old_idxs], new_starts[new_idxs])
+
+    matches: dict[Edge, list[Edge]] = {}
+    matched_new = set()
+
+    for idx in np.lexsort((scores, old_idxs)):
+        old_idx, new_idx = old_idxs[idx], new_idxs[idx]
+        edge = old_index.edges[old_idx]
+
+        if edge in matches or new_idx in matched_new or scores[idx] > 2 * tolerance:
+            continue
+
+        matches[edge] = [new_index.edges[new_idx]]
+        matched_new.add(new_idx)
+
+    # Match the remaining edges to the pieces they were split into
+    remaining = np.array(
+        [idx for idx, edge in enumerate(old_index.edges) if edge not in matches],
+        dtype=int,
+    )
+    if not len(remaining):
+        return matches
+
+    areas = shapely.buffer(old_geoms[remaining], tolerance)
+    area_idxs, new_idxs = new_index.tree.query(areas, predicate="contains")
+
+    old_idxs = remaining[area_idxs]
+    new_ends = shapely.get_point(new_geoms[new_idxs], -1)
+    is_forward = shapely.line_locate_point(
+        old_geoms[old_idxs], new_starts[new_idxs]
+    ) < shapely.line_locate_point(old_geoms[old_idxs], new_ends)
+
+    for old_idx, new_idx, forward in zip(old_idxs, new_idxs, is_forward):
+        if not forward or new_idx in matched_new:
+            continue
+
+        edge = old_index.edges[old_idx]
+        matches.setdefault(edge, []).append(new_index.edges[new_idx])
+
+    return matches
+
+
+def reconcile_edits(
+    old: nx.MultiDiGraph, new: nx.MultiDiGraph, tolerance: float = MATCH_TOLERANCE
+) -> Reconciliation:
+    """
+    Carry the manual edits of an old version of a graph over to a newly downloaded version
+    The graphs are matched spatially, as node ids generally differ between downloads:
+    - removed/highlighted flags of matched nodes and edges are copied
+    - self-created edges are added between the matched nodes (or copies of their nodes)
+    :param old: Graph with the edits
+    :param new: Newly downloaded graph, which is edited in place
+    :param tolerance: Distance (in degrees) within which elements are matched
+    :return: Matched and unmatched elements
+    """
+    result = Reconciliation()
+    result.nodes = match_nodes(old, new, tolerance)
+
+    # Self-created edges are not part of OpenStreetMap, so they are never matched
+    created = [
+        (src, dst, key, data)
+        for src, dst, key, data in old.edges(keys=True, data=True)
+        if data.get("self_created", False)
+    ]
+    osm = old.copy()
+    osm.remove_edges_from((src, dst, key) for src, dst, key, _ in created)
+    result.edges = match_edges(EdgeIndex(osm), EdgeIndex(new), tolerance)
+
+    # Copy the flags of the matched elements
+    for node, data in old.nodes(data=True):
+        if node not in result.nodes:
+            result.unmatched_nodes.add(node)
+            continue
+
+        new_data = new.nodes[result.nodes[node]]
+        new_data.update({flag: data[flag] for flag in EDIT_FLAGS if flag in data})
+
+    for src, dst, key, data in osm.edges(keys=True, data=True):
+        if (src, dst, key) not in result.edges:
+            result.unmatched_edges.add((src, dst, key))
+            continue
+
+        for new_edge in result.edges[src, dst, key]:
+            new_data = new.edges[new_edge]
+            for flag in EDIT_FLAGS:
+                new_data[flag] = data.get(flag, False)
+
+    # Add the self-created edges, copying their nodes when these were not matched
+    next_id = max(new.nodes, default=-1) + 1
+
+    for src, dst, key, data in created:
+        for node in (src, dst):
+            if node in result.nodes:
+                continue
+
+            new.add_node(next_id, **old.nodes[node])
+            result.nodes[node] = next_id
+            result.unmatched_nodes.discard(node)
+            next_id += 1
+
+        new_key = new.add_edge(result.nodes[src], result.nodes[dst], **data)
+        result.added_edges.append((result.nodes[src], result.nodes[dst], new_key))
+
+    # Report the edits that could not be carried over
+    lost_edges = [edge for edge in result.unmatched_edges if has_edits(old.edges[edge])]
+    lost_nodes = [node for node in result.unmatched_nodes if has_edits(old.nodes[node])]
+
+    print(
+        f"Matched {len(result.edges)} of {osm.number_of_edges()} edges, "
+        f"added {len(result.added_edges)} self-created edges"
+    )
+    if lost_edges or lost_nodes:
+        print(f"Could not match {len(lost_edges)} edited edges: {sorted(lost_edges)}")
+        print(f"Could not match {len(lost_nodes)} edited nodes: {sorted(lost_nodes)}")
+
+    return result
@@ -9,7 +9,9 @@ from crunner.handler import Handler
 handler = Handler()
 
 
-def compare_streets(path: Optional[Path] = None, debug: bool = False):
+def compare_streets(
+    path: Optional[Path] = None, debug: bool = False, source: str = "city_strides"
+):
     if path and len(path.parents) == 0:
         return
 
@@ -29,7 +31,8 @@ def compare_streets(path: Optional[Path] = None, debug: bool = False):
     with open(STREET_PATH / path.with_suffix(".json"), "r", encoding="utf-8") as file:
         streets_ox = set(json.load(file))
 
-    STRIDES_PATH = STREET_PATH / city / "city_strides"
+    # Compare with the scraped CityStrides lists or the locally computed ones
+    STRIDES_PATH = STREET_PATH / city / source
     with open(STRIDES_PATH / "all.json", "r", encoding="utf-8") as file:
         streets_strides = set(json.load(file))
     with open(STRIDES_PATH / "todo.json", "r", encoding="utf-8") as file:
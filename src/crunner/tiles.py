@@ -0,0 +1,186 @@
+import json
+from collections import defaultdict
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+import shapely
+
+from crunner.columnar import columnar_paths, load_columnar, save_columnar
+from crunner.geometry import to_coords
+from crunner.util import atomic_write
+
+# Size of a tile in degrees, which is roughly 1.1 x 0.7 km in the Netherlands
+TILE_SIZE = 0.01
+
+TILES_DIR = "_tiles"
+MANIFEST_NAME = "manifest.json"
+
+Tile = tuple[int, int]
+
+
+def tile_name(tile: Tile) -> str:
+    return f"{tile[0]}_{tile[1]}"
+
+
+class TileStore:
+    """
+    Stores a graph as fixed lat/lng tiles, such that only the tiles of an area are loaded
+    Every node belongs to the tile it lies in and every edge to the tile of its source node
+    Edges that leave their tile keep a (ghost) copy of their target node, which is merged
+    with the original node when its own tile is loaded as well
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.manifest = self.__read_manifest()
+
+    def __read_manifest(self) -> dict:
+        manifest_path = self.path / MANIFEST_NAME
+        if not manifest_path.exists():
+            return {}
+
+        with open(manifest_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def exists(self) -> bool:
+        return bool(self.manifest)
+
+    @property
+    def graph(self) -> dict:
+        return self.manifest.get("graph", {})
+
+    def __tile_path(self, name: str) -> Path:
+        return self.path / f"{name}.graphml"
+
+    def save(
+        self,
+        graph: nx.MultiDiGraph,
+        tile_size: float = TILE_SIZE,
+        micro_degrees: bool = True,
+    ):
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        # Find the tile of every node
+        nodes = list(graph.nodes)
+        xs = np.array([graph.nodes[node].get("x", 0.0) for node in nodes], dtype=float)
+        ys = np.array([graph.nodes[node].get("y", 0.0) for node in nodes], dtype=float)
+        tile_xs = np.floor(xs / tile_size).astype(np.int64)
+        tile_ys = np.floor(ys / tile_size).astype(np.int64)
+
+        node_tiles: dict[int, Tile] = dict(zip(nodes, zip(tile_xs, tile_ys)))
+        tile_nodes: dict[Tile, list] = defaultdict(list)
+        tile_edges: dict[Tile, list] = defaultdict(list)
+
+        for node, tile in node_tiles.items():
+            tile_nodes[tile].append(node)
+        for src, dst, key in graph.edges(keys=True):
+            tile_edges[node_tiles[src]].append((src, dst, key))
+
+        # Remove the tiles of a previous version that are no longer used
+        for name in self.manifest.get("tiles", {}):
+            for path in columnar_paths(self.__tile_path(name)):
+                path.unlink(missing_ok=True)
+
+        tiles = {}
+        for tile, tile_node_list in tile_nodes.items():
+            edges = tile_edges[tile]
+            ghosts = {dst for _, dst, _ in edges if node_tiles[dst] != tile}
+
+            subgraph = graph.__class__()
+            subgraph.add_nodes_from(
+                (node, graph.nodes[node]) for node in tile_node_list
+            )
+            subgraph.add_nodes_from(
+                (node, {**graph.nodes[node], "is_ghost": True}) for node in ghosts
+            )
+            subgraph.add_edges_from(
+                (src, dst, key, graph.edges[src, dst, key]) for src, dst, key in edges
+            )
+
+            name = tile_name(tile)
+            save_columnar(subgraph, self.__tile_path(name), micro_degrees)
+
+            tiles[name] = {
+                "bounds": self.__find_bounds(subgraph),
+                "n_nodes": len(tile_node_list),
+                "n_edges": len(edges),
+            }
+
+        self.manifest = {
+            "tile_size": tile_size,
+            "micro_degrees": micro_degrees,
+            "graph": {attr: str(value) for attr, value in graph.graph.items()},
+            "tiles": tiles,
+        }
+        with atomic_write(self.path / MANIFEST_NAME) as file:
+            json.dump(self.manifest, file, indent=2)
+
+        print(f"Saved graph in {len(tiles)} tiles to {self.path}")
+
+    def __find_bounds(self, graph: nx.MultiDiGraph) -> list[float]:
+        # Edges might leave their tile, so take their geometries into account as well
+        coords = [
+            np.array(
+                [
+                    (data.get("x", 0.0), data.get("y", 0.0))
+                    for _, data in graph.nodes(data=True)
+                ]
+            ).reshape(-1, 2)
+        ]
+        for *_, data in graph.edges(data=True):
+            if (edge_coords := to_coords(data.get("geometry"))) is not None:
+                coords.append(edge_coords)
+
+        coords = np.concatenate(coords)
+        return [*coords.min(axis=0).tolist(), *coords.max(axis=0).tolist()]
+
+    def find_tiles(self, area: shapely.Geometry | None = None) -> list[str]:
+        """
+        Find the tiles that (might) contain part of the graph within an area
+        :param area: Polygon or bounding box to find the tiles for, or None for all tiles
+        :return: Names of the found tiles
+        """
+        tiles = self.manifest.get("tiles", {})
+        if area is None:
+            return list(tiles)
+
+        names = list(tiles)
+        boxes = shapely.box(*np.array([tiles[name]["bounds"] for name in names]).T)
+
+        return [
+            name for name, hit in zip(names, shapely.intersects(boxes, area)) if hit
+        ]
+
+    def load(
+        self, area: shapely.Geometry | tuple[float, float, float, float] | None = None
+    ) -> nx.MultiDiGraph:
+        """
+        Load the part of the graph that lies within an area by stitching its tiles together
+        :param area: Polygon or bounding box (min x, min y, max x, max y) to load
+        :return: Graph with all nodes and edges from the tiles that intersect the area
+        """
+        if isinstance(area, tuple):
+            area = shapely.box(*area)
+
+        names = self.find_tiles(area)
+        graph = None
+
+        for name in names:
+            tile = load_columnar(self.__tile_path(name))
+            if graph is None:
+                graph = tile.__class__()
+                graph.graph.update(self.graph)
+
+            # Ghost nodes only fill in for nodes of tiles that are not loaded (yet)
+            for node, data in tile.nodes(data=True):
+                if data.pop("is_ghost", False) and node in graph:
+                    continue
+
+                graph.add_node(node, **data)
+
+            graph.add_edges_from(tile.edges(keys=True, data=True))
+
+        print(f"Loaded {len(names)} of {len(self.manifest.get('tiles', {}))} tiles")
+
+        return graph if graph is not None else nx.MultiDiGraph()
@@ -1,3 +1,6 @@
+import os
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
 
 
@@ -19,3 +22,26 @@ def ends_with(path: Path, suffix: Path) -> bool:
     return (
         not suffix.suffixes and path.stem == suffix.stem
     ) or path.suffixes == suffix.suffixes
+
+
+@contextmanager
+def atomic_write(path: Path, mode: str = "w", encoding: str | None = "utf-8"):
+    """
+    Write to a temporary file next to the given path and replace the path when done,
+    such that the path never contains a partially written file
+    :param path: Path to write to
+    :param mode: Mode to open the temporary file with
+    :param encoding: Encoding of the file (only for text modes)
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    tmp_path = Path(tmp_name)
+
+    try:
+        with open(fd, mode, encoding=None if "b" in mode else encoding) as file:
+            yield file
+
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
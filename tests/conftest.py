@@ -0,0 +1,59 @@
+from typing import Callable
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from crunner.geo import haversine
+
+# Distance (in degrees) between neighbouring nodes of a grid, which is roughly 100 m
+SPACING = 0.001
+
+ORIGIN = (51.9, 4.4)  # lat, lng
+
+
+def build_grid(
+    n_rows: int, n_cols: int, directed: bool = True, spacing: float = SPACING
+) -> nx.MultiDiGraph:
+    """
+    Build a grid of streets, with a row street and a column street through every node
+    Nodes are numbered row by row and every street runs both ways in a directed grid
+    """
+    graph = nx.MultiDiGraph() if directed else nx.MultiGraph()
+    lat0, lng0 = ORIGIN
+
+    for row in range(n_rows):
+        for col in range(n_cols):
+            graph.add_node(
+                row * n_cols + col, x=lng0 + col * spacing, y=lat0 + row * spacing
+            )
+
+    def add_street(src: int, dst: int, name: str):
+        lat = np.array([graph.nodes[node]["y"] for node in (src, dst)])
+        lng = np.array([graph.nodes[node]["x"] for node in (src, dst)])
+        dist = float(haversine(lat[0], lng[0], lat[1], lng[1]))
+
+        data = {"name": name, "highway": "residential", "distance": dist}
+        graph.add_edge(src, dst, **data)
+        if directed:
+            graph.add_edge(dst, src, **data)
+
+    for row in range(n_rows):
+        for col in range(n_cols):
+            node = row * n_cols + col
+            if col + 1 < n_cols:
+                add_street(node, node + 1, f"Row {row}")
+            if row + 1 < n_rows:
+                add_street(node, node + n_cols, f"Col {col}")
+
+    return graph
+
+
+@pytest.fixture
+def make_grid() -> Callable[..., nx.MultiDiGraph]:
+    return build_grid
+
+
+@pytest.fixture
+def grid() -> nx.MultiDiGraph:
+    return build_grid(6, 8)
@@ -0,0 +1,30 @@
+import pytest
+import shapely
+
+from crunner.clip import clip_graph
+
+
+def test_clip_keeps_edges_within(grid):
+    # Nodes of the first 3 rows and 4 columns lie within the polygon
+    polygon = shapely.box(4.3995, 51.8995, 4.4035, 51.9025)
+    clipped = clip_graph(grid, polygon)
+
+    kept = {node for node in clipped.nodes if not clipped.nodes[node].get("is_cut")}
+    assert kept == {row * 8 + col for row in range(3) for col in range(4)}
+    assert clipped.edges[0, 1, 0] == grid.edges[0, 1, 0]
+
+
+def test_clip_scales_cut_edges(grid):
+    # The polygon ends halfway the edges between the first two columns
+    polygon = shapely.box(4.3995, 51.8995, 4.4005, 51.9055)
+    clipped = clip_graph(grid, polygon)
+
+    cut_nodes = [node for node, data in clipped.nodes(data=True) if data.get("is_cut")]
+    assert len(cut_nodes) == 6
+
+    for node in cut_nodes:
+        (src, _, data), *_ = clipped.in_edges(node, data=True)
+        original = grid.edges[src, src + 1, 0]
+
+        assert data["distance"] == pytest.approx(original["distance"] / 2, rel=1e-6)
+        assert data["name"] == original["name"]
@@ -0,0 +1,108 @@
+import os
+
+import networkx as nx
+import pytest
+from shapely import LineString
+
+from crunner.columnar import has_columnar, load_columnar, save_columnar
+from crunner.geometry import PackedCoords, to_linestring
+
+
+def add_geometries(graph: nx.MultiDiGraph) -> nx.MultiDiGraph:
+    # Bend every edge a little, so that the geometry is more than its end points
+    for src, dst, data in graph.edges(data=True):
+        (x0, y0), (x1, y1) = (
+            (graph.nodes[node]["x"], graph.nodes[node]["y"]) for node in (src, dst)
+        )
+        middle = ((x0 + x1) / 2 + 0.0001, (y0 + y1) / 2 + 0.0001)
+        data["geometry"] = LineString([(x0, y0), middle, (x1, y1)])
+
+    return graph
+
+
+@pytest.fixture
+def graph(grid):
+    grid.graph.update({"crs": "epsg:4326", "simplified": True})
+    grid.nodes[0]["is_removed"] = True
+    grid.edges[0, 1, 0]["name"] = ["Row 0", "Coolsingel"]
+    grid.edges[1, 0, 0]["is_highlighted"] = True
+
+    return add_geometries(grid)
+
+
+def test_round_trip(graph, tmp_path):
+    path = tmp_path / "graph.graphml"
+    save_columnar(graph, path)
+    loaded = load_columnar(path)
+
+    assert loaded.is_directed()
+    assert loaded.graph == graph.graph
+    assert dict(loaded.nodes(data=True)) == dict(graph.nodes(data=True))
+    assert sorted(loaded.edges(keys=True)) == sorted(graph.edges(keys=True))
+
+    for src, dst, key, data in graph.edges(keys=True, data=True):
+        loaded_data = dict(loaded.edges[src, dst, key])
+        geometry = loaded_data.pop("geometry")
+
+        assert loaded_data == {
+            attr: value for attr, value in data.items() if attr != "geometry"
+        }
+        assert to_linestring(geometry).equals(data["geometry"])
+
+
+def test_round_trip_keeps_types(graph, tmp_path):
+    path = tmp_path / "graph.graphml"
+    save_columnar(graph, path)
+    loaded = load_columnar(path)
+
+    assert loaded.nodes[0]["is_removed"] is True
+    assert "is_removed" not in loaded.nodes[1]
+    assert loaded.edges[0, 1, 0]["name"] == ["Row 0", "Coolsingel"]
+    assert loaded.edges[0, 8, 0]["name"] == "Col 0"
+    assert isinstance(loaded.edges[0, 8, 0]["distance"], float)
+
+
+def test_geometries_stay_binary(graph, tmp_path):
+    path = tmp_path / "graph.graphml"
+    save_columnar(graph, path)
+
+    assert isinstance(load_columnar(path).edges[0, 1, 0]["geometry"], bytes)
+
+
+def test_round_trip_undirected(make_grid, tmp_path):
+    graph = make_grid(3, 3, directed=False)
+    path = tmp_path / "graph.graphml"
+    save_columnar(graph, path)
+    loaded = load_columnar(path)
+
+    assert not loaded.is_directed()
+    assert loaded.number_of_edges() == graph.number_of_edges()
+
+
+def test_has_columnar_only_when_newer(graph, tmp_path):
+    path = tmp_path / "graph.graphml"
+    assert not has_columnar(path)
+
+    save_columnar(graph, path)
+    assert has_columnar(path)
+
+    # A GraphML file that was saved afterwards takes precedence
+    path.touch()
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 10))
+    assert not has_columnar(path)
+
+
+def test_round_trip_micro_degrees(graph, tmp_path):
+    path = tmp_path / "graph.graphml"
+    save_columnar(graph, path, micro_degrees=True)
+    loaded = load_columnar(path)
+
+    for node, data in graph.nodes(data=True):
+        assert loaded.nodes[node]["x"] == pytest.approx(data["x"], abs=1e-6)
+        assert loaded.nodes[node]["y"] == pytest.approx(data["y"], abs=1e-6)
+
+    for src, dst, key, data in graph.edges(keys=True, data=True):
+        geometry = loaded.edges[src, dst, key]["geometry"]
+
+        assert isinstance(geometry, PackedCoords)
+        assert to_linestring(geometry).equals_exact(data["geometry"], 1e-6)
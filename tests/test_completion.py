@@ -0,0 +1,83 @@
+import json
+
+import numpy as np
+from attrs import define
+
+import crunner.completion
+from crunner.completion import complete_streets, find_completion, group_street_nodes
+
+
+def run_along_row(grid, row: int, n_cols: int) -> tuple[np.ndarray, np.ndarray]:
+    # Points every few meters along a row street, slightly next to it
+    lat0 = grid.nodes[row * n_cols]["y"] + 0.00005
+    lng0 = grid.nodes[row * n_cols]["x"]
+    lng1 = grid.nodes[row * n_cols + n_cols - 1]["x"]
+
+    lng = np.linspace(lng0, lng1, 500)
+    return np.full_like(lng, lat0), lng
+
+
+def test_group_street_nodes(grid):
+    streets = group_street_nodes(grid)
+
+    assert len(streets) == 6 + 8
+    assert streets["Row 0"] == set(range(8))
+    assert streets["Col 0"] == {row * 8 for row in range(6)}
+
+
+def test_completion_by_visited_nodes(grid):
+    lat, lng = run_along_row(grid, 0, 8)
+    completion = find_completion(grid, lat, lng)
+
+    assert completion.completed == ["Row 0"]
+    assert len(completion.todo) == 6 + 8 - 1
+
+    # Every column street only has its first node visited
+    assert completion.fraction("Col 3") == 1 / 6
+
+
+def test_completion_threshold(grid):
+    lat, lng = run_along_row(grid, 0, 8)
+    keep = lng <= grid.nodes[5]["x"]
+
+    completion = find_completion(grid, lat[keep], lng[keep], threshold=0.75)
+    assert completion.fraction("Row 0") == 6 / 8
+    assert completion.completed == ["Row 0"]
+
+
+@define
+class Entry:
+    path: str
+
+
+@define
+class Run:
+    lat: np.ndarray
+    lng: np.ndarray
+
+
+def test_complete_streets_lists_all_streets(make_grid, tmp_path, monkeypatch):
+    city = make_grid(10, 10)
+    lat, lng = run_along_row(city, 0, 10)
+
+    monkeypatch.setattr(crunner.completion, "STREET_PATH", tmp_path)
+    monkeypatch.setattr(
+        crunner.completion, "find_runs", lambda area: [Entry("run.gpx")]
+    )
+    monkeypatch.setattr(crunner.completion, "read_gpx", lambda path: Run(lat, lng))
+    monkeypatch.setattr(crunner.completion, "load_city_graph", lambda area: city)
+
+    complete_streets("City")
+
+    strides_path = tmp_path / "City" / "local"
+    with open(strides_path / "all.json", "r", encoding="utf-8") as file:
+        streets = json.load(file)
+    with open(strides_path / "completed.json", "r", encoding="utf-8") as file:
+        completed = json.load(file)
+    with open(strides_path / "todo.json", "r", encoding="utf-8") as file:
+        todo = json.load(file)
+
+    # Streets far from the runs count as well
+    assert len(streets) == 20
+    assert completed == ["Row 0"]
+    assert sorted(completed + todo) == streets
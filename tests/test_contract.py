@@ -0,0 +1,96 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from crunner.contract import contract_chains
+
+
+def edge_items(graph: nx.MultiDiGraph) -> list:
+    # Undirected edges can be listed from either side
+    return sorted(
+        (
+            *((src, dst) if graph.is_directed() else sorted((src, dst))),
+            key,
+            sorted(data.items()),
+        )
+        for src, dst, key, data in graph.edges(keys=True, data=True)
+    )
+
+
+@pytest.fixture
+def street(make_grid) -> nx.MultiDiGraph:
+    # A single two-way street of 5 nodes
+    return make_grid(1, 5)
+
+
+def test_contract_street(street):
+    distance = sum(data["distance"] for *_, data in street.edges(0, data=True))
+    distance += sum(street.edges[node, node + 1, 0]["distance"] for node in range(1, 4))
+
+    contraction = contract_chains(street)
+
+    assert sorted(street.nodes) == [0, 4]
+    assert sorted(street.edges()) == [(0, 4), (4, 0)]
+    assert len(contraction.nodes) == 3
+
+    data = street.edges[0, 4, 0]
+    assert data["name"] == "Row 0"
+    assert data["distance"] == pytest.approx(distance)
+    assert len(data["geometry"]) == 5
+    assert np.allclose(
+        data["geometry"][0], (street.nodes[0]["x"], street.nodes[0]["y"])
+    )
+
+    assert contraction.find_chain((0, 4, 0)) == [
+        (node, node + 1, 0) for node in range(4)
+    ]
+    assert contraction.find_chain((0, 1, 0)) == [(0, 1, 0)]
+
+
+def test_contract_keeps_removed_edges_apart(street):
+    street.edges[2, 3, 0]["is_removed"] = True
+    street.edges[3, 2, 0]["is_removed"] = True
+
+    contract_chains(street)
+
+    assert sorted(street.nodes) == [0, 2, 3, 4]
+
+
+def test_contract_one_way_street():
+    street = nx.path_graph(4, create_using=nx.MultiDiGraph)
+    nx.set_node_attributes(street, {node: float(node) for node in street}, "x")
+    nx.set_node_attributes(street, 0.0, "y")
+
+    contraction = contract_chains(street)
+
+    assert sorted(street.edges()) == [(0, 3)]
+    assert len(contraction) == 1
+
+
+@pytest.mark.parametrize("directed", [True, False])
+def test_contract_expand_round_trip(make_grid, directed):
+    graph = make_grid(6, 8, directed=directed)
+    graph.remove_edges_from([(9, 10, 0), (10, 9, 0)])
+    expected_nodes = dict(graph.nodes(data=True))
+    expected_edges = edge_items(graph)
+
+    contraction = contract_chains(graph)
+    assert graph.number_of_nodes() < len(expected_nodes)
+
+    contraction.expand(graph)
+    assert dict(graph.nodes(data=True)) == expected_nodes
+    assert edge_items(graph) == expected_edges
+
+
+def test_contract_isolated_cycle():
+    cycle = nx.cycle_graph(5, create_using=nx.MultiGraph)
+    nx.set_node_attributes(cycle, {node: float(node) for node in cycle}, "x")
+    nx.set_node_attributes(cycle, 0.0, "y")
+
+    contraction = contract_chains(cycle)
+
+    assert cycle.number_of_nodes() == 1
+    assert cycle.number_of_edges() == 1
+
+    contraction.expand(cycle)
+    assert sorted(cycle.edges()) == sorted(nx.cycle_graph(5).edges())
@@ -0,0 +1,17 @@
+from crunner.extract import matches_filter, parse_filter, strip_extract_suffix
+
+
+def test_strip_extract_suffix():
+    assert strip_extract_suffix("Rotterdam.osm.pbf") == "Rotterdam"
+    assert strip_extract_suffix("Rotterdam.pbf") == "Rotterdam"
+    assert strip_extract_suffix("Rotterdam.osm") == "Rotterdam"
+    assert strip_extract_suffix("Rotterdam.graphml") == "Rotterdam.graphml"
+
+
+def test_matches_filter():
+    conditions = parse_filter('["highway"]["area"!~"yes"]["access"!="private"]')
+
+    assert matches_filter({"highway": "residential"}, conditions)
+    assert not matches_filter({"highway": "residential", "area": "yes"}, conditions)
+    assert not matches_filter({"highway": "service", "access": "private"}, conditions)
+    assert not matches_filter({"name": "Coolsingel"}, conditions)
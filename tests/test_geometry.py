@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+import shapely
+from shapely import LineString
+
+from crunner.geometry import (
+    PackedCoords,
+    decode_coords,
+    encode_coords,
+    find_geometry,
+    materialize_geometries,
+    pack_geometries,
+    parse_coords,
+    to_coords,
+    to_linestring,
+)
+
+COORDS = np.array([[4.4, 51.9], [4.4005, 51.9003], [4.401, 51.9]])
+
+
+def test_micro_degrees_round_trip():
+    encoded = encode_coords(COORDS)
+
+    assert encoded.dtype == np.int32
+    assert np.abs(decode_coords(encoded) - COORDS).max() <= 0.5e-6
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "LINESTRING (4.4 51.9, 4.4005 51.9003, 4.401 51.9)",
+        "[[4.4, 51.9], [4.4005, 51.9003], [4.401, 51.9]]",
+        "[(4.4, 51.9), (4.4005, 51.9003), (4.401, 51.9)]",
+    ],
+)
+def test_parse_coords(text):
+    assert np.allclose(parse_coords(text), COORDS)
+
+
+@pytest.mark.parametrize("text", ["", "LINESTRING EMPTY", "[[4.4, 51.9]]", "[4.4]"])
+def test_parse_invalid_coords(text):
+    assert parse_coords(text) is None
+
+
+def test_raw_geometries_give_the_same_line():
+    line = LineString(COORDS)
+    packed = PackedCoords(encode_coords(np.vstack([COORDS, COORDS])), 3, 6)
+
+    for geometry in (line, line.wkt, shapely.to_wkb(line), COORDS, packed):
+        assert np.allclose(to_coords(geometry), COORDS)
+        assert to_linestring(geometry).equals_exact(line, 1e-6)
+
+
+def test_find_geometry_materialises_once():
+    data = {"geometry": LineString(COORDS).wkt}
+    line = find_geometry(data)
+
+    assert isinstance(line, LineString)
+    assert data["geometry"] is line
+
+
+def test_pack_and_materialize(grid):
+    for src, dst, data in grid.edges(data=True):
+        data["geometry"] = LineString(
+            [(grid.nodes[node]["x"], grid.nodes[node]["y"]) for node in (src, dst)]
+        )
+    lines = {
+        (src, dst, key): data["geometry"]
+        for src, dst, key, data in grid.edges(keys=True, data=True)
+    }
+
+    pack_geometries(grid)
+    geometries = [data["geometry"] for *_, data in grid.edges(data=True)]
+    assert all(isinstance(geometry, PackedCoords) for geometry in geometries)
+    assert len({id(geometry.buffer) for geometry in geometries}) == 1
+
+    materialize_geometries(grid)
+    for src, dst, key, data in grid.edges(keys=True, data=True):
+        assert data["geometry"].equals_exact(lines[src, dst, key], 1e-6)
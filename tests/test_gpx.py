@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from crunner.geo import haversine, offset_track
+from crunner.gpx import offset_gpx, read_gpx
+
+GPX = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<gpx version="1.1" creator="test" xmlns="http://www.topografix.com/GPX/1/1">
+  <trk>
+    <name>Circuit</name>
+    <trkseg>
+      <trkpt lat="51.9" lon="4.4"></trkpt>
+      <trkpt lat="51.9" lon="4.401"></trkpt>
+      <trkpt lat="51.901" lon="4.401"></trkpt>
+    </trkseg>
+    <trkseg>
+      <trkpt lat="51.902" lon="4.401"></trkpt>
+      <trkpt lat="51.902" lon="4.4"></trkpt>
+    </trkseg>
+  </trk>
+</gpx>
+"""
+
+
+def test_offset_track_to_the_left():
+    # Heading east, so the left is north
+    lat, lng = offset_track(np.array([51.9, 51.9]), np.array([4.4, 4.401]), 5.0)
+
+    assert np.all(lat > 51.9)
+    assert haversine(lat, lng, np.full(2, 51.9), np.array([4.4, 4.401])) == (
+        pytest.approx(5.0, rel=1e-3)
+    )
+
+
+def test_offset_track_miter_join():
+    # The corner moves diagonally, such that both segments stay 5 m away
+    lat, lng = offset_track(
+        np.array([51.9, 51.9, 51.901]), np.array([4.4, 4.401, 4.401]), -5.0
+    )
+    corner = haversine(lat[1], lng[1], 51.9, 4.401)
+
+    assert corner == pytest.approx(5.0 * np.sqrt(2), rel=1e-3)
+
+
+def test_offset_gpx(tmp_path):
+    path = tmp_path / "circuit.gpx"
+    path.write_text(GPX)
+    out_path = offset_gpx(path, 5.0, tmp_path / "offset.gpx")
+
+    data, offset = read_gpx(path), read_gpx(out_path)
+
+    assert "<name>circuit</name>" in out_path.read_text()
+    assert list(offset.starts) == list(data.starts)
+    assert haversine(offset.lat, offset.lng, data.lat, data.lng) == pytest.approx(
+        [5.0, 5.0 * np.sqrt(2), 5.0, 5.0, 5.0], rel=1e-3
+    )
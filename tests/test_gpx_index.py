@@ -0,0 +1,43 @@
+import os
+
+from crunner.gpx_index import GpxIndex
+
+GPX = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<gpx version="1.1" creator="test" xmlns="http://www.topografix.com/GPX/1/1">
+  <metadata><name>{name}</name></metadata>
+  <trk>
+    <trkseg>
+      <trkpt lat="51.9" lon="4.4"></trkpt>
+      <trkpt lat="51.901" lon="4.401"></trkpt>
+    </trkseg>
+  </trk>
+</gpx>
+"""
+
+
+def test_index_reads_changed_files_only(tmp_path):
+    (tmp_path / "Rotterdam").mkdir()
+    path = tmp_path / "Rotterdam" / "run.gpx"
+    path.write_text(GPX.format(name="Morning run"))
+    (tmp_path / "broken.gpx").write_text("<gpx>")
+
+    index = GpxIndex(tmp_path)
+    assert index.refresh() == 2
+    assert index.refresh() == 0
+
+    entries = {entry.path.name: entry for entry in index.entries()}
+    assert not entries["broken.gpx"].is_valid
+    assert entries["run.gpx"].name == "Morning run"
+    assert entries["run.gpx"].n_points == 2
+    assert entries["run.gpx"].bounds == (51.9, 4.4, 51.901, 4.401)
+
+    # Changed files are read again, both on refresh and when getting them
+    path.write_text(GPX.format(name="Evening run"))
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000_000))
+    assert index.get(path).name == "Evening run"
+    assert index.refresh() == 0
+
+    (tmp_path / "broken.gpx").unlink()
+    index.refresh()
+    assert [entry.path.name for entry in index.entries()] == ["run.gpx"]
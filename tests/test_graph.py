@@ -0,0 +1,66 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from crunner.graph import (
+    OSM_IDS,
+    annotate_with_distances,
+    load_osm_ids,
+    relabel_compact,
+    save_osm_ids,
+)
+
+
+def test_annotate_keeps_stored_distances(grid):
+    grid.edges[0, 1, 0]["distance"] = "123.5"
+
+    annotate_with_distances(grid)
+    assert grid.edges[0, 1, 0]["distance"] == 123.5
+
+
+def test_annotate_finds_missing_distances(grid):
+    expected = grid.edges[0, 1, 0].pop("distance")
+
+    annotate_with_distances(grid)
+    assert grid.edges[0, 1, 0]["distance"] == pytest.approx(expected, rel=1e-2)
+
+
+@pytest.fixture
+def osm_grid(grid):
+    # Give the nodes sparse ids, like the ids of OSM nodes
+    return nx.relabel_nodes(grid, {node: 1_000_000 + 7 * node for node in grid})
+
+
+def test_relabel_compact(osm_grid):
+    expected = nx.relabel_nodes(
+        osm_grid, {node: idx for idx, node in enumerate(osm_grid)}
+    )
+    edge_data = osm_grid.edges[1_000_000, 1_000_007, 0]
+    osm_grid.nodes[1_000_007]["is_cut"] = True
+
+    osm_ids = relabel_compact(osm_grid)
+
+    assert list(osm_grid.nodes) == list(range(len(expected)))
+    assert sorted(osm_grid.edges(keys=True)) == sorted(expected.edges(keys=True))
+    assert sorted(osm_grid.pred[1]) == sorted(expected.pred[1])
+    assert osm_grid.edges[0, 1, 0] is edge_data
+
+    assert osm_ids[0] == 1_000_000
+    assert osm_ids[1] == -1
+    assert osm_ids[2] == 1_000_014
+
+
+def test_save_osm_ids_pads_new_nodes(grid, tmp_path):
+    path = tmp_path / "graph.graphml"
+    grid.graph[OSM_IDS] = np.arange(len(grid) - 2, dtype=np.int64) + 100
+
+    save_osm_ids(grid, path)
+    osm_ids = load_osm_ids(path)
+
+    assert len(osm_ids) == len(grid)
+    assert osm_ids[0] == 100
+    assert list(osm_ids[-2:]) == [-1, -1]
+
+
+def test_load_missing_osm_ids(tmp_path):
+    assert load_osm_ids(tmp_path / "graph.graphml") is None
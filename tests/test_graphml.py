@@ -0,0 +1,91 @@
+from shapely import LineString
+
+from crunner.geometry import to_linestring
+from crunner.graphml import read_graphml, write_graphml
+
+LEGACY_GRAPHML = """\
+<?xml version='1.0' encoding='utf-8'?>
+<graphml xmlns="http://graphml.graphdrawing.org/xmlns">
+  <key id="d0" for="graph" attr.name="crs" attr.type="string" />
+  <key id="d1" for="node" attr.name="lng" attr.type="string" />
+  <key id="d2" for="node" attr.name="lat" attr.type="string" />
+  <key id="d3" for="node" attr.name="is_removed" attr.type="string">
+    <default>False</default>
+  </key>
+  <key id="d4" for="edge" attr.name="name" attr.type="string" />
+  <key id="d5" for="edge" attr.name="osmid" attr.type="string" />
+  <key id="d6" for="edge" attr.name="oneway" attr.type="string" />
+  <key id="d7" for="edge" attr.name="coordinates" attr.type="string" />
+  <key id="d8" for="edge" attr.name="length" attr.type="string" />
+  <graph edgedefault="directed">
+    <data key="d0">epsg:4326</data>
+    <node id="1">
+      <data key="d1">4.4</data>
+      <data key="d2">51.9</data>
+    </node>
+    <node id="2">
+      <data key="d1">4.401</data>
+      <data key="d2">51.9</data>
+      <data key="d3">true</data>
+    </node>
+    <edge source="1" target="2" id="0">
+      <data key="d4">['Coolsingel', 'Lijnbaan']</data>
+      <data key="d5">[12, 13]</data>
+      <data key="d6">false</data>
+      <data key="d7">[[4.4, 51.9], [4.401, 51.9]]</data>
+      <data key="d8">68.7</data>
+    </edge>
+  </graph>
+</graphml>
+"""
+
+
+def test_read_legacy_graphml(tmp_path):
+    path = tmp_path / "legacy.graphml"
+    path.write_text(LEGACY_GRAPHML)
+    graph = read_graphml(path)
+
+    assert graph.is_directed()
+    assert graph.graph == {"crs": "epsg:4326"}
+
+    # Legacy names are renamed and defaults are filled in
+    assert graph.nodes[1] == {"x": 4.4, "y": 51.9, "is_removed": False}
+    assert graph.nodes[2] == {"x": 4.401, "y": 51.9, "is_removed": True}
+
+    data = graph.edges[1, 2, 0]
+    assert data["name"] == ["Coolsingel", "Lijnbaan"]
+    assert data["osmid"] == [12, 13]
+    assert data["oneway"] is False
+    assert data["length"] == 68.7
+
+    # Geometries are only parsed once they are needed
+    assert data["geometry"] == "[[4.4, 51.9], [4.401, 51.9]]"
+
+
+def test_read_undirected_graphml(tmp_path):
+    path = tmp_path / "undirected.graphml"
+    path.write_text(LEGACY_GRAPHML.replace('"directed"', '"undirected"'))
+
+    assert not read_graphml(path).is_directed()
+
+
+def test_write_read_round_trip(grid, tmp_path):
+    grid.graph["crs"] = "epsg:4326"
+    grid.nodes[0]["is_removed"] = True
+    grid.edges[0, 1, 0]["name"] = ["Row 0", "Coolsingel"]
+    grid.edges[0, 1, 0]["geometry"] = LineString([(4.4, 51.9), (4.401, 51.9)])
+
+    path = tmp_path / "graph.graphml"
+    write_graphml(grid, path, {"geometry": "coordinates"})
+    graph = read_graphml(path)
+
+    assert graph.graph == grid.graph
+    assert dict(graph.nodes(data=True)) == dict(grid.nodes(data=True))
+    assert sorted(graph.edges(keys=True)) == sorted(grid.edges(keys=True))
+
+    data = dict(graph.edges[0, 1, 0])
+    assert to_linestring(data.pop("geometry")).equals(grid.edges[0, 1, 0]["geometry"])
+    assert data == {
+        attr: value for attr, value in grid.edges[0, 1, 0].items() if attr != "geometry"
+    }
+    assert graph.edges[1, 0, 0] == grid.edges[1, 0, 0]
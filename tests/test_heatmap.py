@@ -0,0 +1,131 @@
+import math
+
+import numpy as np
+import pytest
+
+import crunner.heatmap
+from crunner.archive import RunArchive, to_points
+from crunner.heatmap import (
+    MAX_ZOOM,
+    MIN_ZOOM,
+    TILE_SIZE,
+    find_area,
+    find_graph_heatmap,
+    find_heatmap,
+    rasterise,
+    to_pixels,
+)
+
+
+def random_runs(
+    lat0: float, lng0: float, n_runs: int = 3, n_points: int = 200, seed: int = 0
+):
+    rng = np.random.default_rng(seed)
+    runs = []
+
+    for run in range(n_runs):
+        lat = lat0 + np.cumsum(rng.normal(0, 2e-5, n_points))
+        lng = lng0 + np.cumsum(rng.normal(0, 3e-5, n_points))
+        runs.append(
+            to_points(
+                f"run {run}",
+                lat.tolist(),
+                lng.tolist(),
+                [None] * n_points,
+                [0] * n_points,
+            )
+        )
+
+    return runs
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch) -> RunArchive:
+    monkeypatch.setattr(crunner.heatmap, "HEATMAP_PATH", tmp_path / "heatmap")
+
+    archive = RunArchive(tmp_path / "archive")
+    archive.append("Rotterdam (gemeente)", random_runs(51.9, 4.4))
+    archive.append("Groningen", random_runs(53.2, 6.56, n_runs=1))
+
+    return archive
+
+
+def test_pixels_match_map_tiles():
+    lat, lng, zoom = 51.92, 4.48, 14
+
+    # Tile numbers as used by the map
+    n_tiles = 2**zoom
+    tile_x = int((lng + 180) / 360 * n_tiles)
+    tile_y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n_tiles)
+
+    x, y = to_pixels(np.array([lat]), np.array([lng]), zoom)
+    assert (x[0] // TILE_SIZE, y[0] // TILE_SIZE) == (tile_x, tile_y)
+
+
+def test_rasterise_keeps_all_points():
+    rng = np.random.default_rng(1)
+    lat = 51.9 + rng.uniform(0, 0.05, 10_000)
+    lng = 4.4 + rng.uniform(0, 0.05, 10_000)
+
+    levels = rasterise(lat, lng)
+    assert sorted(levels) == list(range(MIN_ZOOM, MAX_ZOOM + 1))
+
+    for zoom, (x, y, counts) in levels.items():
+        assert counts.sum() == len(lat)
+        assert len(set(zip(x.tolist(), y.tolist()))) == len(x)
+
+    # Every lower zoom level has at most as many pixels
+    n_pixels = [len(levels[zoom][0]) for zoom in sorted(levels)]
+    assert n_pixels == sorted(n_pixels)
+
+
+def test_find_area_by_location(archive, make_grid):
+    graph = make_grid(20, 20)
+    assert find_area(graph, archive) == "Rotterdam (gemeente)"
+
+    for _, data in graph.nodes(data=True):
+        data["y"] -= 10.0
+    assert find_area(graph, archive) is None
+
+
+def test_heatmap_is_cached(archive, make_grid, monkeypatch):
+    heatmap = find_graph_heatmap(make_grid(20, 20), archive)
+    assert heatmap is not None and heatmap.exists()
+    assert heatmap.manifest["n_points"] == 3 * 200
+    assert any(heatmap.tiles_path.glob(f"{MAX_ZOOM}/*/*.png"))
+
+    # The tiles are only rasterised again once runs are added
+    def fail(*args, **kwargs):
+        raise AssertionError("Heatmap was rasterised again")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(crunner.heatmap.HeatmapStore, "save", fail)
+        assert find_heatmap("Rotterdam (gemeente)", archive).tiles_path == (
+            heatmap.tiles_path
+        )
+
+    old_path = heatmap.tiles_path
+    archive.append("Rotterdam (gemeente)", random_runs(51.9, 4.4, n_runs=1, seed=2))
+
+    heatmap = find_heatmap("Rotterdam (gemeente)", archive)
+    assert heatmap.manifest["n_points"] == 4 * 200
+    assert heatmap.tiles_path != old_path and not old_path.exists()
+
+
+def test_no_heatmap_without_runs(archive):
+    assert find_heatmap("Capelle", archive) is None
+
+
+def test_no_heatmap_without_points(archive, tmp_path):
+    empty = to_points("empty", [], [], [], [])
+
+    # Runs without points are not archived
+    archive.append("Capelle", [empty])
+    assert not archive.part_paths("Capelle")
+
+    # Files without points (as archived before) give no heatmap either
+    path = tmp_path / "archive" / "area=Capelle" / "month=unknown" / "part-0.parquet"
+    path.parent.mkdir(parents=True)
+    empty.write_parquet(path)
+
+    assert find_heatmap("Capelle", archive) is None
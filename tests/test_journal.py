@@ -0,0 +1,171 @@
+from itertools import pairwise
+from pathlib import Path
+
+import networkx as nx
+import pytest
+
+import crunner.editor
+from crunner.columnar import load_columnar
+from crunner.editor import DEFAULT_OPTIONS, Editor
+from crunner.editor.command.toggle_removed import ToggleRemovedCommand
+from crunner.graph import ToggleOption
+from crunner.journal import Journal
+from crunner.path import Paths
+
+
+def assert_same_graph(graph: nx.MultiDiGraph, other: nx.MultiDiGraph):
+    assert dict(graph.nodes(data=True)) == dict(other.nodes(data=True))
+    assert sorted(graph.edges(keys=True, data=True)) == sorted(
+        other.edges(keys=True, data=True)
+    )
+
+
+def test_replay_restores_edits(grid, tmp_path):
+    saved = grid.copy()
+    journal = Journal(tmp_path / "grid.graphml")
+
+    # Change a node, remove a node and change, add and remove edges
+    grid.nodes[0]["is_highlighted"] = True
+    grid.remove_node(47)
+    grid.edges[1, 2, 0]["is_removed"] = True
+    grid.add_edge(0, 9, is_removed=False, self_created=True)
+    grid.remove_edge(10, 11, 0)
+    journal.record(grid, {0, 47}, {(1, 2, 0), (0, 9, 0), (10, 11, 0)})
+
+    assert journal.flush() > 0
+    assert Journal(tmp_path / "grid.graphml").replay(saved) == len(journal)
+    assert_same_graph(saved, grid)
+
+
+def test_replay_is_idempotent(grid, tmp_path):
+    journal = Journal(tmp_path / "grid.graphml")
+    edited = grid.copy()
+    edited.edges[3, 4, 0]["is_removed"] = True
+    journal.record(edited, set(), {(3, 4, 0)})
+    journal.flush()
+
+    journal.replay(grid)
+    journal.replay(grid)
+    assert_same_graph(grid, edited)
+
+
+def test_replay_skips_partial_entries(grid, tmp_path):
+    journal = Journal(tmp_path / "grid.graphml")
+    edited = grid.copy()
+    edited.nodes[5]["is_removed"] = True
+    journal.record(edited, {5}, set())
+    journal.flush()
+
+    with open(journal.path, "a", encoding="utf-8") as file:
+        file.write('{"node": 6, "da')
+
+    assert Journal(tmp_path / "grid.graphml").replay(grid) == 1
+    assert grid.nodes[5]["is_removed"]
+
+
+def test_clear_removes_entries(grid, tmp_path):
+    journal = Journal(tmp_path / "grid.graphml")
+    journal.record(grid, {0}, set())
+    journal.flush()
+
+    journal.clear()
+    assert len(journal) == 0
+    assert not journal.path.exists()
+
+
+@pytest.fixture
+def editor(grid, tmp_path, monkeypatch) -> Editor:
+    def graph_path(cls, suffix: Path | None = None) -> Path:
+        return tmp_path / suffix if suffix is not None else tmp_path
+
+    monkeypatch.setattr(Paths, "graph", classmethod(graph_path))
+    monkeypatch.setattr(crunner.editor, "COMPACT_EVERY", 20)
+
+    editor = Editor()
+    editor.opts = {**DEFAULT_OPTIONS, "auto_save": True}
+
+    # Do not search the runs for a heatmap
+    monkeypatch.setattr(editor.explorer, "load_heatmap", lambda graph: None)
+    editor.change_graph(grid, Path("grid.graphml"))
+
+    return editor
+
+
+@pytest.fixture
+def full_saves(editor, monkeypatch) -> list[Path]:
+    full_saves = []
+    save_graph = editor.save_graph
+    monkeypatch.setattr(
+        editor, "save_graph", lambda path: full_saves.append(path) or save_graph(path)
+    )
+
+    return full_saves
+
+
+def toggle_node(editor: Editor, node: int):
+    editor.do(ToggleRemovedCommand(editor.graph, {node}, set(), ToggleOption.NO_TOGGLE))
+
+
+def test_auto_save_appends_after_compaction(editor, full_saves):
+    is_full = []
+    for node in range(16):
+        n_full_saves = len(full_saves)
+        toggle_node(editor, node)
+        editor.auto_save(editor.path)
+
+        is_full.append(len(full_saves) > n_full_saves)
+
+    # The graph was never saved, after which it is only compacted now and then
+    assert is_full[0]
+    assert sum(is_full) >= 2
+    assert not any(full and next_full for full, next_full in pairwise(is_full))
+
+    # Saves after a compaction are appended to a new journal again
+    assert not is_full[-1] or not is_full[-2]
+    assert len(editor.journal) < 2 * crunner.editor.COMPACT_EVERY
+
+
+def test_auto_save_replaces_other_saved_graph(editor, full_saves, make_grid):
+    # An older (e.g. differently built) graph was saved under the same name
+    editor.handler.save(make_grid(3, 3), editor.path)
+
+    toggle_node(editor, 0)
+    editor.auto_save(editor.path)
+    toggle_node(editor, 1)
+    editor.auto_save(editor.path)
+
+    # The first save replaces the old graph, after which changes are journaled onto it
+    assert full_saves == [editor.path]
+    assert len(editor.journal) > 0
+
+    saved = load_columnar(Paths.graph(editor.path))
+    assert saved.number_of_nodes() == editor.graph.number_of_nodes()
+    assert editor.journal.replay(saved) > 0
+    assert saved.nodes[1]["is_removed"] == editor.graph.nodes[1]["is_removed"]
+
+
+def test_change_graph_journals_against_new_graph(
+    editor, full_saves, make_grid, monkeypatch
+):
+    heatmap_graphs = []
+    monkeypatch.setattr(editor.explorer, "load_heatmap", heatmap_graphs.append)
+
+    toggle_node(editor, 0)
+    editor.auto_save(editor.path)
+    toggle_node(editor, 1)
+    editor.auto_save(editor.path)
+    old_journal = editor.journal
+
+    small = make_grid(3, 3)
+    editor.change_graph(small, Path("small.graphml"))
+    assert editor.journal.path != old_journal.path
+    assert not editor.command_history
+    assert heatmap_graphs == [small]
+
+    toggle_node(editor, 4)
+    editor.auto_save(editor.path)
+
+    # The new graph is saved in full, while the journal of the old graph is kept
+    assert full_saves == [Path("grid.graphml"), Path("small.graphml")]
+    assert len(editor.journal) == 0
+    assert len(Journal(Paths.graph(Path("grid.graphml")))) == len(old_journal) > 0
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from crunner.matching import MapMatcher, annotate_coverage, sample_track
+
+# Distance (in degrees) between the points of a track, which is roughly 5 m eastwards
+STEP = 0.00007
+
+
+def row_track(graph, start: float, end: float, drift: float = 0.0):
+    # Track along the first row street from one longitude to another, drifting north
+    lng = np.linspace(start, end, int(np.ceil((end - start) / STEP)) + 1)
+    lat = np.full(len(lng), graph.nodes[0]["y"] + drift)
+
+    return lat, lng
+
+
+def node_lng(graph, node: int) -> float:
+    return graph.nodes[node]["x"]
+
+
+def test_sample_track():
+    x = np.array([0.0, 3.0, 9.0, 12.0, 25.0])
+    assert list(sample_track(x, np.zeros(5), 10.0)) == [0, 3, 4]
+    assert list(sample_track(x[:4], np.zeros(4), 10.0)) == [0, 3]
+
+
+def test_add_track_covers_row_street(grid):
+    matcher = MapMatcher(grid)
+    lat, lng = row_track(grid, node_lng(grid, 0), node_lng(grid, 3), 0.00002)
+
+    assert matcher.add_track(lat, lng) > 0
+
+    coverage = matcher.coverage()
+    covered = {edge for edge, fraction in coverage.items() if fraction > 0.5}
+    assert {tuple(sorted(edge[:2])) for edge in covered} == {(0, 1), (1, 2), (2, 3)}
+    assert all(coverage[edge] == pytest.approx(1.0, abs=0.05) for edge in covered)
+
+
+def test_coverage_of_partly_covered_edge(grid):
+    matcher = MapMatcher(grid)
+    lng_1, lng_2 = node_lng(grid, 1), node_lng(grid, 2)
+
+    matcher.add_track(*row_track(grid, node_lng(grid, 0), (lng_1 + lng_2) / 2))
+    coverage = matcher.coverage()
+
+    assert coverage[0, 1, 0] == pytest.approx(1.0, abs=0.05)
+    assert coverage[1, 2, 0] == pytest.approx(0.5, abs=0.1)
+
+
+def test_coverage_merges_overlapping_intervals(grid):
+    matcher = MapMatcher(grid)
+    lng_1, lng_2 = node_lng(grid, 1), node_lng(grid, 2)
+    width = lng_2 - lng_1
+
+    # Both tracks cover 40% of the edge, of which they share half
+    matcher.add_track(*row_track(grid, lng_1 + 0.1 * width, lng_1 + 0.5 * width))
+    matcher.add_track(*row_track(grid, lng_1 + 0.3 * width, lng_1 + 0.7 * width))
+
+    assert matcher.coverage()[1, 2, 0] == pytest.approx(0.6, abs=0.1)
+
+
+def test_jump_penalty_keeps_track_on_connected_street(make_grid):
+    # Two parallel streets about 22 m apart, which are not connected
+    graph = make_grid(2, 5, spacing=0.0002)
+    graph.remove_edges_from(
+        [
+            (src, dst, key)
+            for src, dst, key, data in graph.edges(keys=True, data=True)
+            if data["name"].startswith("Col")
+        ]
+    )
+    matcher = MapMatcher(graph)
+
+    # A single point drifts closer to the other street
+    lat, lng = row_track(graph, node_lng(graph, 0), node_lng(graph, 4))
+    lat[len(lat) // 2] += 0.00013
+    matcher.add_track(lat, lng)
+
+    coverage = matcher.coverage()
+    assert all(
+        fraction == pytest.approx(1.0, abs=0.05) for fraction in coverage.values()
+    )
+    assert {edge[:2] for edge in coverage} == {(0, 1), (1, 2), (2, 3), (3, 4)}
+
+
+def test_annotate_coverage_marks_both_directions(grid):
+    annotate_coverage(grid, {(0, 1, 0): 0.95, (1, 2, 0): 0.5})
+
+    assert grid.edges[1, 0, 0]["is_covered"]
+    assert grid.edges[1, 2, 0]["coverage"] == 0.5
+    assert not grid.edges[2, 1, 0]["is_covered"]
+    assert grid.edges[8, 9, 0]["coverage"] == 0.0
@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import pytest
+
+from crunner.parallel import MIN_PARALLEL_FILES, map_paths
+
+
+def find_stem(path: Path) -> str:
+    return path.stem
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_map_paths_keeps_order(n_workers):
+    paths = [Path(f"run_{idx}.gpx") for idx in range(2 * MIN_PARALLEL_FILES)]
+    results = list(map_paths(find_stem, paths, n_workers))
+
+    assert results == [(path, path.stem) for path in paths]
+
+
+def find_even_stem(path: Path) -> str:
+    if int(path.stem.split("_")[1]) % 2:
+        raise ValueError(f"{path.name} is odd")
+
+    return path.stem
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_map_paths_skips_errors(n_workers, capsys):
+    paths = [Path(f"run_{idx}.gpx") for idx in range(6)]
+    results = map_paths(
+        find_even_stem, paths, n_workers, n_ahead=1, min_parallel=2, skip_errors=True
+    )
+
+    assert [path for path, _ in results] == paths[::2]
+    assert "run_1.gpx is odd" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_map_paths_raises_errors(n_workers):
+    paths = [Path(f"run_{idx}.gpx") for idx in range(6)]
+
+    with pytest.raises(ValueError):
+        list(map_paths(find_even_stem, paths, n_workers, min_parallel=2))
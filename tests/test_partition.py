@@ -0,0 +1,55 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from crunner.partition import Partitioner, find_partitions
+
+
+@pytest.mark.parametrize("n_parts", [2, 3, 4])
+def test_partition_balances_street_length(make_grid, n_parts):
+    graph = make_grid(20, 20)
+    partitioner = Partitioner(graph, max_imbalance=0.05)
+    parts = partitioner.partition(n_parts)
+
+    assert set(parts.tolist()) == set(range(n_parts))
+
+    weights = np.bincount(parts, partitioner.node_weights, minlength=n_parts)
+    assert weights.max() / weights.mean() < 1.1
+
+
+@pytest.mark.parametrize("n_parts", [2, 4])
+def test_partition_is_contiguous(make_grid, n_parts):
+    graph = make_grid(20, 20)
+    partitioner = Partitioner(graph)
+    parts = partitioner.partition(n_parts)
+
+    for part in range(n_parts):
+        nodes = [partitioner.nodes[idx] for idx in np.flatnonzero(parts == part)]
+        assert nx.is_connected(nx.Graph(graph.subgraph(nodes)))
+
+
+def test_single_part(grid):
+    parts = Partitioner(grid).partition(1)
+    assert not parts.any()
+
+
+def test_removed_streets_carry_no_weight(make_grid):
+    graph = make_grid(4, 4)
+    for *_, data in graph.edges(data=True):
+        data["is_removed"] = True
+
+    partitioner = Partitioner(graph)
+    assert np.allclose(partitioner.weights, 0.0)
+
+
+def test_find_partitions_assigns_every_edge_once(make_grid):
+    graph = make_grid(12, 12)
+    partitions = find_partitions(graph, 3)
+
+    edges = [edge for part in partitions for edge in part.edges(keys=True)]
+    assert len(edges) == len(set(edges)) == graph.number_of_edges()
+
+    # Both directions of a street end up in the same part
+    for part in partitions:
+        for src, dst, key in part.edges(keys=True):
+            assert part.has_edge(dst, src, key)
@@ -0,0 +1,127 @@
+from pathlib import Path
+
+import networkx as nx
+
+import crunner.handler
+from crunner.columnar import save_columnar
+from crunner.handler import Handler
+from crunner.reconcile import match_nodes, reconcile_edits
+
+
+def relabel(graph: nx.MultiDiGraph, offset: int = 1000) -> nx.MultiDiGraph:
+    # Newly downloaded graphs generally number their nodes differently
+    return nx.relabel_nodes(graph, {node: node + offset for node in graph.nodes})
+
+
+def split_edge(graph: nx.MultiDiGraph, src: int, dst: int, node: int):
+    # Split a street in two at its midpoint, in both directions
+    src_data, dst_data = graph.nodes[src], graph.nodes[dst]
+    graph.add_node(
+        node,
+        x=(src_data["x"] + dst_data["x"]) / 2,
+        y=(src_data["y"] + dst_data["y"]) / 2,
+    )
+
+    data = dict(graph.edges[src, dst, 0])
+    for u, v in ((src, dst), (dst, src)):
+        graph.remove_edge(u, v, 0)
+        graph.add_edge(u, node, **data)
+        graph.add_edge(node, v, **data)
+
+
+def test_match_nodes(grid):
+    new = relabel(grid)
+    new.nodes[1005]["x"] += 1e-6
+    new.nodes[1006]["x"] += 1e-3
+
+    matches = match_nodes(grid, new)
+    assert matches[5] == 1005
+    assert 6 not in matches
+    assert all(matches[node] == node + 1000 for node in matches)
+
+
+def test_reconcile_copies_flags(grid):
+    grid.edges[0, 1, 0]["is_removed"] = True
+    grid.edges[1, 0, 0]["is_removed"] = True
+    grid.edges[9, 10, 0]["is_highlighted"] = True
+    grid.nodes[20]["is_removed"] = True
+
+    new = relabel(grid)
+    for *_, data in new.edges(data=True):
+        data.pop("is_removed", None)
+        data.pop("is_highlighted", None)
+    new.nodes[1020].pop("is_removed")
+
+    result = reconcile_edits(grid, new)
+
+    assert new.edges[1000, 1001, 0]["is_removed"]
+    assert new.edges[1001, 1000, 0]["is_removed"]
+    assert new.edges[1009, 1010, 0]["is_highlighted"]
+    assert not new.edges[1001, 1002, 0]["is_removed"]
+    assert new.nodes[1020]["is_removed"]
+    assert not result.unmatched_edges and not result.unmatched_nodes
+
+
+def test_reconcile_split_edges(grid):
+    grid.edges[2, 3, 0]["is_removed"] = True
+
+    new = relabel(grid)
+    split_edge(new, 1002, 1003, 5000)
+
+    result = reconcile_edits(grid, new)
+
+    # Only the pieces in the direction of the removed edge are removed
+    assert sorted(result.edges[2, 3, 0]) == [(1002, 5000, 0), (5000, 1003, 0)]
+    assert new.edges[1002, 5000, 0]["is_removed"]
+    assert new.edges[5000, 1003, 0]["is_removed"]
+    assert not new.edges[1003, 5000, 0]["is_removed"]
+
+
+def test_reconcile_adds_self_created_edges(grid):
+    grid.add_edge(0, 9, self_created=True, distance=140.0)
+
+    # Nodes that are no longer part of the graph are copied
+    grid.add_node(99, x=4.39, y=51.89)
+    grid.add_edge(0, 99, self_created=True, distance=100.0)
+
+    new = relabel(grid)
+    new.remove_edges_from([(1000, 1009, 0), (1000, 1099, 0)])
+    new.remove_node(1099)
+
+    result = reconcile_edits(grid, new)
+
+    assert len(result.added_edges) == 2
+    assert new.has_edge(1000, 1009)
+    assert new.edges[1000, 1009, 0]["self_created"]
+
+    copied = result.nodes[99]
+    assert new.nodes[copied]["x"] == 4.39
+    assert new.has_edge(1000, copied)
+
+
+def test_reconcile_keeps_automatically_removed_roads(make_grid, tmp_path, monkeypatch):
+    def download() -> nx.MultiDiGraph:
+        graph = make_grid(4, 4)
+        for src, dst in ((0, 1), (1, 0)):
+            graph.edges[src, dst, 0]["highway"] = "primary"
+            graph.edges[src, dst, 0]["is_removed"] = True
+
+        return graph
+
+    # The saved graph has a manually removed road besides the primary road
+    saved = download()
+    saved.edges[5, 6, 0]["is_removed"] = True
+
+    monkeypatch.setattr(crunner.handler, "GRAPH_PATH", tmp_path)
+    (tmp_path / "City").mkdir()
+    save_columnar(saved, tmp_path / "City" / "area.graphml")
+
+    graph = download()
+    Handler._Handler__reconcile_with_saved(
+        graph, Path("/polygons/City/area.csv"), Path("/polygons")
+    )
+
+    assert graph.edges[0, 1, 0]["is_removed"]
+    assert graph.edges[1, 0, 0]["is_removed"]
+    assert graph.edges[5, 6, 0]["is_removed"]
+    assert not graph.edges[6, 7, 0].get("is_removed", False)
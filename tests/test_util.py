@@ -0,0 +1,27 @@
+import pytest
+
+from crunner.util import atomic_write
+
+
+def test_atomic_write_replaces_file(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_text("old")
+
+    with atomic_write(path) as file:
+        file.write("new")
+
+    assert path.read_text() == "new"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_atomic_write_keeps_file_on_error(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_text("old")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as file:
+            file.write("half")
+            raise RuntimeError("Interrupted")
+
+    assert path.read_text() == "old"
+    assert list(tmp_path.iterdir()) == [path]